@@ -0,0 +1,156 @@
+"""
+Bulk audit of the public profiles and repositories of many users.
+
+For every username of a list (a file with one username per line, or standard input), the
+profile (``/users/{username}``, checked against the ``items`` of task1) and every public
+repository (``/users/{username}/repos``, checked against the ``items`` of task3) are
+fetched and validated. Users are audited ``--concurrency`` at a time over the shared
+session, and the usernames are read and the results written as the audit goes, so memory
+stays flat whatever the length of the list.
+
+Every user gets one line in the JSONL report, in the order of the list:
+
+    {"username": "...", "status": 200, "profile_errors": [], "repos": 12, "repo_errors": {}, "error": null, ...}
+
+Usage (from the ``src`` folder):
+
+    python audit.py --usernames members.txt --concurrency 16 --report audit.jsonl
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from itertools import islice
+
+import requests
+
+import task1
+import task3
+from client import POOL_SIZE, build_session
+from pagination import paginate
+
+
+MAX_REPO_ERRORS = 20  # Invalid repositories reported per user
+
+
+def audit_user(session, username, base_url=task1.BASE_URL):
+    """
+    Fetches and validates the profile and the repositories of one user.
+
+    Returns:
+        dict: The report line of the user: status of the profile request, errors of the
+            profile, number of repositories, errors by repository name (at most
+            ``MAX_REPO_ERRORS`` of them), and the error that stopped the audit, if any.
+    """
+
+    result = {"username": username, "status": None, "profile_errors": [], "repos": 0, "repo_errors": {},
+              "error": None}
+    start = time.perf_counter()
+    try:
+        response = session.get(f"{base_url}/{task1.endpoint}/{username}", verify=False)
+        result["status"] = response.status_code
+        if response.status_code != 200:
+            result["error"] = f"Profile request answered {response.status_code}"
+        else:
+            result["profile_errors"] = task1.item_schema.errors(response.json())
+            url = f"{base_url}/{task3.endpoint_1}/{username}/{task3.endpoint_2}"
+            for repo in paginate(session, url, params={"per_page": 100}, verify=False, stream=True):
+                result["repos"] += 1
+                errors = task3.item_schema.errors(repo)
+                if errors and len(result["repo_errors"]) < MAX_REPO_ERRORS:
+                    result["repo_errors"][repo.get("name", str(result["repos"]))] = errors
+    except (requests.RequestException, ValueError) as error:
+        result["error"] = f"{type(error).__name__}: {error}"
+    result["elapsed"] = round(time.perf_counter() - start, 3)
+    result["ok"] = result["error"] is None and not result["profile_errors"] and not result["repo_errors"]
+    return result
+
+
+def audit(session, usernames, concurrency, base_url=task1.BASE_URL):
+    """
+    Audits users ``concurrency`` at a time.
+
+    Args:
+        session (ApiSession): Session shared by every audit.
+        usernames (iterable): The usernames, read as the audit goes (e.g. the lines of a file).
+        concurrency (int): Users audited at the same time.
+        base_url (str): Base URL of the API.
+
+    Yields:
+        dict: The report line of every user (see ``audit_user``), in the order of ``usernames``.
+    """
+
+    usernames = iter(usernames)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    pending = deque()
+
+    def submit(username):
+        return executor.submit(copy_context().run, audit_user, session, username, base_url)
+
+    try:
+        # Keep a bounded window of users in flight and report them in order
+        for username in islice(usernames, concurrency * 2):
+            pending.append(submit(username))
+        while pending:
+            yield pending.popleft().result()
+            username = next(usernames, None)
+            if username is not None:
+                pending.append(submit(username))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def read_usernames(lines):
+    """
+    Yields the usernames of lines of text, skipping blank lines and ``#`` comments.
+    """
+
+    for line in lines:
+        username = line.strip()
+        if username and not username.startswith("#"):
+            yield username
+
+
+def main(lines, concurrency, report):
+    """
+    Runs the audit and writes its report.
+
+    Returns:
+        int: 0 if every user passed, 1 otherwise.
+    """
+
+    session = build_session(pool_size=max(POOL_SIZE, concurrency))
+    counts = {"users": 0, "failed": 0, "repos": 0}
+    start = time.perf_counter()
+    try:
+        with open(report, "w", encoding="utf-8") as file:
+            for result in audit(session, read_usernames(lines), concurrency):
+                file.write(json.dumps(result) + "\n")
+                counts["users"] += 1
+                counts["failed"] += not result["ok"]
+                counts["repos"] += result["repos"]
+    finally:
+        session.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"{counts['users']} users and {counts['repos']} repositories audited in {elapsed:.1f} s "
+          f"({counts['users'] / elapsed if elapsed else 0:.1f} users/s): {counts['failed']} failed")
+    print(f"Report written to {report}")
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Audit the public profiles and repositories of many users.")
+    parser.add_argument("--usernames", default="-", help="file with one username per line (default: stdin)")
+    parser.add_argument("--concurrency", type=int, default=8, help="users audited at the same time")
+    parser.add_argument("--report", default="audit.jsonl", help="JSONL file receiving one line per user")
+    args = parser.parse_args()
+
+    if args.usernames == "-":
+        sys.exit(main(sys.stdin, args.concurrency, args.report))
+    with open(args.usernames, encoding="utf-8") as usernames_file:
+        sys.exit(main(usernames_file, args.concurrency, args.report))
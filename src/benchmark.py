@@ -0,0 +1,285 @@
+"""
+Benchmarks of the client stack against a local stub of the API.
+
+The benchmark starts its own stub (see stub_server.py) with the given latency and payload
+padding, points the configuration to it (``APM_GENERAL__*`` overrides, see config.py) and
+measures the operations used by the tasks:
+
+* ``profile``: one profile fetch (``GET /users/{username}``),
+* ``not_modified``: one conditional fetch answered with a 304,
+* ``commit_walk``: the walk of every page of a commit history,
+* ``repo_diff``: the repository listing of task7 compared with its expectations,
+* ``task7_workflow``: the whole task7 workflow.
+
+Each of them is run in every configuration of the session (``pooled``: keep-alive pool,
+``unpooled``: a new connection per request, ``cached``: pool and ETag cache), both ``sync``
+(one operation after the other, and the workflow steps in order) and ``async`` (operations
+run ``--concurrency`` at a time with asyncio, and the workflow steps by its engine).
+
+For every case, the operations and requests per second, the operation latency percentiles
+and the peak memory allocated by one operation (tracemalloc, in a separate run since
+tracing slows the code down) are printed, and optionally written into a JSON report.
+
+Usage (from the ``src`` folder):
+
+    python benchmark.py --latency 0.02 --padding 512 --runs 50 --concurrency 8 --report bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from stub_server import MAIN_LOGIN, MAIN_REPOS, TOKEN
+
+
+OPERATIONS = ("profile", "not_modified", "commit_walk", "repo_diff", "task7_workflow")
+
+# Session settings of each configuration, and whether connections are reused
+CONFIGURATIONS = {
+    "pooled": {"cache_enabled": False, "keep_alive": True},
+    "unpooled": {"cache_enabled": False, "keep_alive": False},
+    "cached": {"cache_enabled": True, "keep_alive": True},
+}
+
+MODES = ("sync", "async")
+
+
+def start_stub(latency, padding, commits):
+    """
+    Starts the stub in a child process (so that tracemalloc only sees the client).
+
+    Returns:
+        tuple: The process and the base URL of the stub.
+    """
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                             "stub_server.py"),
+                                "--port", str(port), "--commits-per-repo", str(commits),
+                                "--latency", str(latency), "--padding", str(padding)],
+                               stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    else:
+        process.kill()
+        raise RuntimeError("The stub server did not start")
+    return process, f"http://127.0.0.1:{port}"
+
+
+def point_config_to(base_url):
+    """
+    Points the configuration to the stub, before the client modules read it.
+    """
+
+    os.environ.update({
+        "APM_GENERAL__BASE_URL": base_url,
+        "APM_GENERAL__GITHUB_TOKEN": TOKEN,
+        "APM_GENERAL__TRANSPORT_MODE": "live",
+        "APM_GENERAL__SNAPSHOT_PATH": "",
+        "APM_GENERAL__WATERMARK_PATH": "",
+    })
+
+
+def make_operations():
+    """
+    Returns the operations, by name: functions called with ``(session, mode)``.
+    """
+
+    # Imported once the configuration points to the stub (see point_config_to)
+    import task7
+    from pagination import paginate
+
+    headers = task7.headers
+    profile_url = f"{task7.BASE_URL}/users/{MAIN_LOGIN}"
+    commits_url = f"{task7.BASE_URL}/repos/{MAIN_LOGIN}/{MAIN_REPOS[-1]}/commits"
+    etags = {}
+
+    def profile(session, mode):
+        session.get(profile_url, headers=headers).raise_for_status()
+
+    def not_modified(session, mode):
+        if "profile" not in etags:
+            etags["profile"] = session.get(profile_url, headers=headers).headers["ETag"]
+        response = session.get(profile_url, headers={**headers, "If-None-Match": etags["profile"]})
+        assert response.status_code == 304, f"Expected a 304, got {response.status_code}"
+
+    def commit_walk(session, mode):
+        for _ in paginate(session, commits_url, params={"per_page": 100}, headers=headers, stream=True):
+            pass
+
+    def repo_diff(session, mode):
+        task7.step_5(session, headers, task7.list_repos(session, headers))
+
+    def task7_workflow(session, mode):
+        if mode == "async":
+            outcomes = task7.WORKFLOW.run(session, headers)
+        else:
+            outcomes = task7.WORKFLOW.run_sequentially(session, headers)
+        failed = [name for name, outcome in outcomes.items() if not outcome.ok]
+        assert not failed, f"Failed steps: {', '.join(failed)}"
+
+    return {"profile": profile, "not_modified": not_modified, "commit_walk": commit_walk,
+            "repo_diff": repo_diff, "task7_workflow": task7_workflow}
+
+
+def measure(operation, session, mode, runs, concurrency):
+    """
+    Runs an operation ``runs`` times and times every run.
+
+    Args:
+        operation (callable): Called with ``(session, mode)``.
+        session (ApiSession): The session under test.
+        mode (str): ``sync`` to run the operations one after the other, ``async`` to run
+            ``concurrency`` of them at a time.
+        runs (int): Number of runs.
+        concurrency (int): Runs in flight at the same time in ``async`` mode.
+
+    Returns:
+        tuple: The sorted durations of the runs, and the total elapsed time.
+    """
+
+    durations = []
+
+    def timed():
+        start = time.perf_counter()
+        operation(session, mode)
+        durations.append(time.perf_counter() - start)
+
+    async def run_concurrently():
+        slots = asyncio.Semaphore(concurrency)
+
+        async def run():
+            async with slots:
+                await asyncio.to_thread(timed)
+
+        await asyncio.gather(*(run() for _ in range(runs)))
+
+    start = time.perf_counter()
+    if mode == "async":
+        asyncio.run(run_concurrently())
+    else:
+        for _ in range(runs):
+            timed()
+    return sorted(durations), time.perf_counter() - start
+
+
+def peak_memory(operation, session, mode):
+    """
+    Returns the peak memory (bytes) allocated while running an operation once.
+    """
+
+    tracemalloc.start()
+    try:
+        operation(session, mode)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(operations, name, configuration, mode, runs, concurrency):
+    """
+    Benchmarks one operation in one configuration and mode, with a new session.
+
+    Returns:
+        dict: Runs, operations and requests per second, latency percentiles (seconds)
+            and peak memory of one operation (bytes).
+    """
+
+    from client import build_session
+    from timing import PERCENTILES, TimingRecorder, percentile
+
+    settings = CONFIGURATIONS[configuration]
+    recorder = TimingRecorder()
+    # Coalesced requests would not reach the stub, so every configuration sends all of them
+    session = build_session(pool_size=max(concurrency, 4), cache_enabled=settings["cache_enabled"],
+                            single_flight=False, recorder=recorder)
+    if not settings["keep_alive"]:
+        session.headers["Connection"] = "close"
+    operation = operations[name]
+    try:
+        operation(session, mode)  # Warm up the connections and the cache
+        memory = peak_memory(operation, session, mode)
+        recorder.records.clear()
+        durations, elapsed = measure(operation, session, mode, runs, concurrency)
+    finally:
+        session.close()
+
+    return {
+        "operation": name, "configuration": configuration, "mode": mode, "runs": runs,
+        "operations_per_second": runs / elapsed if elapsed else 0,
+        "requests_per_second": len(recorder.records) / elapsed if elapsed else 0,
+        **{f"p{rank}": percentile(durations, rank) for rank in PERCENTILES},
+        "peak_memory": memory,
+    }
+
+
+def format_report(results):
+    """
+    Returns the lines of the terminal report of the benchmark results.
+    """
+
+    lines = [f"{'operation':<15}  {'configuration':<13}  {'mode':<5}  {'ops/s':>8}  {'req/s':>8}  "
+             f"{'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'peak KiB':>9}"]
+    for result in results:
+        lines.append(f"{result['operation']:<15}  {result['configuration']:<13}  {result['mode']:<5}  "
+                     f"{result['operations_per_second']:8.1f}  {result['requests_per_second']:8.1f}  "
+                     f"{result['p50'] * 1000:8.1f}  {result['p95'] * 1000:8.1f}  {result['p99'] * 1000:8.1f}  "
+                     f"{result['peak_memory'] / 1024:9.1f}")
+    return lines
+
+
+def main(latency, padding, commits, runs, concurrency, operations=OPERATIONS, report=None):
+    """
+    Runs the benchmarks and prints their report.
+
+    Returns:
+        int: 0 once the report is printed.
+    """
+
+    process, base_url = start_stub(latency, padding, commits)
+    try:
+        point_config_to(base_url)
+        functions = make_operations()
+        results = [run_case(functions, name, configuration, mode, runs, concurrency)
+                   for name in operations for configuration in CONFIGURATIONS for mode in MODES]
+    finally:
+        process.terminate()
+        process.wait()
+
+    print(f"stub: {latency * 1000:.0f} ms latency, {padding} bytes of padding per object, {commits} commits; "
+          f"{runs} runs per case, {concurrency} at a time in async mode")
+    print("\n".join(format_report(results)))
+    if report:
+        with open(report, "w", encoding="utf-8") as file:
+            json.dump({"latency": latency, "padding": padding, "commits": commits, "runs": runs,
+                       "concurrency": concurrency, "results": results}, file, indent=2)
+        print(f"Report written to {report}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the client stack against a local stub of the API.")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added by the stub to every response")
+    parser.add_argument("--padding", type=int, default=0, help="bytes of filler in every object returned by the stub")
+    parser.add_argument("--commits", type=int, default=300, help="commits of every repository")
+    parser.add_argument("--runs", type=int, default=20, help="runs of every operation per case")
+    parser.add_argument("--concurrency", type=int, default=8, help="runs in flight at the same time in async mode")
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=OPERATIONS,
+                        help="operations to benchmark (default: all)")
+    parser.add_argument("--report", help="JSON file receiving the results")
+    args = parser.parse_args()
+
+    sys.exit(main(args.latency, args.padding, args.commits, args.runs, args.concurrency, args.operations,
+                  args.report))
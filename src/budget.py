@@ -0,0 +1,172 @@
+"""
+Rate-limit budget planner of a test run.
+
+Before a heavy run, tells whether the requests it will send fit in the budget left to the
+tokens (``github_token`` and the ``token_pool`` of config.json). The budget of every token
+is read from ``GET /rate_limit``, which does not use any, and the planned number of
+requests is given or counted in the timing report of a previous run (see timing.py; 304
+responses are not counted, they do not use any budget).
+
+When the budget is short, the planner tells when it will be enough: every token gets its
+whole limit back at its reset time.
+
+Usage (from the ``src`` folder):
+
+    python budget.py --requests 12000
+    python budget.py --from-report timing_report.json
+"""
+
+import argparse
+import sys
+import time
+
+import task2
+from client import TOKENS, build_session
+from timing import read_records
+
+
+class Budget:
+    """
+    Rate-limit budget of one token.
+
+    Args:
+        token (str): The token.
+        limit (int): Requests per window.
+        remaining (int): Requests left until the reset.
+        reset (int): Epoch of the reset.
+    """
+
+    def __init__(self, token, limit, remaining, reset):
+        self.token = token
+        self.limit = limit
+        self.remaining = remaining
+        self.reset = reset
+
+
+class Plan:
+    """
+    Verdict of the planner.
+
+    Args:
+        planned (int): Requests planned.
+        available (int): Requests left to all the tokens now.
+        ready_at (float): Epoch from which the planned requests fit (now if they already
+            do), or None if they do not fit even once every token is reset.
+    """
+
+    def __init__(self, planned, available, ready_at):
+        self.planned = planned
+        self.available = available
+        self.ready_at = ready_at
+
+    @property
+    def fits(self):
+        return self.planned <= self.available
+
+    @property
+    def shortfall(self):
+        return max(self.planned - self.available, 0)
+
+
+def fetch_budget(session, token, base_url=task2.BASE_URL):
+    """
+    Reads the budget of a token (``GET /rate_limit`` does not use any).
+
+    Returns:
+        Budget: The budget of the core API.
+
+    Raises:
+        requests.HTTPError: If the token is refused.
+    """
+
+    response = session.get(f"{base_url}/rate_limit", headers={"Authorization": f"token {token}"}, verify=False)
+    response.raise_for_status()
+    core = response.json()["resources"]["core"]
+    return Budget(token, core["limit"], core["remaining"], core["reset"])
+
+
+def plan(budgets, planned, now=None):
+    """
+    Tells whether ``planned`` requests fit in the budgets, and from when.
+
+    Args:
+        budgets (list): The ``Budget`` of every token.
+        planned (int): Requests planned.
+        now (float): Current epoch (default: ``time.time()``).
+
+    Returns:
+        Plan: The verdict.
+    """
+
+    now = time.time() if now is None else now
+    available = sum(budget.remaining for budget in budgets)
+    if planned <= available:
+        return Plan(planned, available, now)
+    total = available
+    for budget in sorted(budgets, key=lambda budget: budget.reset):
+        # The token gets its whole limit back at its reset time
+        total += budget.limit - budget.remaining
+        if planned <= total:
+            return Plan(planned, available, max(budget.reset, now))
+    return Plan(planned, available, None)
+
+
+def planned_requests(report):
+    """
+    Returns the number of requests of a timing report that used budget (not the 304s).
+    """
+
+    return sum(record["status"] != 304 for record in read_records(report))
+
+
+def format_plan(budgets, result, now=None):
+    """
+    Returns the lines of the terminal report of a plan.
+    """
+
+    now = time.time() if now is None else now
+    lines = [f"{'token':<12}  {'remaining':>9}  {'limit':>7}  {'reset in':>8}"]
+    for budget in budgets:
+        lines.append(f"{'...' + budget.token[-4:]:<12}  {budget.remaining:9d}  {budget.limit:7d}  "
+                     f"{max(budget.reset - now, 0) / 60:6.0f} m")
+    if result.fits:
+        lines.append(f"{result.planned} requests planned, {result.available} available: the run fits")
+    elif result.ready_at is not None:
+        lines.append(f"{result.planned} requests planned, {result.available} available: "
+                     f"{result.shortfall} short, enough budget in {(result.ready_at - now) / 60:.0f} m")
+    else:
+        lines.append(f"{result.planned} requests planned, {result.available} available: "
+                     f"{result.shortfall} short, more than every token allows in one window")
+    return lines
+
+
+def main(planned, tokens=TOKENS):
+    """
+    Prints the plan of a run.
+
+    Returns:
+        int: 0 if the run fits in the budget left, 1 otherwise.
+    """
+
+    tokens = list(dict.fromkeys(token for token in tokens if token))
+    if not tokens:
+        print("No token configured (github_token, token_pool)", file=sys.stderr)
+        return 1
+    session = build_session(cache_enabled=False, transport_mode="live")
+    try:
+        budgets = [fetch_budget(session, token) for token in tokens]
+    finally:
+        session.close()
+    result = plan(budgets, planned)
+    print("\n".join(format_plan(budgets, result)))
+    return 0 if result.fits else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tell whether a run fits in the rate-limit budget of the tokens.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--requests", type=int, help="number of requests planned")
+    source.add_argument("--from-report", help="timing report of a previous run, counting its requests")
+    args = parser.parse_args()
+
+    sys.exit(main(args.requests if args.requests is not None else planned_requests(args.from_report)))
@@ -0,0 +1,204 @@
+"""
+In-memory response cache with ETag revalidation.
+
+GitHub answers a request carrying ``If-None-Match`` (or ``If-Modified-Since``) with
+``304 Not Modified`` when the resource did not change, and 304 responses do not count
+against the rate limit. The cache keeps the last ``200`` response of every GET together
+with its ETag and Last-Modified date, so the session can revalidate it and serve the
+stored body when the server answers 304.
+
+With a ``SnapshotStore`` (see snapshots.py) the responses are also written to disk, and
+responses missing from memory are looked up there, so they can be revalidated in the
+next runs too.
+"""
+
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+def auth_identity(headers):
+    """
+    Returns a stable, non reversible identifier of the Authorization header of a request
+    (an empty string for anonymous requests).
+
+    Args:
+        headers (Mapping): The request headers.
+
+    Returns:
+        str: The identity.
+    """
+
+    auth = (headers or {}).get("Authorization", "")
+    return hashlib.sha256(auth.encode()).hexdigest() if auth else ""
+
+
+def cache_key(method, url, params=None, headers=None):
+    """
+    Builds the cache key of a request from its method, full URL and auth identity.
+
+    The Authorization header is hashed (see ``auth_identity``) so that tokens are not
+    kept around in clear.
+
+    Args:
+        method (str): The HTTP method.
+        url (str): The request URL.
+        params (dict): Query parameters of the request, if any.
+        headers (Mapping): The request headers.
+
+    Returns:
+        tuple: The ``(method, url, identity)`` key.
+    """
+
+    full_url = requests.Request(method, url, params=params).prepare().url
+    return (method.upper(), full_url, auth_identity(headers))
+
+
+def copy_response(response):
+    """
+    Returns a copy of a response that can be handed to a caller without the
+    caller being able to modify the cached one.
+
+    Args:
+        response (requests.Response): The response to copy.
+
+    Returns:
+        requests.Response: The copy.
+    """
+
+    clone = copy.copy(response)
+    clone.headers = CaseInsensitiveDict(response.headers)
+    return clone
+
+
+# Response headers a cached response can be revalidated with, and the matching request headers
+VALIDATORS = {"ETag": "If-None-Match", "Last-Modified": "If-Modified-Since"}
+
+
+def conditional_headers(response):
+    """
+    Returns the request headers revalidating a cached response.
+    """
+
+    return {condition: response.headers[validator] for validator, condition in VALIDATORS.items()
+            if response.headers.get(validator)}
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache of GET responses that carry an ETag or a Last-Modified date.
+
+    Args:
+        max_entries (int): Maximum number of responses kept in memory; the least
+            recently used one is evicted when the cache is full.
+        snapshots (SnapshotStore): Persistent store written through and read on a
+            memory miss, or None.
+    """
+
+    def __init__(self, max_entries=256, snapshots=None):
+        self.max_entries = max_entries
+        self.snapshots = snapshots
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the cached response for a key (or None) and marks it as recently used.
+        """
+
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+                return response
+
+        if self.snapshots is not None:
+            response = self.snapshots.get(key)
+            if response is not None:
+                self._remember(key, response)
+        return response
+
+    def store(self, key, response):
+        """
+        Stores a successful response if it can be revalidated (i.e. it has an ETag or a
+        Last-Modified date).
+        """
+
+        if response.status_code != 200 or not conditional_headers(response):
+            return
+        response.content  # Make sure the body is read before the connection is released
+        self._remember(key, response)
+        if self.snapshots is not None:
+            self.snapshots.store(key, response)
+
+    def store_when_read(self, key, response):
+        """
+        Stores a streamed response once its body has been read whole, so that streaming a
+        listing does not prevent its revalidation. A body the caller stops reading early
+        (e.g. a failed check closing the response) is not stored.
+
+        Returns:
+            requests.Response: The response, to be read as usual.
+        """
+
+        if response.status_code != 200 or not conditional_headers(response):
+            return response
+
+        stored = copy_response(response)
+        iter_content = response.iter_content
+
+        def tee(chunk_size=1, decode_unicode=False):
+            if decode_unicode:
+                yield from iter_content(chunk_size, decode_unicode)
+                return
+            chunks = []
+            for chunk in iter_content(chunk_size):
+                chunks.append(chunk)
+                yield chunk
+            stored._content, stored._content_consumed, stored.raw = b"".join(chunks), True, None
+            self.store(key, stored)
+
+        # response.content and the incremental decoding of streaming.py both read through iter_content
+        response.iter_content = tee
+        return response
+
+    def _remember(self, key, response):
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url=None):
+        """
+        Drops cached responses.
+
+        Args:
+            url (str): Drop every entry for this URL (any query string, any identity).
+                If None, the whole cache is cleared.
+        """
+
+        path = None if url is None else requests.Request("GET", url).prepare().url.split("?", 1)[0]
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[1].split("?", 1)[0] == path]:
+                    del self._entries[key]
+        if self.snapshots is not None:
+            self.snapshots.invalidate(path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def close(self):
+        """
+        Closes the snapshot store, if any.
+        """
+
+        if self.snapshots is not None:
+            self.snapshots.close()
@@ -0,0 +1,114 @@
+"""
+Retry policy and per-host circuit breaker of the shared session.
+
+Transient failures (connection resets, 502/503/504) are retried by ``JitteredRetry``, the
+urllib3 ``Retry`` mounted on the session adapter, with an exponential backoff spread by
+full jitter so that parallel workers do not retry in lockstep, and honoring
+``Retry-After``. Only idempotent methods are retried once the request may have reached the
+server: a PATCH is only retried when the connection could not even be opened.
+
+When a host keeps failing anyway, the ``CircuitBreaker`` opens for it: the next requests
+fail at once with ``CircuitOpenError`` instead of each one waiting for its own timeouts,
+until a trial request succeeds after ``reset_timeout`` seconds.
+"""
+
+import random
+import threading
+import time
+
+import requests
+from urllib3.util.retry import Retry
+
+
+# Methods that can be sent again without changing the result on the server
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"})
+
+
+class JitteredRetry(Retry):
+    """
+    ``Retry`` waiting a random time between 0 and its exponential backoff (full jitter).
+    """
+
+    def get_backoff_time(self):
+        return random.uniform(0, super().get_backoff_time())
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """
+    Raised instead of sending a request to a host whose circuit is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker per host.
+
+    A host circuit opens after ``failure_threshold`` consecutive failures (connection
+    errors, timeouts or 5xx responses left after the retries). While it is open, requests
+    to the host are refused; after ``reset_timeout`` seconds one trial request is let
+    through (half-open), closing the circuit if it succeeds and opening it again if not.
+
+    Args:
+        failure_threshold (int): Consecutive failures opening the circuit.
+        reset_timeout (float): Seconds before a trial request is allowed.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._hosts = {}  # host -> {"failures": int, "opened_at": epoch or None, "trial": bool}
+        self._lock = threading.Lock()
+
+    def before(self, host):
+        """
+        Checks that a request can be sent to a host.
+
+        Raises:
+            CircuitOpenError: If the circuit of the host is open.
+        """
+
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None or state["opened_at"] is None:
+                return
+            remaining = state["opened_at"] + self.reset_timeout - time.monotonic()
+            if remaining > 0 or state["trial"]:
+                raise CircuitOpenError(f"Circuit open for {host} after {state['failures']} consecutive failures "
+                                       f"(next trial in {max(remaining, 0):.0f} s)")
+            state["trial"] = True
+
+    def success(self, host):
+        """
+        Records a successful request, closing the circuit of the host.
+        """
+
+        with self._lock:
+            self._hosts.pop(host, None)
+
+    def failure(self, host):
+        """
+        Records a failed request, opening the circuit after too many of them.
+        """
+
+        with self._lock:
+            state = self._hosts.setdefault(host, {"failures": 0, "opened_at": None, "trial": False})
+            state["failures"] += 1
+            if state["trial"] or state["failures"] >= self.failure_threshold:
+                state["opened_at"] = time.monotonic()
+            state["trial"] = False
+
+    def release(self, host):
+        """
+        Records a request that says nothing about the health of the host (e.g. refused
+        by the rate limiter), letting another trial request through if it was one.
+        """
+
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is not None:
+                state["trial"] = False
+
+    def is_open(self, host):
+        with self._lock:
+            state = self._hosts.get(host)
+            return state is not None and state["opened_at"] is not None
@@ -0,0 +1,420 @@
+"""
+Shared HTTP client for the task modules.
+
+All the tasks talk to the same API host, so instead of opening a new connection
+for every ``requests.get`` call, a single ``requests.Session`` is created per test
+session and handed to the tests through the ``session`` fixture (see conftest.py).
+The session keeps connections alive and reuses them from a bounded pool, retries
+transient failures (connection resets, 502/503/504) with a jittered exponential backoff,
+and stops sending requests to a host that keeps failing (see circuit.py). Every request
+has a connect and read timeout, cut down to the time budget of the running test or
+workflow (see deadlines.py).
+
+Identical GET requests sent at the same time by concurrent tests or workflow steps go
+over the wire once, and every caller gets its own copy of the response (see singleflight.py).
+
+Every request is timed by the ``TimingRecorder`` given to the session (see timing.py).
+
+GET responses are kept in a session-wide ETag cache (see cache.py) and transparently
+revalidated with ``If-None-Match``/``If-Modified-Since``. With ``snapshot_path`` set in
+config.json, they are also kept on disk between runs (see snapshots.py).
+
+Every request sent over the wire goes through a rate limiter (see ratelimit.py): it is
+held back while the budget of its token is exhausted, and retried after waiting when
+GitHub answers with a rate-limit error. With a ``token_pool`` configured, the reads that do
+not depend on the authenticated user are sent with the token that has the most budget left.
+
+With ``transport_mode`` set to ``record`` or ``replay`` in config.json, responses are
+recorded into or replayed from cassettes (see transport.py) instead of only going live.
+The response cache, the coalescing of requests and the rate limiter are then disabled:
+the cache would make the requests of a test depend on the tests run before it, and
+replayed rate-limit headers say nothing about the current budget.
+
+With ``http2`` enabled, live requests are multiplexed over one HTTP/2 connection per host
+(see http2.py).
+"""
+
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from requests.sessions import merge_setting
+from requests.structures import CaseInsensitiveDict
+
+from cache import ResponseCache, auth_identity, cache_key, conditional_headers, copy_response
+from circuit import IDEMPOTENT_METHODS, CircuitBreaker, JitteredRetry
+from config import get_config
+from deadlines import DeadlineExceeded, remaining, timeout_for
+from http2 import Http2Adapter
+from ratelimit import (DENIED_STATUSES, RATE_LIMIT_HEADERS, RateLimitExceeded, TokenPool, connect_rate_limiter,
+                       is_rate_limited)
+from singleflight import SingleFlight, request_key
+from snapshots import SnapshotStore
+from transport import CassetteAdapter, CassetteStore
+
+
+general = get_config().general
+
+POOL_SIZE = general.pool_size  # Max connections kept alive per host
+MAX_RETRIES = general.max_retries  # Retries on connection errors and 502/503/504
+RETRY_STATUSES = general.retry_statuses
+RETRY_BACKOFF = general.retry_backoff  # Backoff factor (s) of the retries, before jitter
+RETRY_BACKOFF_MAX = general.retry_backoff_max  # Longest backoff (s) between two retries
+BREAKER_THRESHOLD = general.breaker_threshold  # Consecutive failures opening the circuit of a host
+BREAKER_RESET = general.breaker_reset  # Seconds before a trial request to a failing host
+CONNECT_TIMEOUT = general.connect_timeout  # Seconds to open a connection
+READ_TIMEOUT = general.read_timeout  # Seconds to wait for each read of a response
+CACHE_ENABLED = general.cache_enabled
+CACHE_MAX_ENTRIES = general.cache_max_entries
+SINGLE_FLIGHT = general.single_flight  # Identical GET requests in flight sent once
+SNAPSHOT_PATH = general.snapshot_path  # SQLite file keeping the cached responses between runs
+RATE_LIMIT_RETRIES = general.rate_limit_retries  # Retries of rate-limited requests
+RATE_LIMIT_MAX_WAIT = general.rate_limit_max_wait  # Longest wait (s) before giving up
+TOKENS = [general.github_token, *general.token_pool]  # Tokens sharing the reads (see ratelimit.py)
+TRANSPORT_MODE = general.transport_mode  # live, record or replay
+HTTP2 = general.http2  # Live requests over HTTP/2 (see http2.py)
+CASSETTE_DIR = general.cassette_dir
+TIMING_REPORT = general.timing_report  # JSON report of the request timings
+
+# Headers that mean the caller wants to see the raw conditional response (e.g. a 304)
+CONDITIONAL_HEADERS = ("If-None-Match", "If-Modified-Since")
+
+# Methods that do not modify anything on the server
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def is_graphql(url):
+    """
+    Tells whether a URL is a GraphQL endpoint (see graphql_api.py).
+    """
+
+    return urlsplit(url).path.endswith("/graphql")
+
+
+def is_read_only(method, url, json=None):
+    """
+    Tells whether a request cannot modify server state: a safe method, or a GraphQL query
+    (any operation but a mutation).
+    """
+
+    if method.upper() in SAFE_METHODS:
+        return True
+    return (method.upper() == "POST" and is_graphql(url) and isinstance(json, dict)
+            and not str(json.get("query", "")).lstrip().startswith("mutation"))
+
+
+class UnmarkedMutationError(RuntimeError):
+    """
+    Raised when a test that is not marked ``serial`` sends a request that can modify
+    server state, since runner.py could run it in parallel with the tests it affects.
+    """
+
+
+class ApiSession(requests.Session):
+    """
+    ``requests.Session`` used by every task module.
+
+    Args:
+        cache (ResponseCache): Cache used to revalidate GET requests, or None to disable it.
+        limiter (RateLimiter): Rate-limit tracker consulted before every request, or None.
+        cassettes (CassetteStore): Store of the record/replay transport, or None when live.
+        recorder (TimingRecorder): Collector of the timing of every request, or None.
+        breaker (CircuitBreaker): Circuit breaker of the hosts, or None.
+        timeout (tuple): Default (connect, read) timeout of the requests, in seconds.
+        token_pool (TokenPool): Tokens sharing the reads, or None (needs a ``limiter``).
+        flights (SingleFlight): Registry coalescing the identical GET requests in flight,
+            or None.
+    """
+
+    def __init__(self, cache=None, limiter=None, cassettes=None, recorder=None, breaker=None,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), token_pool=None, flights=None):
+        super().__init__()
+        self.timeout = timeout
+        self.cache = cache
+        self.limiter = limiter
+        self.token_pool = token_pool
+        self.flights = flights
+        self.cassettes = cassettes
+        self.recorder = recorder
+        self.breaker = breaker
+        self.current_test = None  # Node id of the running test, set by the conftest fixture
+        self.current_test_serial = False  # Whether the running test is marked serial
+
+    @contextmanager
+    def running(self, node_id, serial=False):
+        """
+        Tells the session which test sends the next requests, for the mutation guard and
+        the cassettes (which record and replay the responses of each test separately).
+
+        Args:
+            node_id (str): Node id of the test, or of the fixture, sending the requests.
+            serial (bool): Whether it may send requests that modify server state.
+        """
+
+        self.current_test = node_id
+        self.current_test_serial = serial
+        if self.cassettes is not None:
+            self.cassettes.scope = node_id
+        try:
+            yield self
+        finally:
+            self.current_test = None
+            self.current_test_serial = False
+            if self.cassettes is not None:
+                self.cassettes.scope = None
+
+    def request(self, method, url, *args, **kwargs):
+        """
+        Sends a request, going through the response cache when possible.
+
+        A GET whose cached copy is still valid (the server answers 304) returns the
+        cached 200 response. Any other method invalidates the cached entries of its URL.
+        Requests that already carry conditional headers bypass the cache, so tests can
+        still observe 304 responses themselves. A fresh streamed response is stored once
+        the caller has read its body whole.
+
+        Raises:
+            UnmarkedMutationError: If a test not marked ``serial`` sends anything but a
+                safe (read-only) request.
+        """
+
+        if (self.current_test is not None and not self.current_test_serial
+                and not is_read_only(method, url, kwargs.get("json"))):
+            raise UnmarkedMutationError(f"{self.current_test} sends a {method.upper()} request: "
+                                        f"mark it with @pytest.mark.serial")
+
+        if self.cache is None:
+            return super().request(method, url, *args, **kwargs)
+
+        if method.upper() != "GET":
+            response = super().request(method, url, *args, **kwargs)
+            self.cache.invalidate(url)
+            return response
+
+        headers = merge_setting(kwargs.get("headers"), self.headers, dict_class=CaseInsensitiveDict)
+        if any(name in headers for name in CONDITIONAL_HEADERS):
+            return super().request(method, url, *args, **kwargs)
+
+        key = cache_key(method, url, kwargs.get("params"), headers)
+        cached = self.cache.get(key)
+        if cached is not None:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **conditional_headers(cached)}
+
+        response = super().request(method, url, *args, **kwargs)
+        if response.status_code == 304 and cached is not None:
+            response.close()
+            return copy_response(cached)
+        if kwargs.get("stream"):
+            return self.cache.store_when_read(key, response)
+
+        # The cache keeps its own object, so the caller cannot modify the cached entry
+        self.cache.store(key, response)
+        return copy_response(response)
+
+    def send(self, request, **kwargs):
+        """
+        Sends a prepared request, or waits for the response of an identical GET or HEAD
+        request already in flight (streamed requests are always sent, since their body
+        can only be read once). Every caller gets its own copy of the response. Any other
+        request stops the reads of its URL in flight from being joined.
+        """
+
+        if self.flights is None:
+            return self._send_guarded(request, **kwargs)
+        if request.method not in ("GET", "HEAD"):
+            # Reads sent during or after a change of the URL must not get a response from before it
+            self.flights.forget(request.url)
+            try:
+                return self._send_guarded(request, **kwargs)
+            finally:
+                self.flights.forget(request.url)
+        if kwargs.get("stream"):
+            return self._send_guarded(request, **kwargs)
+        response, _ = self.flights.do(request_key(request, kwargs.get("verify", True)),
+                                      lambda: self._send_guarded(request, **kwargs), timeout=remaining())
+        # The response of the flight is never handed out, so no caller sees another one's changes
+        return copy_response(response)
+
+    def _send_guarded(self, request, **kwargs):
+        """
+        Sends a prepared request, unless the circuit of its host is open (see circuit.py).
+
+        Connection errors, timeouts and 5xx responses count as failures of the host;
+        any other response closes its circuit.
+
+        Raises:
+            CircuitOpenError: If the host failed too many times in a row.
+        """
+
+        if self.breaker is None:
+            return self._send_limited(request, **kwargs)
+
+        host = urlsplit(request.url).netloc
+        self.breaker.before(host)
+        try:
+            response = self._send_limited(request, **kwargs)
+        except DeadlineExceeded:
+            # The budget of the caller ran out, which says nothing about the host
+            self.breaker.release(host)
+            raise
+        except (requests.ConnectionError, requests.Timeout):
+            self.breaker.failure(host)
+            raise
+        except BaseException:
+            self.breaker.release(host)
+            raise
+        if response.status_code >= 500:
+            self.breaker.failure(host)
+        else:
+            self.breaker.success(host)
+        return response
+
+    def _send_limited(self, request, **kwargs):
+        """
+        Sends a prepared request, waiting first if its token has no rate-limit budget left.
+
+        Rate-limited responses (403/429 with ``Retry-After`` or an exhausted budget) are
+        retried once the limit is lifted, unless that would take more than
+        ``RATE_LIMIT_MAX_WAIT`` seconds, in which case the error response is returned.
+        Requests routed by the token pool are sent, and retried, with the token that has
+        the most headroom.
+
+        Raises:
+            RateLimitExceeded: If the request would have to wait more than
+                ``RATE_LIMIT_MAX_WAIT`` seconds before being sent.
+        """
+
+        if self.limiter is None:
+            return self._send_timed(request, **kwargs)
+
+        pooled = self.token_pool is not None and self.token_pool.routes(request)
+        own_authorization = request.headers.get("Authorization")
+        attempt = 0
+        while True:
+            if pooled:
+                self.token_pool.assign(request)
+            identity = auth_identity(request.headers)
+            if is_graphql(request.url):
+                identity += " graphql"  # GraphQL queries have a budget of their own
+            delay = self.limiter.delay(identity)
+            if delay > RATE_LIMIT_MAX_WAIT:
+                raise RateLimitExceeded(f"Rate limit of this token is exhausted for the next {delay:.0f} s "
+                                        f"(more than rate_limit_max_wait = {RATE_LIMIT_MAX_WAIT} s)")
+            left = remaining()
+            if left is not None and delay > left:
+                raise DeadlineExceeded(f"Rate limit of this token is exhausted for the next {delay:.0f} s, "
+                                       f"after the deadline ({left:.0f} s left)")
+            time.sleep(delay)
+            response = self._send_timed(request, **kwargs)
+            self.limiter.update(identity, {name: response.headers[name] for name in RATE_LIMIT_HEADERS
+                                           if name in response.headers})
+            if (pooled and request.headers["Authorization"] != own_authorization
+                    and response.status_code in DENIED_STATUSES and not is_rate_limited(response)):
+                # The token of the pool cannot read this resource (e.g. a private repository)
+                response.close()
+                pooled = False
+                self.token_pool.keep_own_token(request)
+                request.headers["Authorization"] = own_authorization
+                continue
+            if (not is_rate_limited(response) or attempt == RATE_LIMIT_RETRIES
+                    or self.limiter.delay(identity) > RATE_LIMIT_MAX_WAIT):
+                return response
+            response.close()
+            attempt += 1
+
+    def close(self):
+        super().close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def _send_timed(self, request, **kwargs):
+        kwargs["timeout"], cut = timeout_for(kwargs.get("timeout"), self.timeout)
+        start = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except (requests.Timeout, requests.ConnectionError) as error:
+            # Once retried, a timeout is reported as a ConnectionError (max retries exceeded)
+            reason = getattr(error.args[0], "reason", None) if error.args else None
+            if cut and (isinstance(error, requests.Timeout) or isinstance(reason, urllib3.exceptions.TimeoutError)):
+                raise DeadlineExceeded(f"{request.method} {request.url} did not answer within the "
+                                       f"{max(kwargs['timeout']):.1f} s left before the deadline") from error
+            raise
+        if self.recorder is not None:
+            self.recorder.record(self.current_test, request, response, time.perf_counter() - start,
+                                 kwargs.get("stream", False))
+        return response
+
+
+def build_session(pool_size=POOL_SIZE, max_retries=MAX_RETRIES, cache_enabled=CACHE_ENABLED,
+                  cache_max_entries=CACHE_MAX_ENTRIES, snapshot_path=SNAPSHOT_PATH, transport_mode=TRANSPORT_MODE,
+                  cassette_dir=CASSETTE_DIR, breaker_threshold=BREAKER_THRESHOLD, http2=HTTP2, tokens=TOKENS,
+                  single_flight=SINGLE_FLIGHT, recorder=None):
+    """
+    Creates a session with a keep-alive connection pool mounted for http and https.
+
+    Args:
+        pool_size (int): Number of connections kept alive per host.
+        max_retries (int): Number of retries of connection errors (e.g. connection reset)
+            and 502/503/504 responses. Read errors and error responses are only retried
+            for idempotent methods, so a PATCH is never sent twice.
+        cache_enabled (bool): Whether GET responses are cached and revalidated with ETags
+            (always disabled with the record/replay transport).
+        cache_max_entries (int): Maximum number of cached responses.
+        snapshot_path (str): SQLite file keeping the cached responses between runs, or
+            an empty string to keep them in memory only.
+        transport_mode (str): ``live``, or ``record``/``replay`` to use the cassettes.
+        cassette_dir (str): Directory of the cassettes.
+        breaker_threshold (int): Consecutive failures opening the circuit of a host, or 0
+            to disable the circuit breaker (always disabled with the record/replay transport).
+        http2 (bool): Whether live requests are sent over HTTP/2 (the cassettes always
+            record and replay HTTP/1.1).
+        tokens (list): Tokens sharing the reads that do not depend on the authenticated
+            user (see ratelimit.py), ``github_token`` first. Only used live, with more
+            than one token.
+        single_flight (bool): Whether identical GET requests in flight are sent once
+            (always disabled with the record/replay transport, which records the requests
+            of every test).
+        recorder (TimingRecorder): Collector of the request timings, or None.
+
+    Returns:
+        ApiSession: The configured session.
+
+    Raises:
+        ImportError: If ``http2`` is enabled without httpx installed.
+    """
+
+    # Read errors and 5xx responses are only retried for idempotent methods, since the
+    # server may already have processed the request
+    retries = JitteredRetry(total=max_retries, connect=max_retries, read=max_retries, status=max_retries,
+                            allowed_methods=IDEMPOTENT_METHODS, status_forcelist=RETRY_STATUSES,
+                            backoff_factor=RETRY_BACKOFF, backoff_max=RETRY_BACKOFF_MAX,
+                            respect_retry_after_header=True, raise_on_status=False)
+    if transport_mode == "live":
+        cassettes = None
+        if http2:
+            adapter = Http2Adapter(pool_size=pool_size, max_retries=retries)
+        else:
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+    else:
+        cassettes = CassetteStore(cassette_dir, transport_mode)
+        adapter = CassetteAdapter(cassettes, transport_mode, pool_connections=pool_size,
+                                  pool_maxsize=pool_size, max_retries=retries)
+    live = cassettes is None
+
+    cache = None
+    if cache_enabled and live:
+        cache = ResponseCache(cache_max_entries, SnapshotStore(snapshot_path) if snapshot_path else None)
+
+    breaker = CircuitBreaker(breaker_threshold, BREAKER_RESET) if breaker_threshold and live else None
+
+    limiter = connect_rate_limiter() if live else None
+    token_pool = TokenPool(tokens, limiter) if limiter is not None and len(set(filter(None, tokens))) > 1 else None
+
+    session = ApiSession(cache=cache, limiter=limiter, cassettes=cassettes, recorder=recorder, breaker=breaker,
+                         token_pool=token_pool, flights=SingleFlight() if single_flight and live else None)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -0,0 +1,322 @@
+"""
+Configuration of the task modules.
+
+config.json (next to this file, or the file named by ``APM_CONFIG``) is parsed and validated
+once per process by ``get_config``, and every module reads its settings from the returned
+``Config`` instead of opening the file itself, so the tests no longer depend on the working
+directory they are collected from.
+
+* Each section (``general``, ``task1`` to ``task7``) becomes a settings object with one
+  typed slot per key. Missing required keys, unknown keys and values of the wrong JSON
+  type are reported at once with a ``ConfigError``.
+* An optional ``environments`` section holds named overlays of the other sections (e.g. a
+  GitHub Enterprise host with its own tokens), selected with ``APM_ENVIRONMENT``.
+* Environment variables ``APM_<SECTION>__<KEY>`` override single values, e.g.
+  ``APM_GENERAL__GITHUB_TOKEN``. They are decoded as JSON when possible, so
+  ``APM_GENERAL__POOL_SIZE=20`` gives an integer.
+"""
+
+import json
+import os
+from functools import lru_cache
+
+from validation import type_matches
+
+
+# Environment variables selecting the configuration file and the target environment
+PATH_ENV = "APM_CONFIG"
+ENVIRONMENT_ENV = "APM_ENVIRONMENT"
+
+# Prefix and separator of the environment variables overriding single values
+OVERLAY_PREFIX = "APM_"
+OVERLAY_SEPARATOR = "__"
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+
+# Default of the keys that must be given in config.json
+REQUIRED = object()
+
+
+class ConfigError(ValueError):
+    """
+    Raised when the configuration is missing, malformed or does not match the expected keys.
+    """
+
+
+def value_matches(value, json_type):
+    """
+    Tells whether a value has a JSON type of config.json: a JSON type name, alternatives
+    separated by ``|`` (``string|object``), or an array of those with a ``[]`` suffix.
+    """
+
+    if json_type.endswith("[]"):
+        return type_matches(value, "array") and all(value_matches(item, json_type[:-2]) for item in value)
+    return any(type_matches(value, name) for name in json_type.split("|"))
+
+
+class Section:
+    """
+    Settings of one section of config.json.
+
+    Subclasses describe their keys in ``FIELDS`` (key -> (JSON type, default)), and use
+    them as ``__slots__`` (see ``value_matches`` for the types).
+
+    Args:
+        name (str): Name of the section, for error messages.
+        values (dict): The values of the section.
+
+    Raises:
+        ConfigError: Listing every missing, unknown or mistyped key of the section.
+    """
+
+    __slots__ = ()
+    FIELDS = {}
+
+    def __init__(self, name, values):
+        if not isinstance(values, dict):
+            raise ConfigError(f"Section '{name}' must be an object")
+
+        errors = [f"{name}.{key}: unknown key" for key in values if key not in self.FIELDS]
+        for key, (json_type, default) in self.FIELDS.items():
+            if key not in values:
+                if default is REQUIRED:
+                    errors.append(f"{name}.{key}: missing")
+                else:
+                    setattr(self, key, default)
+                continue
+            value = values[key]
+            if not value_matches(value, json_type):
+                errors.append(f"{name}.{key}: expected {json_type}, got {type(value).__name__}")
+            else:
+                setattr(self, key, value)
+        if errors:
+            raise ConfigError("Invalid configuration: " + "; ".join(errors))
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in self.FIELDS}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.as_dict()})"
+
+
+class GeneralSettings(Section):
+    FIELDS = {
+        "base_url": ("string", REQUIRED),
+        "graphql_url": ("string", ""),  # GraphQL endpoint, empty for base_url + /graphql
+        "github_token": ("string", ""),
+        "github_token_forbidden": ("string", ""),
+        "token_pool": ("string[]", []),  # Extra tokens sharing the reads of github_token (see ratelimit.py)
+        "pool_size": ("integer", 10),  # Max connections kept alive per host
+        "max_retries": ("integer", 3),  # Retries on connection errors and 502/503/504
+        "retry_statuses": ("integer[]", [502, 503, 504]),
+        "retry_backoff": ("number", 0.5),  # Backoff factor (s) of the retries, before jitter
+        "retry_backoff_max": ("number", 30),
+        "breaker_threshold": ("integer", 5),  # Consecutive failures opening a host circuit, 0 to disable
+        "breaker_reset": ("number", 30),  # Seconds before a trial request to a failing host
+        "connect_timeout": ("number", 5),  # Seconds to open a connection
+        "read_timeout": ("number", 30),  # Seconds to wait for each read of a response
+        "test_timeout": ("number", 300),  # Time budget (s) of every test, 0 for none
+        "cache_enabled": ("boolean", True),
+        "cache_max_entries": ("integer", 256),
+        "single_flight": ("boolean", True),  # Identical GET requests in flight sent once
+        "snapshot_path": ("string", ""),  # Relative to the configuration file, empty to disable
+        "watermark_path": ("string", ""),  # Relative to the configuration file, empty to disable
+        "pagination_workers": ("integer", 4),  # Pages fetched in parallel
+        "rate_limit_retries": ("integer", 3),  # Retries of rate-limited requests
+        "rate_limit_max_wait": ("number", 900),  # Longest wait (s) before giving up
+        "transport_mode": ("string", "live"),  # live, record or replay
+        "http2": ("boolean", False),  # Live requests over HTTP/2 (needs httpx, see http2.py)
+        "cassette_dir": ("string", "cassettes"),  # Relative to the configuration file
+        "timing_report": ("string", "timing_report.json"),  # JSON report of the request timings
+    }
+    __slots__ = tuple(FIELDS)
+
+
+class Task1Settings(Section):
+    FIELDS = {
+        "endpoint": ("string", REQUIRED),
+        "username": ("string", REQUIRED),
+        "items": ("string[]", REQUIRED),
+    }
+    __slots__ = tuple(FIELDS)
+
+
+class Task2Settings(Section):
+    FIELDS = {
+        "endpoint": ("string", REQUIRED),
+        "username": ("string", REQUIRED),
+        "items": ("string[]", REQUIRED),
+    }
+    __slots__ = tuple(FIELDS)
+
+
+class Task3Settings(Section):
+    FIELDS = {
+        "endpoint_1": ("string", REQUIRED),
+        "endpoint_2": ("string", REQUIRED),
+        "wrong_username": ("string", REQUIRED),
+        "username": ("string", REQUIRED),
+        "items": ("string[]", REQUIRED),
+    }
+    __slots__ = tuple(FIELDS)
+
+
+class Task4Settings(Section):
+    FIELDS = {
+        "endpoint": ("string", REQUIRED),
+        "items": ("string[]", REQUIRED),
+    }
+    __slots__ = tuple(FIELDS)
+
+
+class Task5Settings(Section):
+    FIELDS = {
+        "endpoint_1": ("string", REQUIRED),
+        "endpoint_2": ("string", REQUIRED),
+        "owner": ("string", REQUIRED),
+        "repo": ("string", REQUIRED),
+    }
+    __slots__ = tuple(FIELDS)
+
+
+class Task6Settings(Section):
+    FIELDS = {
+        "endpoint": ("string", REQUIRED),
+        "user_new_name": ("string", REQUIRED),
+        "user_new_bio": ("string", REQUIRED),
+        "user_new_blog": ("string", REQUIRED),
+    }
+    __slots__ = tuple(FIELDS)
+
+
+class Task7Settings(Section):
+    FIELDS = {
+        "user_new_name": ("string", REQUIRED),
+        "user_new_bio": ("string", REQUIRED),
+        "user_new_blog": ("string", REQUIRED),
+        "step_5_repo_list": ("string|object[]", REQUIRED),  # Names, or objects with the fields to check
+        "step_6_user_name": ("string", REQUIRED),
+        "step_6_wrong_repo_name": ("string", REQUIRED),
+        "step_7_item_list": ("string[]", REQUIRED),
+        "step_7_first_repo_name": ("string", REQUIRED),
+        "step_8_item_list": ("string[]", REQUIRED),
+        "step_8_last_repo_name": ("string", REQUIRED),
+        "workflow_timeout": ("number", 120),  # Time budget (s) of the whole workflow, 0 for none
+        "backend": ("string", "rest"),  # rest or graphql: API of the repository and commit reads
+    }
+    __slots__ = tuple(FIELDS)
+
+
+SECTIONS = {
+    "general": GeneralSettings,
+    "task1": Task1Settings,
+    "task2": Task2Settings,
+    "task3": Task3Settings,
+    "task4": Task4Settings,
+    "task5": Task5Settings,
+    "task6": Task6Settings,
+    "task7": Task7Settings,
+}
+
+
+class Config:
+    """
+    Validated configuration: one settings object per section, e.g. ``config.general.base_url``.
+    """
+
+    __slots__ = ("path", "environment", *SECTIONS)
+
+    def __init__(self, path, environment, sections):
+        self.path = path
+        self.environment = environment
+        for name, section in sections.items():
+            setattr(self, name, section)
+
+
+def parse_overlay_value(value):
+    """
+    Decodes the value of an overriding environment variable: JSON if possible, else the raw string.
+    """
+
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def load_config(path=None, environment=None, environ=None):
+    """
+    Loads and validates a configuration file.
+
+    Args:
+        path (str): The configuration file (default: ``APM_CONFIG``, else config.json next
+            to this module).
+        environment (str): Name of the overlay of the ``environments`` section to apply
+            (default: ``APM_ENVIRONMENT``, else none).
+        environ (dict): Environment variables (default: ``os.environ``).
+
+    Returns:
+        Config: The validated configuration.
+
+    Raises:
+        ConfigError: If the file cannot be read or parsed, the environment is unknown, or
+            the values do not match the expected sections and keys.
+    """
+
+    environ = os.environ if environ is None else environ
+    path = os.path.abspath(path or environ.get(PATH_ENV) or DEFAULT_PATH)
+    environment = environment or environ.get(ENVIRONMENT_ENV) or None
+
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, ValueError) as error:
+        raise ConfigError(f"Cannot load configuration file {path}: {error}") from error
+
+    environments = data.pop("environments", {})
+    values = {name: dict(data.get(name, {})) for name in SECTIONS}
+    unknown = [name for name in data if name not in SECTIONS]
+    if unknown:
+        raise ConfigError(f"Unknown configuration sections: {', '.join(unknown)}")
+
+    if environment is not None:
+        if environment not in environments:
+            raise ConfigError(f"Unknown environment '{environment}' (defined: {', '.join(environments) or 'none'})")
+        for name, overlay in environments[environment].items():
+            if name not in SECTIONS:
+                raise ConfigError(f"Unknown section '{name}' in environment '{environment}'")
+            values[name].update(overlay)
+
+    for variable, value in environ.items():
+        if not variable.startswith(OVERLAY_PREFIX) or OVERLAY_SEPARATOR not in variable:
+            continue
+        name, _, key = variable[len(OVERLAY_PREFIX):].partition(OVERLAY_SEPARATOR)
+        if name.lower() not in SECTIONS:
+            raise ConfigError(f"Environment variable {variable} names an unknown section")
+        values[name.lower()][key.lower()] = parse_overlay_value(value)
+
+    errors = []
+    sections = {}
+    for name, settings in SECTIONS.items():
+        try:
+            sections[name] = settings(name, values[name])
+        except ConfigError as error:
+            errors.append(str(error).removeprefix("Invalid configuration: "))
+    if errors:
+        raise ConfigError(f"Invalid configuration {path}: " + "; ".join(errors))
+
+    general = sections["general"]
+    general.cassette_dir = os.path.join(os.path.dirname(path), general.cassette_dir)
+    for key in ("snapshot_path", "watermark_path"):
+        if getattr(general, key):
+            setattr(general, key, os.path.join(os.path.dirname(path), getattr(general, key)))
+    return Config(path, environment, sections)
+
+
+@lru_cache(maxsize=None)
+def get_config():
+    """
+    Returns the configuration of this process, loaded on first use (see ``load_config``).
+    """
+
+    return load_config()
@@ -0,0 +1,74 @@
+"""
+Shared pytest fixtures for the task modules.
+"""
+
+import pytest
+
+from client import TIMING_REPORT, build_session
+from config import get_config
+from deadlines import deadline
+from timing import TimingRecorder, format_summary, summarize, write_report
+
+
+TIMINGS = pytest.StashKey()
+
+
+def pytest_addoption(parser):
+    parser.addoption("--timing-report", default=TIMING_REPORT,
+                     help="JSON file receiving the timing of every request (empty to disable)")
+
+
+def pytest_configure(config):
+    config.stash[TIMINGS] = TimingRecorder()
+    config.addinivalue_line(
+        "markers", "serial: test sends requests that modify server state (e.g. the user profile); "
+                   "runner.py runs all of them in order on a single worker, and unmarked tests "
+                   "are not allowed to send such requests"
+    )
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    records = config.stash[TIMINGS].records
+    if not records:
+        return
+    terminalreporter.write_sep("=", "request timings")
+    for line in format_summary(summarize(records)):
+        terminalreporter.write_line(line)
+    path = config.getoption("timing_report")
+    if path:
+        write_report(path, records)
+        terminalreporter.write_line(f"Timing report written to {path}")
+
+
+@pytest.fixture(scope="session")
+def config():
+    """
+    Provides the validated configuration (see config.py), loaded once per process.
+    """
+
+    return get_config()
+
+
+@pytest.fixture(scope="session")
+def session(request):
+    """
+    Provides one pooled HTTP session for the whole test run, so that connections
+    to the API are reused across tests and task modules.
+    """
+
+    http_session = build_session(recorder=request.config.stash[TIMINGS])
+    yield http_session
+    http_session.close()
+
+
+@pytest.fixture(autouse=True)
+def current_test(request, session, config):
+    """
+    Tells the session which test is running: the record/replay transport records and
+    replays the responses of each test separately, and only tests marked ``serial``
+    are allowed to send requests that modify server state.
+    """
+
+    with session.running(request.node.nodeid, request.node.get_closest_marker("serial") is not None), \
+            deadline(config.general.test_timeout or None):
+        yield
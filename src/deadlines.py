@@ -0,0 +1,91 @@
+"""
+Time budgets of tests and workflows, propagated to the timeout of every request.
+
+``deadline(seconds)`` sets the time by which everything run inside it must be done. It is
+kept in a context variable, so it follows the code into the worker threads of the workflow
+engine (``asyncio.to_thread`` copies the context) and of ``paginate``. Nested deadlines
+can only shorten the outer one.
+
+Every request sent by the session gets a connect and read timeout (``timeout_for``): the
+configured default, cut down to the remaining budget. When a request times out because
+its budget was cut, ``DeadlineExceeded`` is raised instead of a plain timeout, telling a
+slow endpoint (the budget ran out) from a dead one (the default timeout was reached).
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+
+import requests
+
+
+_deadline = contextvars.ContextVar("deadline", default=None)  # time.monotonic() value, or None
+
+
+class DeadlineExceeded(requests.Timeout):
+    """
+    Raised when the time budget of the running test or workflow is exhausted.
+    """
+
+
+@contextmanager
+def deadline(seconds):
+    """
+    Runs a block with a time budget of ``seconds`` (or no budget of its own if None).
+    """
+
+    if seconds is None:
+        yield
+        return
+    current = _deadline.get()
+    expiry = time.monotonic() + seconds
+    token = _deadline.set(expiry if current is None else min(current, expiry))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining():
+    """
+    Returns the seconds left before the current deadline, or None without a deadline.
+    """
+
+    expiry = _deadline.get()
+    return None if expiry is None else expiry - time.monotonic()
+
+
+def check(action="continue"):
+    """
+    Raises ``DeadlineExceeded`` if the current deadline has passed.
+    """
+
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded {-left:.1f} s ago, cannot {action}")
+
+
+def timeout_for(timeout, default):
+    """
+    Returns the timeout of a request and whether it was cut by the current deadline.
+
+    Args:
+        timeout: Timeout given by the caller (seconds, or a (connect, read) tuple), or None.
+        default (tuple): The (connect, read) timeout used when the caller gives none.
+
+    Returns:
+        tuple: ``((connect, read), cut)``.
+
+    Raises:
+        DeadlineExceeded: If the current deadline has already passed.
+    """
+
+    if timeout is None:
+        timeout = default
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    left = remaining()
+    if left is None:
+        return (connect, read), False
+    check("send a request")
+    cut = connect is None or read is None or connect > left or read > left
+    return (left if connect is None else min(connect, left), left if read is None else min(read, left)), cut
@@ -0,0 +1,138 @@
+"""
+Expectation diff for large lists of items (e.g. the repositories of a user or organization).
+
+The expected entries are indexed once by key; the actual items are then added one by one,
+for instance straight from ``paginate``, without keeping them in memory. The resulting
+``Diff`` lists the missing, unexpected, duplicated and changed entries instead of a single
+failed comparison of two sets.
+
+An expected entry is either a key (``"public_repo"``) or an object holding the key and the
+fields to check (``{"name": "public_repo", "private": false}``). Actual items are keys or
+mappings: decoded dicts, or compact models (see models.py) keeping ``ExpectationIndex.fields``.
+"""
+
+from collections.abc import Mapping
+
+
+class Diff:
+    """
+    Differences between expected and actual items.
+
+    Attributes:
+        missing (list): Expected keys never seen.
+        unexpected (list): Keys seen but not expected.
+        duplicates (list): Keys seen more than once.
+        changed (dict): key -> {field: (expected value, actual value)}.
+    """
+
+    def __init__(self, missing, unexpected, duplicates, changed):
+        self.missing = missing
+        self.unexpected = unexpected
+        self.duplicates = duplicates
+        self.changed = changed
+
+    @property
+    def ok(self):
+        return not (self.missing or self.unexpected or self.duplicates or self.changed)
+
+    def describe(self, limit=10):
+        """
+        Returns a one-line description of the differences, listing at most ``limit`` entries per kind.
+        """
+
+        def listing(entries):
+            shown = ", ".join(entries[:limit])
+            return shown + (f" ... and {len(entries) - limit} more" if len(entries) > limit else "")
+
+        parts = []
+        for kind, entries in (("missing", self.missing), ("unexpected", self.unexpected),
+                              ("duplicated", self.duplicates)):
+            if entries:
+                parts.append(f"{len(entries)} {kind}: {listing([str(entry) for entry in entries])}")
+        if self.changed:
+            changes = [f"{key}.{field} expected {expected!r} got {actual!r}"
+                       for key, fields in self.changed.items() for field, (expected, actual) in fields.items()]
+            parts.append(f"{len(self.changed)} changed: {listing(changes)}")
+        return "; ".join(parts) or "no differences"
+
+
+class ExpectationIndex:
+    """
+    Hashed index of expected entries, compared incrementally with actual items.
+
+    Args:
+        expected (iterable): Expected keys, or objects holding the key and the fields to check.
+        key (str): Field identifying an item (e.g. ``name``).
+
+    Raises:
+        ValueError: If an expected object has no key, or a key is expected twice.
+    """
+
+    def __init__(self, expected, key="name"):
+        self.key = key
+        self.expected = {}  # key -> {field: expected value}
+        for entry in expected:
+            if isinstance(entry, dict):
+                if key not in entry:
+                    raise ValueError(f"Expected entry {entry!r} has no '{key}'")
+                fields = {field: value for field, value in entry.items() if field != key}
+                entry = entry[key]
+            else:
+                fields = {}
+            if entry in self.expected:
+                raise ValueError(f"'{entry}' is expected twice")
+            self.expected[entry] = fields
+
+        self.seen = set()
+        self.unexpected = []
+        self.duplicates = []
+        self.changed = {}
+
+    @property
+    def fields(self):
+        """
+        Fields read from the actual items: the key and every field to check.
+        """
+
+        return {self.key}.union(*self.expected.values())
+
+    def add(self, item):
+        """
+        Compares one actual item (an object holding the key, or the key itself).
+        """
+
+        item_key = item[self.key] if isinstance(item, Mapping) else item
+        if item_key in self.seen:
+            self.duplicates.append(item_key)
+            return
+        self.seen.add(item_key)
+
+        fields = self.expected.get(item_key)
+        if fields is None:
+            self.unexpected.append(item_key)
+            return
+        changes = {field: (value, item.get(field) if isinstance(item, Mapping) else None)
+                   for field, value in fields.items()
+                   if not isinstance(item, Mapping) or item.get(field) != value}
+        if changes:
+            self.changed[item_key] = changes
+
+    def update(self, items):
+        """
+        Compares every item of an iterable (e.g. a ``paginate`` generator), in one pass.
+
+        Returns:
+            ExpectationIndex: The index itself, to chain with ``diff()``.
+        """
+
+        for item in items:
+            self.add(item)
+        return self
+
+    def diff(self):
+        """
+        Returns the differences found so far.
+        """
+
+        missing = [key for key in self.expected if key not in self.seen]
+        return Diff(missing, list(self.unexpected), list(self.duplicates), dict(self.changed))
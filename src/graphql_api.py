@@ -0,0 +1,206 @@
+"""
+GraphQL backend of the task7 repository and commit reads.
+
+With the REST API, steps 5, 7 and 8 of task7 cost one request per page of repositories
+plus one commit listing per checked repository. ``fetch_repositories`` gets the same data
+from the GraphQL endpoint in one query: the repositories of the viewer (with a cursor for
+the next pages, fetched by smaller follow-up queries), and the latest commits of the first
+and last of them, in the same order as ``/user/repos`` (by name).
+
+Only the commit fields the configured expectations need are selected (see
+``commit_selection``), and the results are mapped back to the shape of the REST objects
+(``rest_repository``, ``rest_commit``), so the assertions and the validation schemas of
+task7 are the same for both backends.
+"""
+
+import requests
+
+
+# Repositories per page (the most GitHub allows) and latest commits read per repository
+# (the page size of the REST commit listing)
+REPOSITORIES_PER_PAGE = 100
+COMMITS_PER_REPOSITORY = 30
+
+SIGNATURE = "name email date user { login }"
+AUTHOR = f"author {{ {SIGNATURE} }}"
+COMMITTER = f"committer {{ {SIGNATURE} }}"
+
+# GraphQL selection of every REST commit field (bare key or dotted path, see validation.py)
+COMMIT_SELECTIONS = {
+    "sha": "oid",
+    "message": "message", "commit.message": "message",
+    "author": AUTHOR, "date": AUTHOR, "name": AUTHOR, "email": AUTHOR, "login": AUTHOR, "author.login": AUTHOR,
+    "commit.author": AUTHOR, "commit.author.name": AUTHOR, "commit.author.email": AUTHOR,
+    "commit.author.date": AUTHOR,
+    "committer": COMMITTER, "committer.login": COMMITTER, "commit.committer": COMMITTER,
+    "commit.committer.name": COMMITTER, "commit.committer.email": COMMITTER, "commit.committer.date": COMMITTER,
+    "commit": f"message {AUTHOR} {COMMITTER}",
+}
+
+REPOSITORY_SELECTION = "databaseId name nameWithOwner isPrivate owner { login }"
+ORDER = "orderBy: {field: NAME, direction: ASC}"
+
+OVERVIEW_QUERY = """
+query Overview($commits: Int!) {
+  viewer {
+    login
+    repositories(first: %(per_page)d, %(order)s) {
+      pageInfo { hasNextPage endCursor }
+      nodes { %(repository)s }
+    }
+    first: repositories(first: 1, %(order)s) { nodes { ...LatestCommits } }
+    last: repositories(last: 1, %(order)s) { nodes { ...LatestCommits } }
+  }
+}
+
+fragment LatestCommits on Repository {
+  name
+  defaultBranchRef { target { ... on Commit { history(first: $commits) { nodes { %(commit)s } } } } }
+}
+"""
+
+REPOSITORY_PAGE_QUERY = """
+query RepositoryPage($after: String!) {
+  viewer {
+    repositories(first: %(per_page)d, after: $after, %(order)s) {
+      pageInfo { hasNextPage endCursor }
+      nodes { %(repository)s }
+    }
+  }
+}
+"""
+
+
+class GraphQLError(requests.RequestException):
+    """
+    Raised when the GraphQL endpoint answers with errors.
+    """
+
+
+def graphql_url(base_url):
+    """
+    Returns the GraphQL endpoint of a REST API base URL (``https://api.github.com/graphql``).
+    """
+
+    return f"{base_url.rstrip('/')}/graphql"
+
+
+def commit_selection(fields):
+    """
+    Returns the GraphQL selection of the commit fields given as field specs (see validation.py).
+
+    Raises:
+        ValueError: If a field has no GraphQL equivalent.
+    """
+
+    selections = ["oid"]
+    for spec in fields:
+        field = spec.partition(":")[0]
+        if field not in COMMIT_SELECTIONS:
+            raise ValueError(f"Commit field '{field}' cannot be fetched with GraphQL")
+        if COMMIT_SELECTIONS[field] not in selections:
+            selections.append(COMMIT_SELECTIONS[field])
+    return " ".join(selections)
+
+
+def query(session, url, text, variables=None, **kwargs):
+    """
+    Sends a GraphQL query and returns its data.
+
+    Args:
+        session (requests.Session): The shared HTTP session.
+        url (str): The GraphQL endpoint.
+        text (str): The query.
+        variables (dict): Its variables.
+        **kwargs: Extra arguments for ``session.post`` (headers, verify...).
+
+    Raises:
+        requests.HTTPError: If the endpoint answers with an error status code.
+        GraphQLError: If the query failed.
+    """
+
+    response = session.post(url, json={"query": text, "variables": variables or {}}, **kwargs)
+    response.raise_for_status()
+    payload = response.json()
+    if payload.get("errors"):
+        raise GraphQLError("; ".join(error.get("message", str(error)) for error in payload["errors"]),
+                           response=response)
+    return payload["data"]
+
+
+def rest_repository(node):
+    """
+    Returns a repository node in the shape of a REST repository object.
+    """
+
+    return {"id": node["databaseId"], "name": node["name"], "full_name": node["nameWithOwner"],
+            "private": node["isPrivate"], "owner": {"login": node["owner"]["login"]}}
+
+
+def rest_commit(node):
+    """
+    Returns a commit node in the shape of a REST commit object (with the fetched fields only).
+    """
+
+    details = {}
+    commit = {"sha": node["oid"], "commit": details}
+    if "message" in node:
+        details["message"] = node["message"]
+    for role in ("author", "committer"):
+        if role not in node:
+            continue
+        signature = dict(node[role] or {})
+        user = signature.pop("user", None)
+        details[role] = signature
+        commit[role] = {"login": user["login"]} if user else None
+    return commit
+
+
+def latest_commits(repositories):
+    """
+    Returns the name and the REST commits of the repository node of a ``first``/``last`` alias.
+    """
+
+    if not repositories["nodes"]:
+        return None, []
+    node = repositories["nodes"][0]
+    target = (node.get("defaultBranchRef") or {}).get("target") or {}
+    return node["name"], [rest_commit(commit) for commit in target.get("history", {}).get("nodes", [])]
+
+
+def fetch_repositories(session, url, commit_fields, commits=COMMITS_PER_REPOSITORY, **kwargs):
+    """
+    Lists the repositories of the viewer with the latest commits of the first and last one.
+
+    Args:
+        session (requests.Session): The shared HTTP session.
+        url (str): The GraphQL endpoint.
+        commit_fields (list): Field specs of the commits to fetch (see ``commit_selection``).
+        commits (int): Number of latest commits of the first and last repositories.
+        **kwargs: Extra arguments for ``session.post`` (headers, verify...).
+
+    Returns:
+        list: The repositories in the shape of the REST objects, sorted by name; the first
+            and last ones hold their latest commits under ``commits``.
+
+    Raises:
+        requests.HTTPError: If the endpoint answers with an error status code.
+        GraphQLError: If a query failed.
+    """
+
+    parts = {"per_page": REPOSITORIES_PER_PAGE, "order": ORDER, "repository": REPOSITORY_SELECTION,
+             "commit": commit_selection(commit_fields)}
+    viewer = query(session, url, OVERVIEW_QUERY % parts, {"commits": commits}, **kwargs)["viewer"]
+
+    page = viewer["repositories"]
+    repositories = [rest_repository(node) for node in page["nodes"]]
+    while page["pageInfo"]["hasNextPage"]:
+        page = query(session, url, REPOSITORY_PAGE_QUERY % parts, {"after": page["pageInfo"]["endCursor"]},
+                     **kwargs)["viewer"]["repositories"]
+        repositories.extend(rest_repository(node) for node in page["nodes"])
+
+    histories = dict([latest_commits(viewer["first"]), latest_commits(viewer["last"])])
+    for repository in repositories[:1] + repositories[-1:]:
+        if repository["name"] in histories:
+            repository["commits"] = histories[repository["name"]]
+    return repositories
@@ -0,0 +1,191 @@
+"""
+Optional HTTP/2 transport for the shared session.
+
+``Http2Adapter`` is mounted in place of the plain ``HTTPAdapter`` (see client.py) when
+``http2`` is enabled in config.json. It sends the requests with an ``httpx`` client, which
+multiplexes all the concurrent requests to a host (paginated commit listings, workflow
+steps...) over a single HTTP/2 connection instead of a pool of HTTP/1.1 sockets.
+
+The session API is unchanged: the adapter turns prepared requests into ``httpx`` requests
+and their responses back into ``requests`` responses, so the cache, rate limiter, circuit
+breaker and timings of the session work the same way, and it applies the same
+``JitteredRetry`` policy as the HTTP/1.1 adapter.
+
+``httpx`` (with its ``http2`` extra) is an optional dependency, only imported when the
+transport is selected::
+
+    pip install "httpx[http2]"
+"""
+
+import os
+import ssl
+import threading
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError, ProtocolError
+from urllib3.response import HTTPResponse
+
+try:
+    import httpx
+except ImportError:  # Optional dependency, see the module docstring
+    httpx = None
+
+
+# Headers that do not describe the body once decoded by httpx
+DECODED_HEADERS = ("content-encoding", "transfer-encoding", "content-length")
+
+
+class _BodyReader:
+    """
+    File-like view of the body of an ``httpx`` response, read as ``requests`` reads a socket.
+    """
+
+    def __init__(self, response):
+        self.response = response
+        self._chunks = response.iter_bytes()
+        self._buffer = b""
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def close(self):
+        self.response.close()
+
+    @property
+    def closed(self):
+        return self.response.is_closed
+
+
+def _requests_error(error, request):
+    """
+    Returns the ``requests`` exception matching an ``httpx`` transport error.
+    """
+
+    if isinstance(error, httpx.ConnectTimeout):
+        return requests.ConnectTimeout(error, request=request)
+    if isinstance(error, httpx.TimeoutException):
+        return requests.ReadTimeout(error, request=request)
+    return requests.ConnectionError(error, request=request)
+
+
+def _ssl_verify(verify):
+    """
+    Returns the ``verify`` argument of ``httpx`` matching the one of ``requests``: a
+    bundle or directory of CA certificates becomes an SSL context.
+    """
+
+    if not isinstance(verify, str):
+        return verify
+    if os.path.isdir(verify):
+        return ssl.create_default_context(capath=verify)
+    return ssl.create_default_context(cafile=verify)
+
+
+class Http2Adapter(BaseAdapter):
+    """
+    Transport adapter sending the requests over HTTP/2 with ``httpx``.
+
+    Args:
+        pool_size (int): Maximum number of connections kept alive (one per host is
+            enough with HTTP/2).
+        max_retries (Retry): Retry policy of connection errors and error responses.
+
+    Raises:
+        ImportError: If ``httpx`` or its ``http2`` extra is not installed.
+    """
+
+    def __init__(self, pool_size=10, max_retries=None):
+        if httpx is None:
+            raise ImportError('The HTTP/2 transport (http2 in config.json) needs httpx: pip install "httpx[http2]"')
+        super().__init__()
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self._clients = {}  # verify setting -> httpx.Client
+        self._lock = threading.Lock()
+        self._client(True)  # Fails now rather than on the first request if h2 is missing
+
+    def _client(self, verify):
+        # httpx only sets the certificate verification per client
+        with self._lock:
+            client = self._clients.get(verify)
+            if client is None:
+                limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+                client = self._clients[verify] = httpx.Client(http2=True, verify=_ssl_verify(verify),
+                                                              limits=limits)
+            return client
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        client = self._client(verify)
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        outgoing = client.build_request(request.method, request.url, headers=dict(request.headers),
+                                        content=request.body,
+                                        timeout=httpx.Timeout(read, connect=connect, pool=connect))
+        retry = self.max_retries
+        while True:
+            try:
+                response = client.send(outgoing, stream=True)
+            except httpx.TransportError as error:
+                # Same classification as urllib3: read errors are only retried for idempotent methods
+                cause = ConnectTimeoutError(error) if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout)) \
+                    else ProtocolError(error)
+                try:
+                    retry = retry.increment(request.method, request.url, error=cause) if retry else None
+                except MaxRetryError:
+                    retry = None
+                if retry is None:
+                    raise _requests_error(error, request) from error
+                retry.sleep()
+                continue
+
+            raw = self._raw_response(response)
+            if retry and retry.is_retry(request.method, response.status_code, "Retry-After" in response.headers):
+                try:
+                    retry = retry.increment(request.method, request.url, response=raw)
+                except MaxRetryError:
+                    # Retries exhausted: like raise_on_status=False, return the last response
+                    return self.build_response(request, raw)
+                response.close()
+                retry.sleep(raw)
+                continue
+            return self.build_response(request, raw)
+
+    @staticmethod
+    def _raw_response(response):
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in DECODED_HEADERS}
+        return HTTPResponse(body=_BodyReader(response), headers=headers, status=response.status_code,
+                            reason=response.reason_phrase, version=20 if response.http_version == "HTTP/2" else 11,
+                            preload_content=False, decode_content=False)
+
+    def build_response(self, request, raw):
+        """
+        Returns the ``requests`` response of a raw urllib3 response.
+        """
+
+        response = requests.Response()
+        response.status_code = raw.status
+        response.headers = CaseInsensitiveDict(raw.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = raw
+        response.reason = raw.reason
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
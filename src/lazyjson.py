@@ -0,0 +1,250 @@
+"""
+Lazy views of JSON response bodies.
+
+``response.json()`` decodes the whole body into Python objects before the first value
+can be looked at. For a large body of which only the beginning is needed (the first
+commit of a page of thousands), ``json_view`` returns a read-only view of the body
+instead, which stops as soon as the value accessed is found:
+
+* a JSON object is a ``Mapping`` (``ObjectView``): its members are scanned up to the key
+  looked up,
+* a JSON array is a ``Sequence`` (``ArrayView``): its elements are scanned up to the one
+  accessed (``view[0]`` never looks past the first element),
+* nested objects and arrays are views too, and other values are decoded as ``json`` does.
+
+This is not a zero-copy parser: the body is decoded once into a ``str`` shared by all
+the views of it, and every value scanned over (before the one accessed, or inside a
+nested view) is decoded by the C scanner of ``json`` to find where it ends, then dropped.
+A view therefore only pays off for early access into a large body: looking up a key of
+a small object, validating a whole document or ``len()`` of an array cost more than
+``response.json()``, which remains the way to read whole bodies. ``load()`` decodes a
+whole view at once, with ``orjson`` when it is installed (optional, ``pip install orjson``)::
+
+    commits = json_view(response)
+    first = commits[0]         # Only the first commit is decoded
+    commits.load()             # Plain lists and dicts, like response.json()
+"""
+
+import json
+import re
+from collections.abc import Mapping, Sequence
+from json.decoder import JSONDecodeError, scanstring
+
+try:
+    import orjson
+except ImportError:  # Optional dependency, see the module docstring
+    orjson = None
+
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _skip_whitespace(text, pos):
+    return _WHITESPACE.match(text, pos).end()
+
+
+def _end_of(text, pos):
+    """
+    Returns the position after the value starting at ``pos``. The value is decoded by the
+    C scanner of ``json`` and dropped, which is still faster than matching brackets in Python.
+    """
+
+    return _decoder.raw_decode(text, pos)[1]
+
+
+def _value(text, pos):
+    """
+    Returns a view of the object or array starting at ``pos``, or the decoded value.
+    """
+
+    _expect_value(text, pos)
+    char = text[pos]
+    if char == "{":
+        return ObjectView(text, pos)
+    if char == "[":
+        return ArrayView(text, pos)
+    return _decoder.raw_decode(text, pos)[0]
+
+
+def _expect(text, pos, chars):
+    if pos >= len(text) or text[pos] not in chars:
+        raise JSONDecodeError(f"Expecting one of {chars!r}", text, pos)
+
+
+def _expect_value(text, pos):
+    if pos >= len(text):
+        raise JSONDecodeError("Expecting value", text, pos)
+
+
+class ObjectView(Mapping):
+    """
+    Read-only view of a JSON object of a text, whose keys are scanned on demand.
+
+    Args:
+        text (str): The JSON text.
+        pos (int): Position of the opening brace of the object.
+    """
+
+    __slots__ = ("_text", "_start", "_next", "_positions", "_values")
+
+    def __init__(self, text, pos=0):
+        self._text = text
+        self._start = pos
+        self._next = _skip_whitespace(text, pos + 1)  # Position of the next unscanned member, or None
+        self._positions = {}  # key -> position of its value
+        self._values = {}  # key -> decoded value or view, once accessed
+        if text.startswith("}", self._next):
+            self._next = None
+
+    def _scan(self, wanted=None):
+        # Scans the members until ``wanted`` (or the end), recording where their values start
+        text, pos = self._text, self._next
+        while pos is not None:
+            _expect(text, pos, '"')
+            key, pos = scanstring(text, pos + 1)
+            pos = _skip_whitespace(text, pos)
+            _expect(text, pos, ":")
+            start = _skip_whitespace(text, pos + 1)
+            # Unlike json.loads, the first of duplicate keys wins, so that a key is found
+            # without scanning the rest of the object (the API never sends duplicates)
+            self._positions.setdefault(key, start)
+            pos = _skip_whitespace(text, _end_of(text, start))
+            _expect(text, pos, ",}")
+            pos = _skip_whitespace(text, pos + 1) if text[pos] == "," else None
+            self._next = pos
+            if key == wanted:
+                return
+
+    def __getitem__(self, key):
+        if key not in self._positions and self._next is not None:
+            self._scan(key)
+        if key in self._values:
+            return self._values[key]
+        try:
+            value = self._values[key] = _value(self._text, self._positions[key])
+        except KeyError:
+            raise KeyError(key) from None
+        return value
+
+    def __iter__(self):
+        self._scan()
+        return iter(self._positions)
+
+    def __len__(self):
+        self._scan()
+        return len(self._positions)
+
+    def load(self):
+        """
+        Returns the whole object decoded into dicts and lists.
+        """
+
+        return _load(self._text, self._start)
+
+    def __repr__(self):
+        return f"ObjectView({self.load()!r})"
+
+
+class ArrayView(Sequence):
+    """
+    Read-only view of a JSON array of a text, whose elements are located on demand.
+
+    Args:
+        text (str): The JSON text.
+        pos (int): Position of the opening bracket of the array.
+    """
+
+    __slots__ = ("_text", "_start", "_next", "_positions")
+
+    def __init__(self, text, pos=0):
+        self._text = text
+        self._start = pos
+        self._next = _skip_whitespace(text, pos + 1)  # Position of the next unlocated element, or None
+        self._positions = []  # Position of every located element
+        if text.startswith("]", self._next):
+            self._next = None
+
+    def _scan(self, count=None):
+        # Locates the elements until ``count`` of them are known (or the end)
+        text, pos = self._text, self._next
+        while pos is not None and (count is None or len(self._positions) < count):
+            self._positions.append(pos)
+            pos = _skip_whitespace(text, _end_of(text, pos))
+            _expect(text, pos, ",]")
+            pos = _skip_whitespace(text, pos + 1) if text[pos] == "," else None
+            self._next = pos
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            self._scan()
+            index += len(self._positions)
+        elif index >= len(self._positions):
+            self._scan(index + 1)
+        if not 0 <= index < len(self._positions):
+            raise IndexError("list index out of range")
+        return _value(self._text, self._positions[index])
+
+    def __iter__(self):
+        index = 0
+        while True:
+            if index >= len(self._positions):
+                self._scan(index + 1)
+                if index >= len(self._positions):
+                    return
+            yield _value(self._text, self._positions[index])
+            index += 1
+
+    def __len__(self):
+        self._scan()
+        return len(self._positions)
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, ArrayView)):
+            return NotImplemented
+        return len(self) == len(other) and all(mine == theirs for mine, theirs in zip(self, other))
+
+    __hash__ = None
+
+    def load(self):
+        """
+        Returns the whole array decoded into lists and dicts.
+        """
+
+        return _load(self._text, self._start)
+
+    def __repr__(self):
+        return f"ArrayView({self.load()!r})"
+
+
+def _load(text, pos):
+    if orjson is not None:
+        return orjson.loads(text[pos:_end_of(text, pos)] if pos else text)
+    return _decoder.raw_decode(text, pos)[0]
+
+
+def loads(text):
+    """
+    Returns a view of a JSON document (see the module docstring), or its value if it is
+    neither an object nor an array.
+
+    Args:
+        text (str or bytes): The document (bytes are decoded as UTF-8).
+
+    Raises:
+        ValueError: If the document does not start with a JSON value.
+    """
+
+    if isinstance(text, (bytes, bytearray)):
+        text = text.decode("utf-8-sig")
+    return _value(text, _skip_whitespace(text, 0))
+
+
+def json_view(response):
+    """
+    Returns a lazy view of the JSON body of a response (see ``loads``).
+    """
+
+    return loads(response.content)
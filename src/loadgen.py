@@ -0,0 +1,214 @@
+"""
+Load generator replaying the task7 workflow for many virtual users.
+
+Each workflow run reads the profile, updates it, reads it again, lists the repositories and
+validates the commits of the first and last of them, with the step functions and the
+engine of task7 (see workflow.py). Runs are started at a target arrival rate, round-robin
+over the tokens of the virtual users, and at most ``--concurrency`` of them are in flight
+at the same time (later arrivals wait for a free slot).
+
+At the end, the throughput, the responses by status code and the failures and latency
+percentiles of every step are printed, and optionally written into a JSON report.
+
+Usage (from the ``src`` folder), with one token per line in the tokens file:
+
+    python loadgen.py --tokens tokens.txt --rate 5 --duration 60 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import task7
+from client import POOL_SIZE, build_session
+from timing import PERCENTILES, TimingRecorder, percentile
+from workflow import Step, Workflow
+
+
+# Every run lists the commits, whatever the watermarks of the previous runs (see watermarks.py)
+def first_repo_commits(session, headers, repos):
+    assert repos, "The user has no repositories"
+    return task7.validate_commits(session, headers, repos[0], task7.step_7_schema, watermarks=None)
+
+
+def last_repo_commits(session, headers, repos):
+    assert repos, "The user has no repositories"
+    return task7.validate_commits(session, headers, repos[-1], task7.step_8_schema, watermarks=None)
+
+
+# The steps of task7 that hold for any user (the expected repository names of steps 5, 7
+# and 8 only hold for the configured one)
+LOAD_WORKFLOW = Workflow([
+    Step("read_profile", task7.step_2),
+    Step("update_profile", task7.step_3, requires=["read_profile"]),
+    Step("check_profile", task7.step_4, requires=["update_profile"]),
+    Step("list_repos", task7.list_repos),
+    Step("first_repo_commits", first_repo_commits, requires=["list_repos"]),
+    Step("last_repo_commits", last_repo_commits, requires=["list_repos"]),
+])
+
+
+def user_headers(token):
+    """
+    Returns the task7 request headers with the token of a virtual user.
+    """
+
+    return {**task7.headers, "Authorization": f"token {token}"}
+
+
+def load_session(concurrency, recorder):
+    """
+    Returns a session sending every request of the load to the server: without the ETag
+    cache (repeated reads would become 304s) nor the coalescing of identical requests
+    (they would not reach the server), which would not measure its capacity.
+    """
+
+    widest_wave = max(len(wave) for wave in LOAD_WORKFLOW.waves)
+    return build_session(pool_size=max(POOL_SIZE, concurrency * widest_wave), cache_enabled=False,
+                         single_flight=False, recorder=recorder)
+
+
+async def generate(session, tokens, rate, runs, concurrency):
+    """
+    Starts ``runs`` workflow runs at ``rate`` runs per second.
+
+    Args:
+        session (ApiSession): Session shared by every run.
+        tokens (list): Tokens of the virtual users, used in turn.
+        rate (float): Target arrival rate, in runs per second.
+        runs (int): Total number of runs.
+        concurrency (int): Maximum number of runs in flight.
+
+    Returns:
+        list: ``(outcomes, duration)`` of every run, in completion order.
+    """
+
+    loop = asyncio.get_running_loop()
+    widest_wave = max(len(wave) for wave in LOAD_WORKFLOW.waves)
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency * widest_wave))
+    slots = asyncio.Semaphore(concurrency)
+    results = []
+
+    async def run(headers):
+        async with slots:
+            start = time.perf_counter()
+            outcomes = await LOAD_WORKFLOW.run_async(session, headers)
+            results.append((outcomes, time.perf_counter() - start))
+
+    tasks = []
+    start = loop.time()
+    for index in range(runs):
+        await asyncio.sleep(max(start + index / rate - loop.time(), 0))
+        tasks.append(asyncio.ensure_future(run(user_headers(tokens[index % len(tokens)]))))
+    await asyncio.gather(*tasks)
+    return results
+
+
+def summarize(results, records, elapsed):
+    """
+    Aggregates the outcomes of the runs and the timing records of their requests.
+
+    Returns:
+        dict: Runs and requests per second, responses by status code, and the runs,
+            failures (by error type), error rate and duration percentiles of each step.
+    """
+
+    statuses = Counter(str(record["status"]) for record in records)
+    durations = defaultdict(list)
+    failures = defaultdict(Counter)
+    for outcomes, _ in results:
+        for name, outcome in outcomes.items():
+            if outcome.ok:
+                durations[name].append(outcome.duration)
+            else:
+                failures[name][type(outcome.error).__name__] += 1
+
+    steps = {}
+    for name in LOAD_WORKFLOW.steps:
+        values = sorted(durations[name])
+        failed = sum(failures[name].values())
+        steps[name] = {"runs": len(values) + failed, "failed": failed, "errors": dict(failures[name]),
+                       "error_rate": failed / len(results) if results else 0,
+                       **{f"p{rank}": percentile(values, rank) for rank in PERCENTILES}}
+
+    return {
+        "runs": len(results),
+        "failed_runs": sum(1 for outcomes, _ in results if not all(outcome.ok for outcome in outcomes.values())),
+        "elapsed": round(elapsed, 3),
+        "runs_per_second": len(results) / elapsed if elapsed else 0,
+        "requests_per_second": len(records) / elapsed if elapsed else 0,
+        "status_codes": dict(sorted(statuses.items())),
+        "steps": steps,
+    }
+
+
+def format_report(summary):
+    """
+    Returns the lines of the terminal report of a summary.
+    """
+
+    lines = [
+        f"{summary['runs']} runs in {summary['elapsed']:.1f} s ({summary['failed_runs']} failed): "
+        f"{summary['runs_per_second']:.2f} runs/s, {summary['requests_per_second']:.2f} requests/s",
+        "responses by status code: " + ", ".join(f"{status}: {count}" for status, count
+                                                 in summary["status_codes"].items()),
+        f"{'step':<20}  {'runs':>6}  {'failed':>6}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  errors",
+    ]
+    for name, stats in summary["steps"].items():
+        times = "  ".join(f"{stats[f'p{rank}'] * 1000:8.1f}" if stats[f"p{rank}"] is not None else f"{'-':>8}"
+                          for rank in PERCENTILES)
+        errors = ", ".join(f"{error}: {count}" for error, count in stats["errors"].items())
+        lines.append(f"{name:<20}  {stats['runs']:>6}  {stats['failed']:>6}  {times}  {errors}")
+    return lines
+
+
+def main(tokens, rate, duration, concurrency, report=None):
+    """
+    Runs the load and prints its report.
+
+    Returns:
+        int: 0 if every run succeeded, 1 otherwise.
+    """
+
+    recorder = TimingRecorder()
+    session = load_session(concurrency, recorder)
+    runs = max(int(rate * duration), 1)
+    start = time.perf_counter()
+    try:
+        results = asyncio.run(generate(session, tokens, rate, runs, concurrency))
+    finally:
+        session.close()
+
+    summary = summarize(results, recorder.records, time.perf_counter() - start)
+    print("\n".join(format_report(summary)))
+    if report:
+        with open(report, "w", encoding="utf-8") as file:
+            json.dump(summary, file, indent=2)
+        print(f"Report written to {report}")
+    return 1 if summary["failed_runs"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay the task7 workflow for many virtual users.")
+    parser.add_argument("--tokens", help="file with one token per virtual user (default: github_token)")
+    parser.add_argument("--users", type=int, help="number of virtual users (default: every token of the file)")
+    parser.add_argument("--rate", type=float, default=1.0, help="workflow runs started per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds during which runs are started")
+    parser.add_argument("--concurrency", type=int, default=10, help="maximum number of runs in flight")
+    parser.add_argument("--report", help="JSON file receiving the report")
+    args = parser.parse_args()
+
+    if args.tokens:
+        with open(args.tokens, encoding="utf-8") as file:
+            user_tokens = [line.strip() for line in file if line.strip()]
+    else:
+        user_tokens = [task7.GITHUB_TOKEN]
+    user_tokens = user_tokens[:args.users] if args.users else user_tokens
+    if not user_tokens:
+        parser.error("no tokens given")
+
+    sys.exit(main(user_tokens, args.rate, args.duration, args.concurrency, args.report))
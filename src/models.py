@@ -0,0 +1,119 @@
+"""
+Compact models of the API objects held in memory.
+
+A repository object of the API has about 80 fields (with nested owner and permissions
+objects) and a commit about 30, while the tasks only read a handful of them. Holding
+decoded dicts for every repository or commit of a large listing costs several KB each;
+``User``, ``Repo`` and ``Commit`` keep only the fields the tasks use, in ``__slots__``,
+for a few hundred bytes.
+
+``Model.decode`` converts the items of a listing one by one (e.g. straight from
+``paginate``), so only one full dict is alive at a time. Fields needed by the configured
+expectations but not by the model (see ``ExpectationIndex.fields``) can be kept with
+``keep``; every other field is dropped.
+
+Models are read-only mappings of their fields, so they can be compared with the expected
+entries like the decoded dicts (``repo["name"]``, ``repo.get("private")``), and attributes
+give the same values (``repo.name``).
+"""
+
+from collections.abc import Mapping
+
+
+def lookup(obj, path):
+    """
+    Returns the value at a dotted path of a decoded JSON object (or lazy view, see
+    lazyjson.py), or None if it is missing.
+    """
+
+    for key in path.split("."):
+        if not isinstance(obj, Mapping):
+            return None
+        obj = obj.get(key)
+    return obj
+
+
+class Model(Mapping):
+    """
+    Base of the compact models: ``FIELDS`` maps every attribute to its dotted path in the
+    JSON object, and ``extra`` holds the kept fields that are not attributes (or None).
+
+    Args:
+        *values: Values of ``FIELDS``, in order.
+        extra (dict): Other kept fields.
+    """
+
+    __slots__ = ("extra",)
+    FIELDS = {}
+
+    def __init__(self, *values, extra=None):
+        if len(values) != len(self.FIELDS):
+            raise TypeError(f"{type(self).__name__} takes {len(self.FIELDS)} values, got {len(values)}")
+        for name, value in zip(self.FIELDS, values):
+            setattr(self, name, value)
+        self.extra = extra or None
+
+    @classmethod
+    def from_json(cls, obj, keep=()):
+        """
+        Decodes a JSON object, keeping ``FIELDS`` and the fields (or dotted paths) of ``keep``.
+        """
+
+        extra = {field: lookup(obj, field) for field in keep if field not in cls.FIELDS}
+        return cls(*(lookup(obj, path) for path in cls.FIELDS.values()), extra=extra)
+
+    @classmethod
+    def decode(cls, items, keep=()):
+        """
+        Yields the model of every JSON object of an iterable (see ``from_json``).
+        """
+
+        for item in items:
+            yield cls.from_json(item, keep)
+
+    def __getitem__(self, field):
+        if field in self.FIELDS:
+            return getattr(self, field)
+        if self.extra is not None and field in self.extra:
+            return self.extra[field]
+        raise KeyError(field)
+
+    def __iter__(self):
+        yield from self.FIELDS
+        if self.extra is not None:
+            yield from self.extra
+
+    def __len__(self):
+        return len(self.FIELDS) + (len(self.extra) if self.extra is not None else 0)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{field}={value!r}' for field, value in self.items())})"
+
+
+class User(Model):
+    """
+    User profile (``/user``, ``/users/{username}``).
+    """
+
+    FIELDS = {"login": "login", "id": "id", "name": "name", "bio": "bio", "blog": "blog"}
+    __slots__ = tuple(FIELDS)
+
+
+class Repo(Model):
+    """
+    Repository of a listing (``/user/repos``, ``/users/{username}/repos``); ``owner`` is the
+    login of the owner.
+    """
+
+    FIELDS = {"id": "id", "name": "name", "full_name": "full_name", "owner": "owner.login", "private": "private"}
+    __slots__ = tuple(FIELDS)
+
+
+class Commit(Model):
+    """
+    Commit of a listing (``/repos/{owner}/{repo}/commits``); ``author`` and ``date`` are
+    the name and date of the author in the commit.
+    """
+
+    FIELDS = {"sha": "sha", "author": "commit.author.name", "message": "commit.message", "date": "commit.author.date"}
+    __slots__ = tuple(FIELDS)
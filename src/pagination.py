@@ -0,0 +1,127 @@
+"""
+Pagination helpers for the list endpoints (repositories, commits).
+
+GitHub paginates list endpoints and describes the other pages in the ``Link`` header.
+When the header gives the ``last`` page, all the remaining pages are known up front and
+are fetched concurrently by a bounded thread pool; items are still yielded in order.
+When only a ``next`` link is given, or pages are addressed by cursor instead of number,
+pages are followed one after another.
+
+With ``stream=True`` each page is decoded incrementally (see streaming.py) instead of
+being loaded whole with ``response.json()``.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from itertools import islice
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+
+from config import get_config
+from streaming import iter_json_items
+
+
+PAGINATION_WORKERS = get_config().general.pagination_workers  # Pages fetched in parallel
+
+
+def page_number(url):
+    """
+    Returns the ``page`` query parameter of a URL as an int, or None if it has none.
+    """
+
+    values = parse_qs(urlparse(url).query).get("page")
+    return int(values[0]) if values else None
+
+
+def page_url(url, page):
+    """
+    Returns ``url`` with its ``page`` query parameter set to ``page``.
+    """
+
+    parts = urlparse(url)
+    query = parse_qs(parts.query)
+    query["page"] = [str(page)]
+    return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+
+
+def fetch_page(session, url, **kwargs):
+    """
+    Fetches one page and returns its response, raising ``requests.HTTPError`` on error.
+    """
+
+    response = session.get(url, **kwargs)
+    if not response.ok:
+        response.close()
+    response.raise_for_status()
+    return response
+
+
+def page_items(response, stream=False):
+    """
+    Yields the items of a page, decoding them incrementally if the response is streamed.
+    """
+
+    if stream:
+        with response:
+            yield from iter_json_items(response)
+    else:
+        yield from response.json()
+
+
+def paginate(session, url, params=None, max_workers=PAGINATION_WORKERS, **kwargs):
+    """
+    Iterates over the items of every page of a list endpoint, in order.
+
+    Args:
+        session (requests.Session): The shared HTTP session.
+        url (str): URL of the list endpoint.
+        params (dict): Query parameters of the first request (e.g. ``per_page``).
+        max_workers (int): Maximum number of pages fetched at the same time.
+        **kwargs: Extra arguments for ``session.get`` (headers, verify, stream...).
+
+    Yields:
+        The decoded items of each page.
+
+    Raises:
+        requests.HTTPError: If any page is answered with an error status code.
+    """
+
+    stream = kwargs.get("stream", False)
+    response = fetch_page(session, url, params=params, **kwargs)
+    yield from page_items(response, stream)
+
+    last = response.links.get("last", {}).get("url")
+    if last is None or page_number(last) is None:
+        # No numbered last page (none at all, or cursor based): follow the next links sequentially
+        next_url = response.links.get("next", {}).get("url")
+        while next_url:
+            response = fetch_page(session, next_url, **kwargs)
+            yield from page_items(response, stream)
+            next_url = response.links.get("next", {}).get("url")
+        return
+
+    first_page = page_number(response.url) or 1
+    pages = iter(range(first_page + 1, page_number(last) + 1))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = deque()
+
+    def submit(page):
+        # Run in a copy of the caller context, so that its deadline (see deadlines.py) applies
+        return executor.submit(copy_context().run, fetch_page, session, page_url(last, page), **kwargs)
+
+    try:
+        # Keep a bounded window of pages in flight and consume them in order
+        for page in islice(pages, max_workers * 2):
+            pending.append(submit(page))
+        while pending:
+            yield from page_items(pending.popleft().result(), stream)
+            page = next(pages, None)
+            if page is not None:
+                pending.append(submit(page))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        # Release the connections held by pages fetched but never consumed
+        for future in pending:
+            if future.done() and future.exception() is None:
+                future.result().close()
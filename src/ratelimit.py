@@ -0,0 +1,251 @@
+"""
+Rate-limit bookkeeping shared by every request of a test run.
+
+GitHub reports the remaining budget of the caller in the ``X-RateLimit-Remaining`` and
+``X-RateLimit-Reset`` headers, and asks clients hitting a secondary rate limit to wait
+with ``Retry-After``. The ``RateLimiter`` keeps that state per auth identity and tells
+the session how long to wait before sending the next request, so workers are throttled
+instead of failing with 403/429.
+
+With several tokens configured (``token_pool`` in config.json), a ``TokenPool`` spreads
+the reads that do not depend on the authenticated user (repositories, commits, public
+profiles...) over the tokens, sending each of them with the token that has the most
+budget left, so a large run only waits once every token is exhausted. Requests answering
+for the caller (``/user``, GraphQL ``viewer``, ``/rate_limit``) keep their own token.
+
+When tests run in several processes (see runner.py), one ``RateLimiter`` is served by a
+multiprocessing manager and every worker talks to it through a proxy.
+"""
+
+import os
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from multiprocessing.managers import BaseManager
+from urllib.parse import urlsplit
+
+import requests
+
+from cache import auth_identity
+
+
+# Environment variables used by the runner to hand the shared limiter to its workers
+ADDRESS_ENV = "APM_RATE_LIMITER_ADDRESS"
+AUTHKEY_ENV = "APM_RATE_LIMITER_AUTHKEY"
+
+
+# Response headers the limiter needs
+RATE_LIMIT_HEADERS = ("X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "Retry-After")
+
+DEFAULT_BUDGET = 5000  # Requests per hour of a token, until the responses report a limit
+
+# Endpoints answering for the authenticated user, whatever the resource
+USER_BOUND_PATH = re.compile(r"/(user|graphql|rate_limit)(/|$)")
+
+# Statuses of a request its pool token cannot read, to be sent again with its own token
+DENIED_STATUSES = (401, 403, 404)
+
+
+class RateLimitExceeded(requests.RequestException):
+    """
+    Raised instead of sending a request when its token would have to wait longer
+    than allowed for its rate limit to be lifted.
+    """
+
+
+def retry_after_seconds(value):
+    """
+    Converts a ``Retry-After`` header (seconds or HTTP date) into a number of seconds.
+    """
+
+    try:
+        return int(value)
+    except ValueError:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+
+
+def is_rate_limited(response):
+    """
+    Tells whether a response was refused because of a primary or secondary rate limit.
+    """
+
+    if response.status_code not in (403, 429):
+        return False
+    return "Retry-After" in response.headers or response.headers.get("X-RateLimit-Remaining") == "0"
+
+
+class RateLimiter:
+    """
+    Thread-safe tracker of the rate-limit state of every auth identity.
+    """
+
+    def __init__(self):
+        # identity -> {"limit": int, "remaining": int, "reset": epoch, "hold_until": epoch, "chosen": epoch}
+        self._state = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _new_state():
+        return {"limit": None, "remaining": None, "reset": 0, "hold_until": 0, "chosen": 0}
+
+    @staticmethod
+    def _delay(state, now):
+        delay = state["hold_until"] - now
+        if state["remaining"] == 0:
+            delay = max(delay, state["reset"] - now)
+        return max(delay, 0)
+
+    def update(self, identity, headers):
+        """
+        Records the rate-limit headers of a response.
+
+        Args:
+            identity (str): The auth identity the request was sent with.
+            headers (dict): The response headers (only the rate-limit ones are needed).
+        """
+
+        now = time.time()
+        with self._lock:
+            state = self._state.setdefault(identity, self._new_state())
+            if "X-RateLimit-Limit" in headers:
+                state["limit"] = int(headers["X-RateLimit-Limit"])
+            if "X-RateLimit-Remaining" in headers:
+                state["remaining"] = int(headers["X-RateLimit-Remaining"])
+            if "X-RateLimit-Reset" in headers:
+                state["reset"] = int(headers["X-RateLimit-Reset"])
+            if "Retry-After" in headers:
+                state["hold_until"] = max(state["hold_until"], now + retry_after_seconds(headers["Retry-After"]))
+
+    def delay(self, identity):
+        """
+        Returns the number of seconds to wait before sending a request for an identity.
+
+        A request is held back while a ``Retry-After`` is pending, or when the budget
+        is exhausted and the reset time has not been reached yet.
+        """
+
+        now = time.time()
+        with self._lock:
+            state = self._state.get(identity)
+            return 0 if state is None else self._delay(state, now)
+
+    def choose(self, identities):
+        """
+        Returns the identity with the most headroom: the one that can send a request the
+        soonest, then the one with the most budget left (the limit once its reset time is
+        past, the largest limit of the others while unknown). Ties go to the least recently chosen one,
+        so tokens with no reported budget yet are used in turn.
+
+        Args:
+            identities (list): The candidate identities.
+
+        Returns:
+            str: The chosen identity.
+        """
+
+        now = time.time()
+        with self._lock:
+            states = {identity: self._state.get(identity) or self._new_state() for identity in identities}
+            # Tokens never used yet are assumed to have the largest limit seen, so they are tried
+            limit = max((state["limit"] for state in states.values() if state["limit"]), default=DEFAULT_BUDGET)
+
+            def headroom(identity):
+                state = states[identity]
+                budget = state["remaining"]
+                if budget is None or 0 < state["reset"] <= now:
+                    budget = state["limit"] or limit
+                return self._delay(state, now), -budget, state["chosen"]
+
+            identity = min(identities, key=headroom)
+            self._state.setdefault(identity, self._new_state())["chosen"] = now
+            return identity
+
+    def snapshot(self):
+        """
+        Returns a copy of the tracked state, keyed by identity.
+        """
+
+        with self._lock:
+            return {identity: dict(state) for identity, state in self._state.items()}
+
+
+class TokenPool:
+    """
+    Tokens sharing the reads that do not depend on the authenticated user.
+
+    Only requests already sent with one of the tokens are routed, so anonymous requests
+    and the ones checking other tokens (invalid, forbidden, virtual users...) are left
+    alone. Every token should be able to read the resources of the routed requests; when
+    one cannot (e.g. a private repository), it is answered with a 401/403/404 and the
+    request is sent again with its own token, as are the next requests to that path.
+
+    Args:
+        tokens (list): The tokens, ``github_token`` first.
+        limiter (RateLimiter): Rate-limit state of the tokens (possibly shared by the
+            workers of runner.py).
+    """
+
+    def __init__(self, tokens, limiter):
+        self.tokens = list(dict.fromkeys(token for token in tokens if token))
+        self.limiter = limiter
+        self._own_token_paths = set()  # Paths not readable with every token
+
+    def routes(self, request):
+        """
+        Tells whether a prepared request can be sent with any token of the pool.
+        """
+
+        token = request.headers.get("Authorization", "").partition(" ")[2]
+        path = urlsplit(request.url).path
+        return (request.method in ("GET", "HEAD") and token in self.tokens
+                and not USER_BOUND_PATH.search(path) and path not in self._own_token_paths)
+
+    def keep_own_token(self, request):
+        """
+        Stops routing the requests to the path of a request that a token of the pool could not read.
+        """
+
+        self._own_token_paths.add(urlsplit(request.url).path)
+
+    def assign(self, request):
+        """
+        Sets the Authorization header of a routed request to the token with the most
+        headroom (see ``RateLimiter.choose``), keeping its scheme.
+        """
+
+        scheme = request.headers["Authorization"].partition(" ")[0]
+        candidates = {auth_identity({"Authorization": f"{scheme} {token}"}): token for token in self.tokens}
+        request.headers["Authorization"] = f"{scheme} {candidates[self.limiter.choose(list(candidates))]}"
+
+
+class RateLimiterManager(BaseManager):
+    """
+    Manager serving one ``RateLimiter`` to several processes.
+    """
+
+
+_shared_limiter = RateLimiter()
+
+
+def _get_shared_limiter():
+    return _shared_limiter
+
+
+RateLimiterManager.register("limiter", callable=_get_shared_limiter)
+
+
+def connect_rate_limiter():
+    """
+    Returns the limiter shared by the runner if this process is one of its workers,
+    or a new in-process ``RateLimiter`` otherwise.
+    """
+
+    address = os.environ.get(ADDRESS_ENV)
+    if not address:
+        return RateLimiter()
+
+    host, port = address.rsplit(":", 1)
+    manager = RateLimiterManager(address=(host, int(port)), authkey=os.environ[AUTHKEY_ENV].encode())
+    manager.connect()
+    return manager.limiter()
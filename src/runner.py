@@ -0,0 +1,164 @@
+"""
+Parallel runner for the task modules.
+
+Runs the tests of task1.py to task7.py in several pytest worker processes instead of
+one ``pytest taskN.py`` after the other:
+
+* read-only tests are spread over the workers,
+* tests marked ``serial`` (they modify the user profile) all run in order on one worker,
+* every worker shares the same rate limiter (see ratelimit.py), so when GitHub reports an
+  exhausted budget or asks to retry later, all the workers are throttled together,
+* the request timings of the workers (see timing.py) are merged into one report.
+
+With ``--check-budget``, the run only starts if the requests of the previous run (counted
+in its timing report) fit in the rate-limit budget left to the tokens (see budget.py).
+
+Usage (from the ``src`` folder):
+
+    python runner.py [-n WORKERS] [--check-budget] [task1.py task2.py ...]
+"""
+
+import argparse
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+
+import budget
+from client import TIMING_REPORT
+from ratelimit import ADDRESS_ENV, AUTHKEY_ENV, RateLimiterManager
+from timing import format_summary, read_records, summarize, write_report
+
+
+TASK_MODULES = [f"task{number}.py" for number in range(1, 8)]
+
+# pytest exit codes: 0 when tests were collected, 5 when the marker expression selected none
+COLLECTION_OK = (0, 5)
+
+
+class CollectionError(Exception):
+    """
+    Raised when pytest cannot collect the tests (missing module, import error...).
+    """
+
+    def __init__(self, returncode, output):
+        super().__init__(f"Test collection failed (pytest exit code {returncode}):\n{output}")
+        self.returncode = returncode
+
+
+def collect(modules, marker_expression):
+    """
+    Collects the node ids of the tests of ``modules`` selected by a marker expression.
+
+    Args:
+        modules (list): The test modules.
+        marker_expression (str): A pytest ``-m`` expression.
+
+    Returns:
+        list: The node ids, in collection order.
+
+    Raises:
+        CollectionError: If pytest fails to collect the modules.
+    """
+
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "--collect-only", "-q", "-m", marker_expression, *modules],
+        capture_output=True, text=True,
+    )
+    if result.returncode not in COLLECTION_OK:
+        raise CollectionError(result.returncode, result.stdout + result.stderr)
+    return [line for line in result.stdout.splitlines() if "::" in line]
+
+
+def split(node_ids, workers):
+    """
+    Spreads node ids over ``workers`` groups, keeping the tests of a module together
+    as much as possible so that each worker reuses its connections and cache.
+    """
+
+    groups = [[] for _ in range(workers)]
+    for index, node_id in enumerate(node_ids):
+        groups[index * workers // len(node_ids)].append(node_id)
+    return [group for group in groups if group]
+
+
+def run(modules, workers, timing_report=TIMING_REPORT):
+    """
+    Runs the tests of ``modules`` on ``workers`` parallel pytest processes.
+
+    Args:
+        modules (list): The test modules.
+        workers (int): Number of worker processes.
+        timing_report (str): JSON file receiving the request timings of every worker,
+            or an empty string.
+
+    Returns:
+        int: The highest exit code of the workers (0 if every test passed).
+    """
+
+    serial_tests = collect(modules, "serial")
+    parallel_tests = collect(modules, "not serial")
+    if not serial_tests and not parallel_tests:
+        print("No tests collected", file=sys.stderr)
+        return 5
+
+    groups = split(parallel_tests, max(workers - 1 if serial_tests else workers, 1)) if parallel_tests else []
+    if serial_tests:
+        groups.append(serial_tests)
+
+    authkey = secrets.token_hex(16)
+    manager = RateLimiterManager(address=("127.0.0.1", 0), authkey=authkey.encode())
+    manager.start()
+    host, port = manager.address
+
+    env = {**os.environ, ADDRESS_ENV: f"{host}:{port}", AUTHKEY_ENV: authkey}
+    with tempfile.TemporaryDirectory() as reports:
+        worker_reports = [os.path.join(reports, f"worker{number}.json") for number in range(len(groups))]
+        try:
+            processes = [
+                subprocess.Popen([sys.executable, "-m", "pytest", "-q", "--timing-report", report, *group],
+                                 env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+                for group, report in zip(groups, worker_reports)
+            ]
+            exit_code = 0
+            for number, (group, process) in enumerate(zip(groups, processes), start=1):
+                output, _ = process.communicate()
+                print(f"===== worker {number}: {len(group)} tests =====")
+                print(output)
+                exit_code = max(exit_code, process.returncode)
+        finally:
+            manager.shutdown()
+
+        records = [record for report in worker_reports if os.path.exists(report) for record in read_records(report)]
+
+    if records:
+        print("===== request timings (all workers) =====")
+        print("\n".join(format_summary(summarize(records))))
+        if timing_report:
+            write_report(timing_report, records)
+            print(f"Timing report written to {timing_report}")
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the task modules in parallel worker processes.")
+    parser.add_argument("-n", "--workers", type=int, default=os.cpu_count() or 2, help="number of worker processes")
+    parser.add_argument("--timing-report", default=TIMING_REPORT, help="JSON file receiving the request timings")
+    parser.add_argument("--check-budget", action="store_true",
+                        help="only run if the requests of the previous timing report fit in the rate-limit budget")
+    parser.add_argument("modules", nargs="*", default=TASK_MODULES, help="test modules to run")
+    args = parser.parse_args()
+
+    if args.check_budget:
+        if not os.path.exists(args.timing_report):
+            parser.error(f"--check-budget needs the timing report of a previous run ({args.timing_report})")
+        if budget.main(budget.planned_requests(args.timing_report)):
+            sys.exit(1)
+
+    try:
+        sys.exit(run(args.modules, args.workers, args.timing_report))
+    except CollectionError as error:
+        print(error, file=sys.stderr)
+        sys.exit(error.returncode)
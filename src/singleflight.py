@@ -0,0 +1,114 @@
+"""
+Coalescing of identical requests in flight.
+
+When tests or workflow steps run concurrently, several of them often send the very same
+request at the same time (``GET /user`` with the same token, the ``/user/repos`` listing
+of several task7 steps...). ``SingleFlight`` lets the first caller of a key (the leader)
+do the work while the other callers of the same key wait for its result, so only one
+request goes over the wire. The key is only kept while the call is in flight: a request
+sent after it completed goes over the wire again (the ETag cache deals with that).
+
+A request that modifies a URL (PATCH...) fences the calls in flight for it with
+``forget``: requests sent after it start a new call instead of joining one that may
+return the body from before the change.
+"""
+
+import threading
+
+from deadlines import DeadlineExceeded
+
+
+def request_key(request, verify=True):
+    """
+    Returns the key of a prepared request: identical keys mean byte-identical requests.
+
+    Args:
+        request (requests.PreparedRequest): The request.
+        verify (bool): Certificate verification of the request, which can change its outcome.
+
+    Returns:
+        tuple: The key.
+    """
+
+    headers = tuple(sorted((name.lower(), value) for name, value in request.headers.items()))
+    return request.method, request.url, headers, request.body, verify
+
+
+class _Call:
+    """
+    A call in flight, and its result once done.
+    """
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Thread-safe registry of the calls in flight, by key.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0  # Calls that waited for the result of another one
+
+    def do(self, key, func, timeout=None):
+        """
+        Calls ``func``, unless a call of the same key is already in flight, in which case
+        its result is waited for instead.
+
+        Args:
+            key (hashable): The key of the call.
+            func (callable): Called without arguments by the leader.
+            timeout (float): Longest wait (s) for the result of the leader, or None.
+
+        Returns:
+            tuple: The result of ``func``, and whether it came from another call.
+
+        Raises:
+            DeadlineExceeded: If the result of the leader is not there within ``timeout``.
+            Exception: The error raised by ``func``, for the leader and every waiter.
+        """
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = func()
+            except BaseException as error:
+                call.error = error
+                raise
+            finally:
+                with self._lock:
+                    if self._calls.get(key) is call:  # Unless forgotten, or already replaced
+                        del self._calls[key]
+                call.done.set()
+            return call.result, False
+
+        if not call.done.wait(timeout):
+            raise DeadlineExceeded(f"No response to an identical request in flight within {timeout:.1f} s")
+        if call.error is not None:
+            raise call.error
+        return call.result, True
+
+    def forget(self, url):
+        """
+        Stops later requests from joining the calls in flight for a URL (any query string),
+        keyed by ``request_key``. Their current waiters still get their result.
+        """
+
+        path = url.split("?", 1)[0]
+        with self._lock:
+            for key in [key for key in self._calls if key[1].split("?", 1)[0] == path]:
+                del self._calls[key]
@@ -0,0 +1,144 @@
+"""
+On-disk snapshots of GET responses, kept between test runs.
+
+The in-memory ``ResponseCache`` (see cache.py) only lives as long as one test session, so
+every run downloads the same users, repositories and commit listings again. With a
+``SnapshotStore`` behind it, the last ``200`` response of every resource (status, headers
+with its ``ETag``/``Last-Modified``, normalized body) is kept in a SQLite database: the next
+run sends conditional requests for them and only downloads the resources that changed,
+since GitHub answers the others with a ``304`` that does not count against the rate limit.
+
+Bodies are normalized before they are stored: they are kept decoded (without their
+``Content-Encoding``), JSON bodies are re-encoded without insignificant whitespace, and
+the result is compressed with zlib.
+
+SQLite handles the locking between the worker processes of runner.py.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import timedelta
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    stored_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_path ON snapshots (path);
+"""
+
+
+def snapshot_key(key):
+    """
+    Returns the text form of a ``cache_key`` tuple, as stored in the database.
+    """
+
+    return " ".join(key)
+
+
+def url_path(url):
+    """
+    Returns a URL without its query string.
+    """
+
+    return url.split("?", 1)[0]
+
+
+def normalized_body(response):
+    """
+    Returns the body of a response as stored: UTF-8 JSON re-encoded compactly (same values,
+    in the same order), or any other body unchanged.
+    """
+
+    encoding = get_encoding_from_headers(response.headers) or "utf-8"
+    if "json" not in response.headers.get("Content-Type", "") or encoding.lower() != "utf-8":
+        return response.content
+    try:
+        document = json.loads(response.content)
+    except ValueError:
+        return response.content
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class SnapshotStore:
+    """
+    SQLite store of GET responses, shared by every run using the same file.
+
+    Args:
+        path (str): The SQLite database file, created if needed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the stored response of a ``cache_key``, or None.
+        """
+
+        with self._lock:
+            row = self._connection.execute("SELECT url, status, headers, body FROM snapshots WHERE key = ?",
+                                           (snapshot_key(key),)).fetchone()
+        if row is None:
+            return None
+
+        url, status, headers, body = row
+        response = requests.Response()
+        response.status_code = status
+        response.reason = "OK"
+        response.url = url
+        response.headers = CaseInsensitiveDict(json.loads(headers))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.elapsed = timedelta(0)
+        response._content = zlib.decompress(body)
+        response._content_consumed = True
+        return response
+
+    def store(self, key, response):
+        """
+        Stores (or replaces) the response of a ``cache_key``.
+        """
+
+        # The body is stored decoded, so it must not be described as compressed any more
+        headers = {name: value for name, value in response.headers.items()
+                   if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")}
+        row = (snapshot_key(key), url_path(key[1]), key[1], response.status_code, json.dumps(headers),
+               zlib.compress(normalized_body(response)), time.time())
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+
+    def invalidate(self, url=None):
+        """
+        Drops the snapshots of a URL (any query string, any identity), or all of them.
+        """
+
+        with self._lock:
+            if url is None:
+                self._connection.execute("DELETE FROM snapshots")
+            else:
+                self._connection.execute("DELETE FROM snapshots WHERE path = ?", (url_path(url),))
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
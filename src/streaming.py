@@ -0,0 +1,114 @@
+"""
+Incremental parsing of JSON list responses.
+
+``response.json()`` needs the whole body in memory before the first item can be
+looked at. For requests sent with ``stream=True``, ``iter_json_items`` decodes the
+items of a top-level JSON array one by one as the body is read off the socket, so
+memory stays flat whatever the page size and a failed check can stop the download
+(closing the response) without reading the rest of the body.
+"""
+
+import codecs
+import json
+
+
+CHUNK_SIZE = 64 * 1024  # Bytes read from the socket at a time
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_items(response, chunk_size=CHUNK_SIZE):
+    """
+    Yields the items of a JSON array response as soon as each one is complete.
+
+    Args:
+        response (requests.Response): A response to a request sent with ``stream=True``
+            (non streamed responses work too, their body is simply already in memory).
+        chunk_size (int): Number of bytes read from the socket at a time.
+
+    Yields:
+        The decoded items of the array.
+
+    Raises:
+        ValueError: If the body is not a JSON array.
+    """
+
+    chunks = response.iter_content(chunk_size=chunk_size)
+    text_decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")()
+    buffer = ""
+    exhausted = False
+
+    def read_more():
+        nonlocal buffer, exhausted
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            buffer += text_decoder.decode(b"", final=True)
+        else:
+            buffer += text_decoder.decode(chunk)
+
+    # Find the opening bracket of the array
+    while not buffer.lstrip(_WHITESPACE) and not exhausted:
+        read_more()
+    buffer = buffer.lstrip(_WHITESPACE)
+    if not buffer.startswith("["):
+        raise ValueError("Response body is not a JSON array")
+    pos = 1
+
+    while True:
+        # Skip whitespace and separators until the next value starts
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE + ",":
+            pos += 1
+        if pos == len(buffer):
+            if exhausted:
+                raise ValueError("Response body ended before the JSON array was closed")
+            read_more()
+            continue
+        if buffer[pos] == "]":
+            # Read the end of the body (trailing whitespace at most), so that the response is complete
+            for _ in chunks:
+                pass
+            return
+
+        try:
+            item, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if exhausted:
+                raise
+            read_more()
+            continue
+
+        if not isinstance(item, (dict, list, str)) and not exhausted and (
+                end == len(buffer) or buffer[end] not in _WHITESPACE + ",]"):
+            # A number cut by the end of the buffer (e.g. "1." of "1.5") continues in the next chunk
+            read_more()
+            continue
+
+        yield item
+        buffer = buffer[end:]
+        pos = 0
+
+
+def validate_items(response, check, chunk_size=CHUNK_SIZE):
+    """
+    Runs ``check`` on every item of a streamed JSON array response.
+
+    The first failing check stops the iteration and closes the response, so the
+    rest of the body is never downloaded.
+
+    Args:
+        response (requests.Response): A response to a request sent with ``stream=True``.
+        check (callable): Called with each item; raises (e.g. AssertionError) on failure.
+        chunk_size (int): Number of bytes read from the socket at a time.
+
+    Returns:
+        int: The number of items checked.
+    """
+
+    count = 0
+    with response:
+        for item in iter_json_items(response, chunk_size):
+            check(item)
+            count += 1
+    return count
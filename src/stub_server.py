@@ -0,0 +1,602 @@
+"""
+Local stand-in for the GitHub REST API endpoints used by the tasks.
+
+Implements, over a generated dataset:
+
+* ``GET /users/{username}`` and ``GET /users/{username}/repos``,
+* ``GET /user`` and ``PATCH /user`` (name, bio, blog...),
+* ``GET /user/repos`` (public and private repositories of the authenticated user),
+* ``GET /repos/{owner}/{repo}/commits`` (with ``since`` and ``until``),
+* ``POST /graphql``, for the two queries of graphql_api.py only,
+* ``GET /rate_limit`` (the budget of the caller, without using any),
+
+with the same semantics as GitHub for what the tasks check: ETag / ``If-None-Match`` (304),
+``Link`` pagination (``per_page``, ``page``), 401 for missing or bad tokens, 403 for a token
+without access, 404 for unknown users and repositories, and ``X-RateLimit-*`` headers
+(304 and ``/rate_limit`` responses do not use any budget). No rate limit is enforced unless ``--rate-limit``
+is given, so the stub can be used for high-volume runs.
+
+To emulate a remote host, ``--latency`` delays every response and ``--padding`` adds a
+filler field of that many bytes to every object of the successful responses (profiles,
+repositories, commits), so the benchmarks (see benchmark.py) can vary both.
+
+By default the dataset matches the expectations of config.json, so the tasks can be run
+against it by pointing ``base_url`` to the server. Usage (from the ``src`` folder):
+
+    python stub_server.py [--port 8000] [--users 10] [--repos-per-user 5] [--commits-per-repo 50]
+                          [--latency 0.05] [--padding 1024]
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+
+MAIN_LOGIN = "jgarciagallardo"
+MAIN_REPOS = ["public_repo", "technical_test_apmc"]
+TOKEN = "stub-token"  # Token of the main user
+FORBIDDEN_TOKEN = "stub-token-forbidden"  # Valid token without access to the user resources
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)  # Date of the newest generated commit
+UNLIMITED = 1000000  # Budget reported for identities without an enforced rate limit
+
+
+def iso_date(date):
+    return date.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+
+class StubData:
+    """
+    Generated dataset served by the stub.
+
+    Users and repositories are kept in memory; commits are computed on demand from
+    their position in the history, so large histories cost no memory.
+
+    Args:
+        users (int): Number of generated users besides the main one.
+        repos_per_user (int): Number of repositories of each generated user.
+        commits_per_repo (int): Number of commits of every repository.
+        extra_repos (int): Generated repositories of the main user, besides ``MAIN_REPOS``.
+    """
+
+    def __init__(self, users=10, repos_per_user=5, commits_per_repo=50, extra_repos=0):
+        self.commits_per_repo = commits_per_repo
+        self.lock = threading.Lock()
+
+        self.users = {}  # login -> profile fields
+        self.repos = {}  # login -> list of repository fields, sorted by name
+        self.tokens = {TOKEN: MAIN_LOGIN, FORBIDDEN_TOKEN: None}
+
+        self.add_user(MAIN_LOGIN, MAIN_REPOS + [f"repo_{index:05d}" for index in range(extra_repos)])
+        for number in range(users):
+            login = f"user_{number:05d}"
+            self.add_user(login, [f"repo_{index:05d}" for index in range(repos_per_user)])
+            self.tokens[f"{TOKEN}-{login}"] = login
+
+    def add_user(self, login, repo_names):
+        user_id = len(self.users) + 1
+        self.users[login] = {
+            "login": login, "id": user_id, "name": login.replace("_", " ").title(), "company": None,
+            "blog": "", "location": None, "email": None, "hireable": None, "bio": None,
+            "twitter_username": None, "created_at": iso_date(EPOCH - timedelta(days=1000 + user_id)),
+            "updated_at": iso_date(EPOCH),
+        }
+        self.repos[login] = [
+            {"name": name, "id": user_id * 100000 + index, "private": index % 3 == 2,
+             "created_at": iso_date(EPOCH - timedelta(days=500 + index)), "updated_at": iso_date(EPOCH)}
+            for index, name in enumerate(sorted(repo_names))
+        ]
+
+    def find_repo(self, owner, name):
+        for repo in self.repos.get(owner, []):
+            if repo["name"] == name:
+                return repo
+        return None
+
+    def update_user(self, login, fields):
+        with self.lock:
+            self.users[login].update(fields)
+            self.users[login]["updated_at"] = iso_date(datetime.now(timezone.utc))
+
+
+def user_summary(base, user):
+    """
+    Simple user object, as embedded in repositories and commits.
+    """
+
+    login = user["login"]
+    url = f"{base}/users/{login}"
+    return {
+        "login": login, "id": user["id"], "node_id": f"U_{user['id']}",
+        "avatar_url": f"{base}/avatars/{login}", "gravatar_id": "", "url": url,
+        "html_url": f"{base}/{login}", "followers_url": f"{url}/followers",
+        "following_url": f"{url}/following{{/other_user}}", "gists_url": f"{url}/gists{{/gist_id}}",
+        "starred_url": f"{url}/starred{{/owner}}{{/repo}}", "subscriptions_url": f"{url}/subscriptions",
+        "organizations_url": f"{url}/orgs", "repos_url": f"{url}/repos", "events_url": f"{url}/events{{/privacy}}",
+        "received_events_url": f"{url}/received_events", "type": "User", "site_admin": False,
+    }
+
+
+def user_profile(base, data, user, private=False):
+    """
+    Full profile, as returned by ``/users/{username}`` (or by ``/user`` if ``private``).
+    """
+
+    repos = data.repos[user["login"]]
+    private_repos = sum(repo["private"] for repo in repos)
+    profile = {
+        **user_summary(base, user),
+        **{key: user[key] for key in ("name", "company", "blog", "location", "email", "hireable", "bio",
+                                      "twitter_username")},
+        "public_repos": len(repos) - private_repos, "public_gists": 0, "followers": 0, "following": 0,
+        "created_at": user["created_at"], "updated_at": user["updated_at"],
+    }
+    if private:
+        profile.update({
+            "private_gists": 0, "total_private_repos": private_repos, "owned_private_repos": private_repos,
+            "disk_usage": 0, "collaborators": 0, "two_factor_authentication": False,
+            "plan": {"name": "free", "space": 976562499, "collaborators": 0, "private_repos": 10000},
+            "notification_email": user["email"],
+        })
+    return profile
+
+
+def repository(base, data, owner, repo, permissions=False):
+    """
+    Repository object, as listed by ``/users/{username}/repos`` (with ``permissions``
+    for ``/user/repos``).
+    """
+
+    name = repo["name"]
+    full_name = f"{owner}/{name}"
+    url = f"{base}/repos/{full_name}"
+    result = {
+        "id": repo["id"], "node_id": f"R_{repo['id']}", "name": name, "full_name": full_name,
+        "private": repo["private"], "owner": user_summary(base, data.users[owner]),
+        "html_url": f"{base}/{full_name}", "description": None, "fork": False, "url": url,
+        "forks_url": f"{url}/forks", "keys_url": f"{url}/keys{{/key_id}}",
+        "collaborators_url": f"{url}/collaborators{{/collaborator}}", "teams_url": f"{url}/teams",
+        "hooks_url": f"{url}/hooks", "issue_events_url": f"{url}/issues/events{{/number}}",
+        "events_url": f"{url}/events", "assignees_url": f"{url}/assignees{{/user}}",
+        "branches_url": f"{url}/branches{{/branch}}", "tags_url": f"{url}/tags",
+        "blobs_url": f"{url}/git/blobs{{/sha}}", "git_tags_url": f"{url}/git/tags{{/sha}}",
+        "git_refs_url": f"{url}/git/refs{{/sha}}", "trees_url": f"{url}/git/trees{{/sha}}",
+        "statuses_url": f"{url}/statuses/{{sha}}", "languages_url": f"{url}/languages",
+        "stargazers_url": f"{url}/stargazers", "contributors_url": f"{url}/contributors",
+        "subscribers_url": f"{url}/subscribers", "subscription_url": f"{url}/subscription",
+        "commits_url": f"{url}/commits{{/sha}}", "git_commits_url": f"{url}/git/commits{{/sha}}",
+        "comments_url": f"{url}/comments{{/number}}", "issue_comment_url": f"{url}/issues/comments{{/number}}",
+        "contents_url": f"{url}/contents/{{+path}}", "compare_url": f"{url}/compare/{{base}}...{{head}}",
+        "merges_url": f"{url}/merges", "archive_url": f"{url}/{{archive_format}}{{/ref}}",
+        "downloads_url": f"{url}/downloads", "issues_url": f"{url}/issues{{/number}}",
+        "pulls_url": f"{url}/pulls{{/number}}", "milestones_url": f"{url}/milestones{{/number}}",
+        "notifications_url": f"{url}/notifications{{?since,all,participating}}",
+        "labels_url": f"{url}/labels{{/name}}", "releases_url": f"{url}/releases{{/id}}",
+        "deployments_url": f"{url}/deployments", "created_at": repo["created_at"],
+        "updated_at": repo["updated_at"], "pushed_at": repo["updated_at"], "git_url": f"git://stub/{full_name}.git",
+        "ssh_url": f"git@stub:{full_name}.git", "clone_url": f"{base}/{full_name}.git",
+        "svn_url": f"{base}/{full_name}", "homepage": None, "size": 1, "stargazers_count": 0,
+        "watchers_count": 0, "language": "Python", "has_issues": True, "has_projects": True,
+        "has_downloads": True, "has_wiki": True, "has_pages": False, "has_discussions": False,
+        "forks_count": 0, "mirror_url": None, "archived": False, "disabled": False, "open_issues_count": 0,
+        "license": None, "allow_forking": True, "is_template": False, "web_commit_signoff_required": False,
+        "topics": [], "visibility": "private" if repo["private"] else "public", "forks": 0,
+        "open_issues": 0, "watchers": 0, "default_branch": "main",
+    }
+    if permissions:
+        result["permissions"] = {"admin": True, "maintain": True, "push": True, "triage": True, "pull": True}
+    return result
+
+
+def commit(base, data, owner, repo, index):
+    """
+    Commit number ``index`` of a repository history (0 is the newest one).
+    """
+
+    full_name = f"{owner}/{repo['name']}"
+    sha = hashlib.sha1(f"{full_name}:{index}".encode()).hexdigest()
+    parent = hashlib.sha1(f"{full_name}:{index + 1}".encode()).hexdigest()
+    url = f"{base}/repos/{full_name}/commits/{sha}"
+    user = data.users[owner]
+    signature = {"name": user["name"], "email": f"{owner}@users.noreply.stub",
+                 "date": iso_date(EPOCH - timedelta(hours=index))}
+    return {
+        "sha": sha, "node_id": f"C_{sha[:12]}",
+        "commit": {
+            "author": signature, "committer": signature, "message": f"Commit {index} of {repo['name']}",
+            "tree": {"sha": sha[::-1], "url": f"{base}/repos/{full_name}/git/trees/{sha[::-1]}"},
+            "url": f"{base}/repos/{full_name}/git/commits/{sha}", "comment_count": 0,
+            "verification": {"verified": False, "reason": "unsigned", "signature": None, "payload": None},
+        },
+        "url": url, "html_url": f"{base}/{full_name}/commit/{sha}", "comments_url": f"{url}/comments",
+        "author": user_summary(base, user), "committer": user_summary(base, user),
+        "parents": ([{"sha": parent, "url": f"{base}/repos/{full_name}/commits/{parent}",
+                      "html_url": f"{base}/{full_name}/commit/{parent}"}]
+                    if index + 1 < data.commits_per_repo else []),
+    }
+
+
+class RateLimits:
+    """
+    Per token request budget, reset every hour.
+
+    Only requests with a valid token are ever refused (403) once their budget is used
+    up; anonymous requests and bad tokens are counted but never throttled, so that
+    the 401/404 checks of the tasks keep their status codes.
+
+    Args:
+        limit (int): Requests per hour and token, or 0 for no limit.
+    """
+
+    def __init__(self, limit=0):
+        self.limit = limit
+        self.used = {}  # identity -> (window reset epoch, used requests)
+        self.lock = threading.Lock()
+
+    def consume(self, identity, enforced, count=True):
+        """
+        Uses one request of an identity budget (if ``count``).
+
+        Args:
+            identity (str): The token, or the client address for anonymous requests.
+            enforced (bool): Whether the request can be refused when the budget is used up.
+            count (bool): Whether the request uses budget (304 responses do not).
+
+        Returns:
+            tuple: The rate-limit headers, and False if the request must be refused.
+        """
+
+        now = int(time.time())
+        limited = enforced and self.limit > 0
+        limit = self.limit if limited else UNLIMITED
+        allowed = True
+        with self.lock:
+            reset, used = self.used.get(identity, (now + 3600, 0))
+            if reset <= now:
+                reset, used = now + 3600, 0
+            if count and limited and used >= limit:
+                allowed = False
+            elif count:
+                used += 1
+            self.used[identity] = (reset, used)
+        # Unthrottled identities never report an exhausted budget
+        remaining = limit - used if limited else max(limit - used, 1)
+        headers = {
+            "X-RateLimit-Limit": str(limit), "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(reset), "X-RateLimit-Used": str(used),
+        }
+        return headers, allowed
+
+
+def repository_node(login, repo):
+    """
+    Repository node of the GraphQL API.
+    """
+
+    return {"databaseId": repo["id"], "name": repo["name"], "nameWithOwner": f"{login}/{repo['name']}",
+            "isPrivate": repo["private"], "owner": {"login": login}}
+
+
+def commit_node(base, data, owner, repo, index):
+    """
+    Commit node of the GraphQL API, for the same commit as ``commit``.
+    """
+
+    rest = commit(base, data, owner, repo, index)
+    user = {"login": owner}
+    return {"oid": rest["sha"], "message": rest["commit"]["message"],
+            "author": {**rest["commit"]["author"], "user": user},
+            "committer": {**rest["commit"]["committer"], "user": user}}
+
+
+def pad(payload, size):
+    """
+    Returns a payload with a filler field of ``size`` bytes in every object (or the object itself).
+    """
+
+    if isinstance(payload, list):
+        return [pad(item, size) for item in payload]
+    if isinstance(payload, dict):
+        return {**payload, "padding": "x" * size}
+    return payload
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Request handler of the stub; ``server.data`` and ``server.limits`` hold its state, and
+    ``server.latency`` and ``server.padding`` shape its responses.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately: without TCP_NODELAY, every response on a
+    # kept-alive connection waits for the delayed ACK of the client (~40 ms)
+    disable_nagle_algorithm = True
+    routes = [
+        ("GET", re.compile(r"^/users/([^/]+)$"), "get_user_profile"),
+        ("GET", re.compile(r"^/users/([^/]+)/repos$"), "get_user_repos"),
+        ("GET", re.compile(r"^/user$"), "get_authenticated_user"),
+        ("PATCH", re.compile(r"^/user$"), "patch_authenticated_user"),
+        ("GET", re.compile(r"^/user/repos$"), "get_authenticated_repos"),
+        ("GET", re.compile(r"^/repos/([^/]+)/([^/]+)/commits$"), "get_commits"),
+        ("POST", re.compile(r"^/graphql$"), "post_graphql"),
+        ("GET", re.compile(r"^/rate_limit$"), "get_rate_limit"),
+    ]
+
+    def log_message(self, format, *args):
+        pass  # Keep the console quiet under load
+
+    @property
+    def base(self):
+        return f"http://{self.headers.get('Host', 'localhost')}"
+
+    # Dispatching
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_PATCH(self):
+        self.dispatch("PATCH")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def dispatch(self, method):
+        url = urlparse(self.path)
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        # Always read the body, so that the connection can be reused whatever the response
+        self.body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        authorization = self.headers.get("Authorization", "")
+        token = authorization.split(" ", 1)[1] if " " in authorization else None
+        valid_token = token in self.server.data.tokens
+        self.login = self.server.data.tokens.get(token)
+        self.identity = token if valid_token else self.client_address[0]
+        self.throttled = valid_token
+        if token is not None and not valid_token:
+            return self.send_json(401, {"message": "Bad credentials"})
+
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(url.path)
+            if match and route_method == method:
+                return getattr(self, handler)(*match.groups())
+        self.send_json(404, {"message": "Not Found"})
+
+    # Responses
+
+    def send_json(self, status, payload, links=None, count=True):
+        if status == 200 and self.server.padding:
+            payload = pad(payload, self.server.padding)
+        body = json.dumps(payload).encode()
+        etag = f'W/"{hashlib.sha256(body).hexdigest()}"'
+        not_modified = status == 200 and self.headers.get("If-None-Match") == etag
+
+        # 304 responses do not use any budget
+        headers, allowed = self.server.limits.consume(self.identity, self.throttled,
+                                                      count=count and not not_modified)
+        if not allowed:
+            status, not_modified, links = 403, False, None
+            body = json.dumps({"message": "API rate limit exceeded"}).encode()
+
+        self.send_response(304 if not_modified else status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("ETag", etag)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if links:
+            self.send_header("Link", ", ".join(f'<{url}>; rel="{rel}"' for rel, url in links.items()))
+        if not_modified:
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_page(self, items, total=None):
+        """
+        Sends one page of a list, with the ``Link`` header describing the other pages.
+
+        Args:
+            items (callable): Called with ``(start, stop)`` and returning those items.
+            total (int): Total number of items of the list.
+        """
+
+        per_page = min(max(int(self.query.get("per_page", 30)), 1), 100)
+        page = max(int(self.query.get("page", 1)), 1)
+        last = max((total + per_page - 1) // per_page, 1)
+
+        def page_link(number):
+            return f"{self.base}{urlparse(self.path).path}?{urlencode({**self.query, 'per_page': per_page, 'page': number})}"
+
+        links = {}
+        if page < last:
+            links.update({"next": page_link(page + 1), "last": page_link(last)})
+        if page > 1:
+            links.update({"prev": page_link(page - 1), "first": page_link(1)})
+        start = (page - 1) * per_page
+        self.send_json(200, items(start, min(start + per_page, total)) if start < total else [], links)
+
+    # Endpoints
+
+    def get_user_profile(self, login):
+        user = self.server.data.users.get(login)
+        if user is None:
+            return self.send_json(404, {"message": "Not Found"})
+        self.send_json(200, user_profile(self.base, self.server.data, user))
+
+    def get_user_repos(self, login):
+        data = self.server.data
+        if login not in data.users:
+            return self.send_json(404, {"message": "Not Found"})
+        repos = [repo for repo in data.repos[login] if not repo["private"]]
+        self.send_page(lambda start, stop: [repository(self.base, data, login, repo) for repo in repos[start:stop]],
+                       len(repos))
+
+    def can_access_user(self):
+        """
+        Sends the error response and returns False if the request cannot access ``/user`` resources.
+        """
+
+        if "Authorization" not in self.headers:
+            self.send_json(401, {"message": "Requires authentication"})
+            return False
+        if self.login is None:
+            self.send_json(403, {"message": "Resource not accessible by personal access token"})
+            return False
+        return True
+
+    def get_authenticated_user(self):
+        if self.can_access_user():
+            data = self.server.data
+            self.send_json(200, user_profile(self.base, data, data.users[self.login], private=True))
+
+    def get_rate_limit(self):
+        headers, _ = self.server.limits.consume(self.identity, self.throttled, count=False)
+        core = {name: int(headers[f"X-RateLimit-{name.title()}"]) for name in ("limit", "remaining", "reset", "used")}
+        self.send_json(200, {"resources": {"core": core}, "rate": core}, count=False)
+
+    def patch_authenticated_user(self):
+        if not self.can_access_user():
+            return
+        try:
+            fields = json.loads(self.body or b"{}")
+        except ValueError:
+            return self.send_json(400, {"message": "Problems parsing JSON"})
+        editable = ("name", "email", "blog", "twitter_username", "company", "location", "hireable", "bio")
+        data = self.server.data
+        data.update_user(self.login, {key: value for key, value in fields.items() if key in editable})
+        self.send_json(200, user_profile(self.base, data, data.users[self.login], private=True))
+
+    def get_authenticated_repos(self):
+        if not self.can_access_user():
+            return
+        data = self.server.data
+        repos = data.repos[self.login]
+        self.send_page(lambda start, stop: [repository(self.base, data, self.login, repo, permissions=True)
+                                            for repo in repos[start:stop]], len(repos))
+
+    def get_commits(self, owner, name):
+        data = self.server.data
+        repo = data.find_repo(owner, name)
+        if repo is None or (repo["private"] and self.login != owner):
+            return self.send_json(404, {"message": "Not Found"})
+
+        # Commit i is i hours older than EPOCH: turn since/until into a range of indexes
+        first, stop = 0, data.commits_per_repo
+        if "until" in self.query:
+            hours = (EPOCH - parse_date(self.query["until"])).total_seconds() / 3600
+            first = max(first, int(-(-hours // 1)))
+        if "since" in self.query:
+            hours = (EPOCH - parse_date(self.query["since"])).total_seconds() / 3600
+            stop = min(stop, int(hours // 1) + 1)
+        stop = max(stop, first)
+
+        self.send_page(lambda start, end: [commit(self.base, data, owner, repo, first + index)
+                                           for index in range(start, end)], stop - first)
+
+    def post_graphql(self):
+        """
+        Answers the ``Overview`` and ``RepositoryPage`` queries of graphql_api.py. The query
+        is not parsed: they are told apart by their name, and every field they can select is
+        returned.
+        """
+
+        self.identity = f"{self.identity} graphql"  # GraphQL queries have a budget of their own
+        if not self.can_access_user():
+            return
+        try:
+            request = json.loads(self.body)
+            text, variables = request["query"], request.get("variables") or {}
+        except (ValueError, KeyError, TypeError):
+            return self.send_json(400, {"message": "Problems parsing JSON"})
+        operation = re.search(r"query\s+(\w+)", text)
+        operation = operation.group(1) if operation else None
+        if operation not in ("Overview", "RepositoryPage"):
+            return self.send_json(200, {"errors": [{"message": f"Unknown operation {operation}"}]})
+
+        data = self.server.data
+        repos = data.repos[self.login]
+        per_page = int(re.search(r"repositories\(first:\s*(\d+)", text).group(1))
+        start = int(base64.b64decode(variables["after"])) if operation == "RepositoryPage" else 0
+        stop = min(start + per_page, len(repos))
+        viewer = {"login": self.login, "repositories": {
+            "pageInfo": {"hasNextPage": stop < len(repos), "endCursor": base64.b64encode(str(stop).encode()).decode()},
+            "nodes": [repository_node(self.login, repo) for repo in repos[start:stop]],
+        }}
+        if operation == "Overview":
+            commits = min(int(variables["commits"]), data.commits_per_repo)
+            for alias, selected in (("first", repos[:1]), ("last", repos[-1:])):
+                viewer[alias] = {"nodes": [{
+                    "name": repo["name"],
+                    "defaultBranchRef": {"target": {"history": {"nodes": [
+                        commit_node(self.base, data, self.login, repo, index) for index in range(commits)]}}},
+                } for repo in selected]}
+        self.send_json(200, {"data": {"viewer": viewer}})
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Threaded server of the stub, accepting bursts of new connections.
+    """
+
+    daemon_threads = True
+    request_queue_size = 128  # The default backlog of 5 makes connection bursts wait for SYN retries
+
+
+def make_server(host="127.0.0.1", port=8000, data=None, rate_limit=0, latency=0.0, padding=0):
+    """
+    Creates (without starting it) a threaded stub server.
+
+    Args:
+        host (str): Address to listen on.
+        port (int): Port to listen on, or 0 for any free port.
+        data (StubData): The served dataset (default: the one matching config.json).
+        rate_limit (int): Requests per hour and token, or 0 for no limit.
+        latency (float): Seconds added before every response.
+        padding (int): Bytes of filler added to every object of the successful responses.
+
+    Returns:
+        StubServer: The server; call ``serve_forever`` to start it.
+    """
+
+    server = StubServer((host, port), StubHandler)
+    server.data = data or StubData()
+    server.limits = RateLimits(rate_limit)
+    server.latency = latency
+    server.padding = padding
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local stand-in of the GitHub API used by the tasks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--users", type=int, default=10, help="generated users besides the main one")
+    parser.add_argument("--repos-per-user", type=int, default=5)
+    parser.add_argument("--commits-per-repo", type=int, default=50)
+    parser.add_argument("--extra-repos", type=int, default=0, help="generated repositories of the main user")
+    parser.add_argument("--rate-limit", type=int, default=0,
+                        help="requests per hour per token (GitHub uses 5000), 0 for no limit")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added before every response")
+    parser.add_argument("--padding", type=int, default=0, help="bytes of filler added to every returned object")
+    args = parser.parse_args()
+
+    stub = make_server(args.host, args.port,
+                       StubData(args.users, args.repos_per_user, args.commits_per_repo, args.extra_repos),
+                       args.rate_limit, args.latency, args.padding)
+    print(f"Serving GitHub API stub on http://{args.host}:{args.port} "
+          f"(token: {TOKEN}, forbidden token: {FORBIDDEN_TOKEN})")
+    stub.serve_forever()
@@ -11,27 +11,29 @@ This script tests retrieving a user's public profile information from the GitHub
     * Ensure key public fields are returned.
 """
 
-import requests
 import pytest
-import json
 
+from config import get_config
+from validation import Schema
 
-# Load configuration data from JSON file
-with open('config.json', 'r') as file:
-    config_data = json.load(file)
+
+# Load configuration data (config.json is parsed and validated once for all the modules)
+config = get_config()
 
 # Extract configuration values
-BASE_URL = config_data['general']['base_url']
-endpoint = config_data['task1']['endpoint']
-username = config_data['task1']['username']
-items = config_data['task1']['items']  # List of expected keys in the response data
+BASE_URL = config.general.base_url
+endpoint = config.task1.endpoint
+username = config.task1.username
+items = config.task1.items  # List of expected keys in the response data
+item_schema = Schema(items, exact=True)  # Compiled once for all the tests
 
 
-def get_user(username):
+def get_user(session, username):
     """
     Fetches the public profile information for a given username from the GitHub API.
 
     Args:
+        session (requests.Session): The shared HTTP session.
         username (str): The username to retrieve information for.
 
     Returns:
@@ -39,16 +41,16 @@ def get_user(username):
     """
 
     url = f"{BASE_URL}/{endpoint}/{username}"  # Construct the full URL with username
-    response = requests.get(url, verify=False)  # Make the GET request (ignoring SSL verification)
+    response = session.get(url, verify=False)  # Make the GET request (ignoring SSL verification)
     return response
 
 
-def test_response_200():
+def test_response_200(session):
     """
     Tests if the API returns a 200 status code (Success) for a valid username.
     """
 
-    response = get_user(username)
+    response = get_user(session, username)
 
     assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
 
@@ -56,29 +58,30 @@ def test_response_200():
     assert data["login"] == username, "Username should match the requested user " + username
 
 
-def test_response_404():
+def test_response_404(session):
     """
     Tests if the API returns a 404 status code (Not Found) for a non-existent user.
     """
 
     nonexistent_username = "wrong_user_name_09090909332"
-    response = get_user(nonexistent_username)
+    response = get_user(session, nonexistent_username)
 
     assert response.status_code == 404, f"Expected status code 404 for non-existent user: {nonexistent_username}"
 
 
-def test_response_items():
+def test_response_items(session):
     """
     Tests if the API response contains all the expected key-value pairs (listed in 'items').
     """
 
-    response = get_user(username)
+    response = get_user(session, username)
 
     assert response.status_code == 200,  f"Expected status code 200, but got {response.status_code}"
 
     data = response.json()
 
-    assert set(items) == set(data.keys()), "The returned ietm list  does not match with expected one"
+    errors = item_schema.errors(data)
+    assert not errors, "The returned item list does not match with expected one: " + "; ".join(errors)
 
 
 if __name__ == "__main__":
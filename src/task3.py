@@ -9,71 +9,74 @@ Task 3: List repositories
 """
 
 
-import requests
 import pytest
-import json
 
-# Load configuration settings from a JSON file
-with open('config.json', 'r') as file:
-    config_data = json.load(file)
+from config import get_config
+from streaming import iter_json_items
+from validation import Schema
+
+# Load configuration data (config.json is parsed and validated once for all the modules)
+config = get_config()
 
 # Extract relevant configuration values
-BASE_URL = config_data['general']['base_url']  # Base URL for API requests
-endpoint_1 = config_data['task3']['endpoint_1']  # First endpoint component
-endpoint_2 = config_data['task3']['endpoint_2']  # Second endpoint component
-username = config_data['task3']['username']  # Valid username
-wrong_username = config_data['task3']['wrong_username']  # Invalid username
-items = config_data['task3']['items']  # Expected items in the response
+BASE_URL = config.general.base_url  # Base URL for API requests
+endpoint_1 = config.task3.endpoint_1  # First endpoint component
+endpoint_2 = config.task3.endpoint_2  # Second endpoint component
+username = config.task3.username  # Valid username
+wrong_username = config.task3.wrong_username  # Invalid username
+items = config.task3.items  # Expected items in the response
+item_schema = Schema(items, exact=True)  # Compiled once for all the tests
 
 # Construct the full URL for API requests
 
 
-def get_user_repos(username):
+def get_user_repos(session, username, stream=False):
     """
     Retrieves user repositories from the specified API endpoint.
 
     Args:
+        session (requests.Session): The shared HTTP session.
         username (str): The username.
+        stream (bool): Whether to stream the response body instead of downloading it at once.
 
     Returns:
         requests.Response: The HTTP response object.
     """
 
-    response = requests.get(f"{BASE_URL}/{endpoint_1}/{username}/{endpoint_2}", verify=False)
+    response = session.get(f"{BASE_URL}/{endpoint_1}/{username}/{endpoint_2}", verify=False, stream=stream)
     return response
 
 # Test cases for validating the user endpoint response
 
-def test_response_200():
+def test_response_200(session):
     """
     Tests if the response code is 200 for a valid username.
     """
 
-    response = get_user_repos(username)
+    response = get_user_repos(session, username)
     assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
 
-def test_response_404():
+def test_response_404(session):
     """
     Tests if the response code is 404 for an invalid username.
     """
 
-    response = get_user_repos(wrong_username)
+    response = get_user_repos(session, wrong_username)
     assert response.status_code == 404, f"Expected status code 404, but got {response.status_code}"
 
-def test_response_items():
+def test_response_items(session):
     """
     Tests if the response contains the expected items for a valid username.
     """
 
-    response = get_user_repos(username)
-    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
-
-    # Parse the JSON response
-    data = response.json()
-    data = data[0]  # Assuming the first element contains the relevant data
+    # Only the first repository is needed, so stop reading the body once it is parsed
+    with get_user_repos(session, username, stream=True) as response:
+        assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+        data = next(iter_json_items(response))  # Assuming the first element contains the relevant data
 
     # Check if all expected items are present in the response
-    assert set(items) == set(data.keys()), "The returned item list  does not match with expected one"
+    errors = item_schema.errors(data)
+    assert not errors, "The returned item list does not match with expected one: " + "; ".join(errors)
 
 if __name__ == "__main__":
     pytest.main()
\ No newline at end of file
@@ -9,28 +9,32 @@ Task 4: List repositories for logged user
 ○ Ensure key fields are returned.
 """
 
-import requests
 import pytest
-import json
 
-# Get parameters from the config file
-with open('config.json', 'r') as file:
-    config_data = json.load(file)
+from config import get_config
+from streaming import iter_json_items
+from validation import Schema
 
-BASE_URL = config_data['general']['base_url']
-endpoint = config_data['task4']['endpoint']
-GITHUB_TOKEN = config_data['general']['github_token']
-GITHUB_TOKEN_forbidden = config_data['general']['github_token_forbidden']
-items = config_data['task4']['items']
+# Load configuration data (config.json is parsed and validated once for all the modules)
+config = get_config()
+
+BASE_URL = config.general.base_url
+endpoint = config.task4.endpoint
+GITHUB_TOKEN = config.general.github_token
+GITHUB_TOKEN_forbidden = config.general.github_token_forbidden
+items = config.task4.items
+item_schema = Schema(items, exact=True)  # Compiled once for all the tests
 
 headers = {'Authorization': f'token {GITHUB_TOKEN}'}
 
-def get_user(token):
+def get_user(session, token, stream=False):
     """
     Retrieves user data from the specified endpoint using the provided token.
 
     Args:
+        session (requests.Session): The shared HTTP session.
         token (str): The authentication token to use.
+        stream (bool): Whether to stream the response body instead of downloading it at once.
 
     Returns:
         requests.Response: The HTTP response object.
@@ -39,65 +43,65 @@ def get_user(token):
     headers = {
         "Authorization": f"token {token}"
     }
-    response = requests.get(f"{BASE_URL}/{endpoint}", headers=headers, verify=False)
+    response = session.get(f"{BASE_URL}/{endpoint}", headers=headers, verify=False, stream=stream)
     return response
 
 # Tests for validating the user endpoint
 
-def test_response_200():
+def test_response_200(session):
     """
     Tests if the endpoint returns a 200 OK status code with a valid token.
     """
 
-    response = get_user(GITHUB_TOKEN)
+    response = get_user(session, GITHUB_TOKEN)
 
     assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
 
-def test_response_401():
+def test_response_401(session):
     """
     Tests if the endpoint returns a 401 Unauthorized status code with an invalid token.
     """
 
-    response = get_user("hello")
+    response = get_user(session, "hello")
 
     assert response.status_code == 401, f"Expected status code 401, but got {response.status_code}"
 
-def test_response_304():
+def test_response_304(session):
     """
     Tests if the endpoint returns a 304 Not Modified status code when using an ETag.
     """
 
     # Get the ETag from a preliminary request
-    response = get_user(GITHUB_TOKEN)
+    response = get_user(session, GITHUB_TOKEN)
     etag = response.headers.get("ETag")
 
     # Send a subsequent request with the ETag
-    response = requests.get(f"{BASE_URL}/{endpoint}", verify=False, headers={**headers, "If-None-Match": etag})
+    response = session.get(f"{BASE_URL}/{endpoint}", verify=False, headers={**headers, "If-None-Match": etag})
 
     assert response.status_code == 304, f"Expected status code 304, but got {response.status_code}"
 
-def test_response_403():
+def test_response_403(session):
     """
     Tests if the endpoint returns a 403 Forbidden status code when using a forbidden token.
     """
 
-    response = requests.get(f"{BASE_URL}/{endpoint}", verify=False, headers={'Authorization': f'token {GITHUB_TOKEN_forbidden}'})
+    response = session.get(f"{BASE_URL}/{endpoint}", verify=False, headers={'Authorization': f'token {GITHUB_TOKEN_forbidden}'})
 
     assert response.status_code == 403, f"Expected status code 403, but got {response.status_code}"
 
-def test_response_items():
+def test_response_items(session):
     """
     Tests if the endpoint returns the expected items in the response data.
     """
 
-    response = get_user(GITHUB_TOKEN)
-
-    # Verify the status code and extract the data
-    assert response.status_code == 200
-    data = response.json()[0]
+    # Verify the status code and extract the first repository, without reading the rest of the body
+    with get_user(session, GITHUB_TOKEN, stream=True) as response:
+        assert response.status_code == 200
+        data = next(iter_json_items(response))
 
     # Check if all expected items are present in the data
-    assert set(items) == set(data.keys()), "The returned ietm list  does not match with expected one"
+    errors = item_schema.errors(data)
+    assert not errors, "The returned item list does not match with expected one: " + "; ".join(errors)
 
 if __name__ == "__main__":
     pytest.main()
\ No newline at end of file
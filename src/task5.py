@@ -10,26 +10,28 @@ Task 5: List Commits of a repository
 date.
 """
 
-import requests
 import pytest
-import json
 
-# Get parameters from config file
-with open('config.json', 'r') as file:
-    config_data = json.load(file)
+from config import get_config
+from models import Commit
+from pagination import paginate
 
-BASE_URL = config_data['general']['base_url']
-endpoint_1 = config_data['task5']['endpoint_1']
-endpoint_2 = config_data['task5']['endpoint_2']
-owner = config_data['task5']['owner']
-repo = config_data['task5']['repo']
+# Load configuration data (config.json is parsed and validated once for all the modules)
+config = get_config()
+
+BASE_URL = config.general.base_url
+endpoint_1 = config.task5.endpoint_1
+endpoint_2 = config.task5.endpoint_2
+owner = config.task5.owner
+repo = config.task5.repo
 
 # Function to retrieve repository data
-def get_repo(owner, repo):
+def get_repo(session, owner, repo):
     """
     Retrieves repository data from the specified endpoint.
 
     Args:
+        session (requests.Session): The shared HTTP session.
         owner (str): The owner of the repository.
         repo (str): The name of the repository.
 
@@ -37,51 +39,51 @@ def get_repo(owner, repo):
         requests.Response: The HTTP response object.
     """
 
-    response = requests.get(f"{BASE_URL}/{endpoint_1}/{owner}/{repo}/{endpoint_2}", verify=False)
+    response = session.get(f"{BASE_URL}/{endpoint_1}/{owner}/{repo}/{endpoint_2}", verify=False)
     return response
 
 # Test cases for different HTTP status codes
-def test_response_200():
+def test_response_200(session):
     """
     Tests if the endpoint returns a 200 OK status code for a valid repository.
     """
 
-    response = get_repo(owner, repo)
+    response = get_repo(session, owner, repo)
     assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
 
-def test_response_404_bad_owner():
+def test_response_404_bad_owner(session):
     """
     Tests if the endpoint returns a 404 Not Found status code for an invalid owner.
     """
 
-    response = get_repo("Manolito_023412342134", repo)
+    response = get_repo(session, "Manolito_023412342134", repo)
     assert response.status_code == 404, f"Expected status code 404, but got {response.status_code}"
 
-def test_response_404_bad_repo():
+def test_response_404_bad_repo(session):
     """
     Tests if the endpoint returns a 400 Bad Request status code for an invalid repository.
     """
 
-    response = get_repo(owner, "repo")
+    response = get_repo(session, owner, "repo")
     assert response.status_code == 404, f"Expected status code 400, but got {response.status_code}"
 
 # Test cases for pagination
-def test_pagination_no_pagination():
+def test_pagination_no_pagination(session):
     """
     Tests if the endpoint returns results without pagination.
     """
 
-    response = requests.get(f"{BASE_URL}/{endpoint_1}/{owner}/{repo}/{endpoint_2}", verify=False)
+    response = session.get(f"{BASE_URL}/{endpoint_1}/{owner}/{repo}/{endpoint_2}", verify=False)
     assert response.status_code == 200
     assert "pagination" not in response.json()
 
-def test_pagination():
+def test_pagination(session):
     """
     Tests if the endpoint returns results with pagination.
     """
 
     params = {'per_page': 2}
-    response = requests.get(f"{BASE_URL}/{endpoint_1}/{owner}/{repo}/{endpoint_2}", params=params, verify=False)
+    response = session.get(f"{BASE_URL}/{endpoint_1}/{owner}/{repo}/{endpoint_2}", params=params, verify=False)
 
     # Validate status code
     assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
@@ -93,5 +95,20 @@ def test_pagination():
     # Check for 'Link' header for pagination
     assert 'Link' in response.headers, "Missing 'Link' header for pagination"
 
+def test_pagination_all_commits(session):
+    """
+    Tests if walking every page lists all the commits of the repository.
+    """
+
+    url = f"{BASE_URL}/{endpoint_1}/{owner}/{repo}/{endpoint_2}"
+
+    # Walk the history with small pages and with the biggest page size allowed, keeping compact commits
+    paged_commits = list(Commit.decode(paginate(session, url, params={'per_page': 2}, verify=False)))
+    all_commits = list(Commit.decode(paginate(session, url, params={'per_page': 100}, verify=False)))
+
+    assert len(paged_commits) == len({commit.sha for commit in paged_commits}), \
+        "Pagination returned the same commit more than once"
+    assert paged_commits == all_commits, "Paginated commit list does not match the full commit list"
+
 if __name__ == "__main__":
     pytest.main()
\ No newline at end of file
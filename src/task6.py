@@ -11,33 +11,33 @@ Expected Outcome:
 error status code
 """
 
-import requests
 import pytest
-import json
 
-# Load configuration settings from a JSON file
-with open('config.json', 'r') as file:
-    config_data = json.load(file)
+from config import get_config
+
+# Load configuration data (config.json is parsed and validated once for all the modules)
+config = get_config()
 
 # Extract necessary configuration values
-BASE_URL = config_data['general']['base_url']
-endpoint = config_data["task6"]["endpoint"]
-GITHUB_TOKEN = config_data['general']['github_token']
+BASE_URL = config.general.base_url
+endpoint = config.task6.endpoint
+GITHUB_TOKEN = config.general.github_token
 
-user_new_name = config_data["task6"]["user_new_name"]
-user_new_bio = config_data["task6"]["user_new_bio"]
-user_new_blog = config_data["task6"]["user_new_blog"]
+user_new_name = config.task6.user_new_name
+user_new_bio = config.task6.user_new_bio
+user_new_blog = config.task6.user_new_blog
 
 
 # Set up headers for API requests
 headers = {"Authorization": f"token {GITHUB_TOKEN}", "Accept": "application/vnd.github.v3+json"}
 
 # Function to retrieve user data from the GitHub API
-def get_user(token):
+def get_user(session, token):
     """
     Retrieves user data from the GitHub API using the provided token.
 
     Args:
+        session (requests.Session): The shared HTTP session.
         token (str): The GitHub access token.
 
     Returns:
@@ -48,48 +48,49 @@ def get_user(token):
         "Authorization": f"token {token}",
         "Accept": "application/vnd.github.v3+json"
     }
-    response = requests.get(f"{BASE_URL}/{endpoint}", headers=headers, verify=False)
+    response = session.get(f"{BASE_URL}/{endpoint}", headers=headers, verify=False)
     return response
 
 # Test cases for different HTTP status codes
 
-def test_response_200():
+def test_response_200(session):
     """Tests if the API returns a 200 status code."""
 
-    response = get_user(GITHUB_TOKEN)
+    response = get_user(session, GITHUB_TOKEN)
 
     assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
 
-def test_response_401():
+def test_response_401(session):
     """Tests if the API returns a 401 status code for an unauthorized request."""
 
-    response = get_user("hello")  # Invalid token
+    response = get_user(session, "hello")  # Invalid token
 
     assert response.status_code == 401, f"Expected status code 401, but got {response.status_code}"
 
-def test_response_304():
+def test_response_304(session):
     """Tests if the API returns a 304 status code for a not modified response."""
 
     # Get the initial ETag
-    response = get_user(GITHUB_TOKEN)
+    response = get_user(session, GITHUB_TOKEN)
     etag = response.headers.get("ETag")
 
     # Send a request with the ETag
-    response = requests.get(f"{BASE_URL}/{endpoint}", verify=False, headers={**headers, "If-None-Match": etag})
+    response = session.get(f"{BASE_URL}/{endpoint}", verify=False, headers={**headers, "If-None-Match": etag})
 
     assert response.status_code == 304, f"Expected status code 304, but got {response.status_code}"
 
-def test_response_403():
+def test_response_403(session):
     """Tests if the API returns a 403 status code for a forbidden request."""
 
-    response = requests.get(f"{BASE_URL}/{endpoint}", verify=False)
+    response = session.get(f"{BASE_URL}/{endpoint}", verify=False)
     # TODO: Add logic to trigger a 403 response
 
     assert response.status_code == 403, f"Expected status code 403, but got {response.status_code}"
 
 # Test case for updating user metadata
 
-def test_update_user_metadata():
+@pytest.mark.serial
+def test_update_user_metadata(session):
     """Tests if user metadata can be successfully updated."""
 
     # Update user metadata
@@ -98,11 +99,11 @@ def test_update_user_metadata():
         "bio": user_new_bio,
         "blog": user_new_blog
     }
-    response = requests.patch(f"{BASE_URL}/{endpoint}", headers=headers, json=update_data, verify=False)
+    response = session.patch(f"{BASE_URL}/{endpoint}", headers=headers, json=update_data, verify=False)
     assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
 
     # Verify the updates
-    response = requests.get(f"{BASE_URL}/{endpoint}", headers=headers, verify=False)
+    response = session.get(f"{BASE_URL}/{endpoint}", headers=headers, verify=False)
     assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
     user_data = response.json()
     assert user_data["name"] == user_new_name
@@ -111,14 +112,15 @@ def test_update_user_metadata():
 
 # Test case for an unauthorized request
 
-def test_unauthorized_request():
+@pytest.mark.serial
+def test_unauthorized_request(session):
     """Tests if the API returns a 401 status code for an unauthorized request."""
 
     # Attempt to update user metadata without a token
     update_data = {
         "name": "Unauthorized Name"
     }
-    response = requests.patch(f"{BASE_URL}/{endpoint}", json=update_data, verify=False)
+    response = session.patch(f"{BASE_URL}/{endpoint}", json=update_data, verify=False)
     assert response.status_code == 401, f"Expected status code 401, but got {response.status_code}"
 
 # Run the tests
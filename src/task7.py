@@ -30,79 +30,84 @@ through the API endpoints.
 ● Ensure that each request and response in the workflow behaves as expected according
 to the GitHub API documentation.
 """
-import requests
 import pytest
-import json
 
+from config import ConfigError, get_config
+from deadlines import deadline
+from expectations import ExpectationIndex
+from graphql_api import fetch_repositories, graphql_url
+from models import Repo, User
+from pagination import paginate
+from streaming import validate_items
+from validation import Schema
+from watermarks import WatermarkStore, validate_new_commits
+from workflow import Step, Workflow
 
-#get parameters
-with open('config.json', 'r') as file:
-    config_data = json.load(file)
 
-BASE_URL = config_data['general'][ 'base_url']
-GITHUB_TOKEN = config_data['general']['github_token']
+# Load configuration data (config.json is parsed and validated once for all the modules)
+config = get_config()
 
-user_new_name =config_data["task7"]["user_new_name"]
-user_new_bio =config_data["task7"]["user_new_bio"]
-user_new_blog =config_data["task7"]["user_new_blog"]
+BASE_URL = config.general.base_url
+GITHUB_TOKEN = config.general.github_token
 
-step_6_user_name = config_data["task7"]["step_6_user_name"]
-step_6_wrong_repo_name = config_data["task7"]["step_6_wrong_repo_name"]
+user_new_name =config.task7.user_new_name
+user_new_bio =config.task7.user_new_bio
+user_new_blog =config.task7.user_new_blog
 
-step_5_repo_list = config_data["task7"]["step_5_repo_list"]
+step_6_user_name = config.task7.step_6_user_name
+step_6_wrong_repo_name = config.task7.step_6_wrong_repo_name
 
-step_7_items = config_data["task7"]["step_7_item_list"]
-step_7_first_repo_name = config_data["task7"]["step_7_first_repo_name"]
+step_5_repo_list = config.task7.step_5_repo_list
+step_5_fields = ExpectationIndex(step_5_repo_list, key="name").fields  # Kept in the repository models
 
-step_8_items = config_data["task7"]["step_8_item_list"]
-step_8_last_repo_name = config_data["task7"]["step_8_last_repo_name"]
+step_7_items = config.task7.step_7_item_list
+step_7_schema = Schema(step_7_items)
+step_7_first_repo_name = config.task7.step_7_first_repo_name
 
-headers = {"Authorization": f"token {GITHUB_TOKEN}","Accept": "application/vnd.github.v3+json" }
+step_8_items = config.task7.step_8_item_list
+step_8_schema = Schema(step_8_items)
+step_8_last_repo_name = config.task7.step_8_last_repo_name
 
-def key_in_dictionary(input_dict, key):
-    """
-    Checks if a key is in the given dictionary or its sub-dictionaries.
+workflow_timeout = config.task7.workflow_timeout
 
-    Args:
-    input_dict: The dictionary to search.
-    key: key name
+# API of the repository and commit reads of steps 5, 7 and 8: REST, or one batched GraphQL
+# query (see graphql_api.py)
+backend = config.task7.backend
+if backend not in ("rest", "graphql"):
+    raise ConfigError(f"task7.backend must be 'rest' or 'graphql', not '{backend}'")
+GRAPHQL_URL = config.general.graphql_url or graphql_url(BASE_URL)
+commit_fields = list(dict.fromkeys(step_7_items + step_8_items))
 
-    Returns:
-    True key exists, False otherwise
-    """
+# Watermarks of the validated commit histories, kept between live runs only (with the
+# record/replay transport, the requests must not depend on the previous runs)
+watermarks = None
+if config.general.watermark_path and config.general.transport_mode == "live":
+    watermarks = WatermarkStore(config.general.watermark_path)
 
-    return_value = False
-
-    #browse dictionary item
-    for dict_key , value in input_dict.items():
-        if dict_key == key:
-            # key found
-            return_value = True
-        else:
-            # if element is dictionary we search recursive
-            if type(value) is dict:
-                return_value =  return_value or key_in_dictionary( value , key )
+headers = {"Authorization": f"token {GITHUB_TOKEN}","Accept": "application/vnd.github.v3+json" }
 
-    return return_value
+# Every task7 test reads the outcome of the one workflow run of the module, which updates the
+# user profile, so they all run on the serial worker of runner.py
+pytestmark = pytest.mark.serial
 
 
-def test_step1():
+def step_1(session, headers):
     """
     Step 1 : Try to retrieve the user's profile without a Bearer token and validate that access
     is denied (e.g., 401 Unauthorized).
     """
-    response = requests.get(f"{BASE_URL}/user", verify=False)
+    response = session.get(f"{BASE_URL}/user", verify=False)
     assert response.status_code == 401, f"Expected status code 401, but got {response.status_code}"
 
-def test_step2():
+def step_2(session, headers):
     """
     Step 2: Set the Bearer token and retry fetching the profile, this time validating that
     access is granted (e.g., 200 OK).
     """
-    response = requests.get(f"{BASE_URL}/user", headers=headers,verify=False)
+    response = session.get(f"{BASE_URL}/user", headers=headers,verify=False)
     assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
 
-def test_step3():
+def step_3(session, headers, _):
     """
     Step 3: Update a field in the logged-in user’s profile, such as the bio or name.
     """
@@ -112,97 +117,154 @@ def test_step3():
         "bio": user_new_bio,
         "blog": user_new_blog
     }
-    response = requests.patch(f"{BASE_URL}/user", headers=headers, json=update_data, verify=False)
+    response = session.patch(f"{BASE_URL}/user", headers=headers, json=update_data, verify=False)
     assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
 
-def test_step4():
+def step_4(session, headers, _):
     """
     Step 4: Retrieve the profile again and validate that the field has been successfully
     updated.
     """
     # Verify the updates
-    response = requests.get(f"{BASE_URL}/user", headers=headers, verify=False)
+    response = session.get(f"{BASE_URL}/user", headers=headers, verify=False)
     assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
-    user_data = response.json()
-    assert user_data["name"] == user_new_name,  f"Name not updated"
-    assert user_data["bio"] == user_new_bio,  f"Bio not updated"
-    assert user_data["blog"] == user_new_blog,  f"Blog not updated"
+    user = User.from_json(response.json())
+    assert user.name == user_new_name,  f"Name not updated"
+    assert user.bio == user_new_bio,  f"Bio not updated"
+    assert user.blog == user_new_blog,  f"Blog not updated"
 
-def test_step5():
+def list_repos(session, headers):
     """
-    Step 5: Obtain the list of repositories for the logged-in user (both public and private).
-    Ensure that the repositories are listed correctly.
+    Lists the repositories of the logged-in user, shared by steps 5, 7 and 8
+    (paginate fails on any status code other than 200), as compact models keeping the
+    fields checked by step 5 (see models.py). With the GraphQL backend, the first and last
+    repositories also hold their latest commits.
     """
-    response = requests.get(f"{BASE_URL}/user/repos", headers=headers, verify=False)
-    data = response.json()
+    if backend == "graphql":
+        repos = fetch_repositories(session, GRAPHQL_URL, commit_fields, headers=headers, verify=False)
+        return list(Repo.decode(repos, keep=step_5_fields | {"commits"}))
+    return list(Repo.decode(paginate(session, f"{BASE_URL}/user/repos", headers=headers, verify=False, stream=True),
+                            keep=step_5_fields))
 
-    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+def validate_commits(session, headers, repo, schema, watermarks=watermarks):
+    """
+    Lists the commits of a repository, validating each one against ``schema`` as it is read.
+    With a watermark store, only the commits added since the last validated one are listed
+    (see watermarks.py). Commits fetched with the repository listing (GraphQL backend) are
+    validated without any request.
+    """
+    if repo.get("commits") is not None:
+        for commit in repo["commits"]:
+            schema.check(commit)
+        return len(repo["commits"])
 
-    # add response repos to list
-    response_repos =[]
-    for item in data:
-        response_repos.append(item["name"])
+    url = f"{BASE_URL}/repos/{repo.owner}/{repo.name}/commits"
 
-    assert set(response_repos)==set(step_5_repo_list), "The returned repo list  does not match with expected one"
+    if watermarks is not None:
+        return validate_new_commits(session, url, schema.check, watermarks, repo.full_name, headers=headers,
+                                    verify=False)
 
-def test_step6():
+    with session.get(url, headers=headers, verify=False, stream=True) as response:
+        assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
+        return validate_items(response, schema.check)
+
+def step_5(session, headers, repos):
+    """
+    Step 5: Obtain the list of repositories for the logged-in user (both public and private).
+    Ensure that the repositories are listed correctly.
+    """
+    # compare every repo with the expected ones (by name, and by the fields given in config.json)
+    diff = ExpectationIndex(step_5_repo_list, key="name").update(repos).diff()
+
+    assert diff.ok, "The returned repo list  does not match with expected one: " + diff.describe()
+
+def step_6(session, headers):
     """
     Step 6: Attempt to list commits for a non-existent repository and validate that the
     appropriate error is returned (e.g., 404 Not Found).
     """
-    response = requests.get(f"{BASE_URL}/repos/{step_6_user_name}/{step_6_wrong_repo_name}/commits", headers=headers, verify=False)
+    response = session.get(f"{BASE_URL}/repos/{step_6_user_name}/{step_6_wrong_repo_name}/commits", headers=headers, verify=False)
 
     assert response.status_code == 404, f"Expected status code 404, but got {response.status_code}"
 
-def test_step7():
+def step_7(session, headers, repos):
     """
     Step 7: List commits from the first repository of the logged-in user and validate the key
     fields (sha, author, message, date) in the response.
     """
-    response = requests.get(f"{BASE_URL}/user/repos", headers=headers, verify=False)
-    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
-    data = response.json()
+    assert repos, "The logged-in user has no repositories"
+    first_repo = repos[0]
 
     # get first repo name
-    repo_name = data[0]["name"]
+    repo_name = first_repo.name
 
     assert repo_name == step_7_first_repo_name, "Commit returned wrong repo name as first repo"
 
-    #get owner
-    owner = data[0]["owner"]["login"]
+    validate_commits(session, headers, first_repo, step_7_schema)
 
-    #get commits
-    response = requests.get(f"{BASE_URL}/repos/{owner}/{repo_name}/commits", headers=headers, verify=False)
-    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
-    for commit in response.json():
-        for item in step_7_items:
-            assert key_in_dictionary( commit , item), "Item " + item + " not in commit response "
-
-def test_step8():
+def step_8(session, headers, repos):
     """
     Step 8: List commits from the last repository of the logged-in user, again validating key
     fields
     """
-    #get last repo name
-    response = requests.get(f"{BASE_URL}/user/repos", headers=headers, verify=False)
-    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
-    data = response.json()
+    assert repos, "The logged-in user has no repositories"
+    last_repo = repos[-1]
+    repo_name = last_repo.name
 
-    # get first repo name
-    commit_response_length = len(data)
-    repo_name = data[commit_response_length - 1]["name"]
+    assert repo_name == step_8_last_repo_name, "Commit returned wrong repo name as last repo"
 
-    # get owner
-    owner = data[0]["owner"]["login"]
+    validate_commits(session, headers, last_repo, step_8_schema)
 
-    assert repo_name == step_8_last_repo_name, "Commit returned wrong repo name as last repo"
 
-    # get commits
-    response = requests.get(f"{BASE_URL}/repos/{owner}/{repo_name}/commits", headers=headers, verify=False)
-    assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
-    for commit in response.json():
-        for item in step_8_items:
-            assert key_in_dictionary(commit, item), "Item " + item + " not in commit response "
+# Steps 1, 2, 6 and the repository listing do not depend on each other and run in a first
+# wave; steps 5, 7 and 8 then use the listing while step 3 updates the profile, and step 4
+# checks the update. Step 3 waits for step 2 so that the two reads of the profile (before
+# and after the update) always happen in the same order, which the cassettes rely on.
+WORKFLOW = Workflow([
+    Step("step1", step_1),
+    Step("step2", step_2),
+    Step("step3", step_3, requires=["step2"]),
+    Step("step4", step_4, requires=["step3"]),
+    Step("repos", list_repos),
+    Step("step5", step_5, requires=["repos"]),
+    Step("step6", step_6),
+    Step("step7", step_7, requires=["repos"]),
+    Step("step8", step_8, requires=["repos"]),
+])
+
+
+@pytest.fixture(scope="module")
+def workflow(request, session):
+    """
+    Runs the workflow once for the whole module, within its time budget; each test checks
+    the outcome of its step.
+    """
+    with session.running(f"{request.node.nodeid}::workflow", serial=True), deadline(workflow_timeout or None):
+        return WORKFLOW.run(session, headers)
+
+def test_step1(workflow):
+    workflow["step1"].get()
+
+def test_step2(workflow):
+    workflow["step2"].get()
+
+def test_step3(workflow):
+    workflow["step3"].get()
+
+def test_step4(workflow):
+    workflow["step4"].get()
+
+def test_step5(workflow):
+    workflow["step5"].get()
+
+def test_step6(workflow):
+    workflow["step6"].get()
+
+def test_step7(workflow):
+    workflow["step7"].get()
+
+def test_step8(workflow):
+    workflow["step8"].get()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,23 @@
+"""
+Shared fixtures of the unit tests.
+"""
+
+import threading
+
+import pytest
+
+from stub_server import StubData, make_server
+
+
+@pytest.fixture(scope="session")
+def base_url():
+    """
+    Serves a small local stub of the API (see stub_server.py) for the whole test run.
+    """
+
+    server = make_server("127.0.0.1", 0, StubData(users=2, repos_per_user=3, commits_per_repo=5, extra_repos=0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
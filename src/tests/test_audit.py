@@ -0,0 +1,45 @@
+"""
+Unit tests for the bulk audit of users (audit.py), run against a local stub server.
+"""
+
+import json
+
+import audit
+from audit import audit_user, read_usernames
+
+
+def test_audit_user(session, base_url):
+    result = audit_user(session, "user_00000", base_url)
+    assert result["ok"] and result["status"] == 200 and result["repos"] == 2
+
+    missing = audit_user(session, "nobody", base_url)
+    assert not missing["ok"] and missing["status"] == 404 and missing["repos"] == 0
+
+
+def test_audit_reads_lazily_and_keeps_order(session, base_url):
+    read = []
+
+    def usernames():
+        for username in ["user_00001", "nobody", "user_00000"] * 3:
+            read.append(username)
+            yield username
+
+    results = audit.audit(session, usernames(), concurrency=1, base_url=base_url)
+    first = next(results)
+    # Only a bounded window of usernames (twice the concurrency) is read ahead
+    assert first["username"] == "user_00001" and len(read) == 2
+    assert [result["username"] for result in results] == ["nobody", "user_00000"] + ["user_00001", "nobody",
+                                                                                     "user_00000"] * 2
+
+
+def test_main_writes_jsonl_report(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(audit, "audit_user", lambda session, username, _: {"username": username, "ok": True,
+                                                                           "repos": 1})
+    report = tmp_path / "audit.jsonl"
+    assert audit.main(["user_00000\n", "\n", "# comment\n", "user_00001\n"], 2, str(report)) == 0
+    assert [json.loads(line)["username"] for line in report.read_text().splitlines()] == ["user_00000", "user_00001"]
+    assert "2 users and 2 repositories audited" in capsys.readouterr().out
+
+
+def test_read_usernames():
+    assert list(read_usernames([" a \n", "\n", "#b\n", "c"])) == ["a", "c"]
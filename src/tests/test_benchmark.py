@@ -0,0 +1,47 @@
+"""
+Unit tests for the benchmark helpers (benchmark.py) and the shaping of the stub responses.
+"""
+
+import threading
+
+import requests
+
+from benchmark import format_report, measure
+from stub_server import StubData, make_server
+
+
+def test_stub_latency_and_padding():
+    server = make_server("127.0.0.1", 0, StubData(users=1, repos_per_user=2, commits_per_repo=3),
+                         latency=0.05, padding=100)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        response = requests.get(f"{base_url}/users/user_00000/repos")
+        assert response.elapsed.total_seconds() >= 0.05
+        assert all(repo["padding"] == "x" * 100 for repo in response.json())
+        # Error responses are not padded
+        assert "padding" not in requests.get(f"{base_url}/users/nobody").json()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_measure_sync_and_async():
+    calls = []
+
+    def operation(session, mode):
+        calls.append(mode)
+
+    durations, elapsed = measure(operation, None, "sync", 5, 2)
+    assert len(durations) == 5 and durations == sorted(durations) and elapsed >= durations[-1]
+    durations, _ = measure(operation, None, "async", 4, 2)
+    assert len(durations) == 4 and calls == ["sync"] * 5 + ["async"] * 4
+
+
+def test_format_report():
+    result = {"operation": "profile", "configuration": "pooled", "mode": "sync", "runs": 2,
+              "operations_per_second": 10.0, "requests_per_second": 10.0, "p50": 0.1, "p95": 0.2, "p99": 0.2,
+              "peak_memory": 2048}
+    header, line = format_report([result])
+    assert header.split()[:3] == ["operation", "configuration", "mode"]
+    assert line.split() == ["profile", "pooled", "sync", "10.0", "10.0", "100.0", "200.0", "200.0", "2.0"]
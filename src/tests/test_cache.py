@@ -0,0 +1,89 @@
+"""
+Unit tests for the response cache and its ETag revalidation (cache.py), against a local stub server.
+"""
+
+import pytest
+
+from cache import cache_key
+from client import build_session
+from stub_server import TOKEN
+from timing import TimingRecorder
+
+
+HEADERS = {"Authorization": f"token {TOKEN}"}
+OTHER_HEADERS = {"Authorization": f"token {TOKEN}-user_00000"}
+
+
+@pytest.fixture()
+def recorder():
+    return TimingRecorder()
+
+
+def cached_session(recorder, **kwargs):
+    return build_session(snapshot_path="", transport_mode="live", single_flight=False, recorder=recorder, **kwargs)
+
+
+def statuses(recorder):
+    return [record["status"] for record in recorder.records]
+
+
+def test_not_modified_serves_the_cached_body(base_url, recorder):
+    session = cached_session(recorder)
+    try:
+        first = session.get(f"{base_url}/user", headers=HEADERS)
+        second = session.get(f"{base_url}/user", headers=HEADERS)
+    finally:
+        session.close()
+
+    assert statuses(recorder) == [200, 304]
+    assert second.status_code == 200 and second.json() == first.json()
+    # The caller gets a copy: changing it leaves the cached entry untouched
+    second.headers["X-Changed"] = "1"
+    assert "X-Changed" not in session.cache.get(cache_key("GET", f"{base_url}/user", None, HEADERS)).headers
+
+
+def test_least_recently_used_entries_are_evicted(base_url, recorder):
+    session = cached_session(recorder, cache_max_entries=2)
+    urls = [f"{base_url}/users/user_00000", f"{base_url}/users/user_00001", f"{base_url}/users/jgarciagallardo"]
+    try:
+        session.get(urls[0], headers=HEADERS)
+        session.get(urls[1], headers=HEADERS)
+        session.get(urls[0], headers=HEADERS)  # Revalidated: now the most recently used
+        session.get(urls[2], headers=HEADERS)  # Evicts urls[1]
+        assert len(session.cache) == 2
+        session.get(urls[1], headers=HEADERS)
+        session.get(urls[0], headers=HEADERS)
+    finally:
+        session.close()
+
+    assert statuses(recorder) == [200, 200, 304, 200, 200, 200]
+
+
+def test_mutations_invalidate_their_url(base_url, recorder):
+    session = cached_session(recorder)
+    try:
+        bio = session.get(f"{base_url}/user", headers=HEADERS).json()["bio"]
+        session.get(f"{base_url}/users/user_00001", headers=HEADERS)
+        session.patch(f"{base_url}/user", headers=HEADERS, json={"bio": "cache test"})
+        assert session.get(f"{base_url}/user", headers=HEADERS).json()["bio"] == "cache test"
+        session.get(f"{base_url}/users/user_00001", headers=HEADERS)  # Another URL: still cached
+        session.patch(f"{base_url}/user", headers=HEADERS, json={"bio": bio})
+    finally:
+        session.close()
+
+    assert statuses(recorder) == [200, 200, 200, 200, 304, 200]
+
+
+def test_entries_are_kept_per_identity(base_url, recorder):
+    session = cached_session(recorder)
+    try:
+        logins = [session.get(f"{base_url}/user", headers=headers).json()["login"]
+                  for headers in (HEADERS, OTHER_HEADERS, HEADERS, OTHER_HEADERS)]
+    finally:
+        session.close()
+
+    # The second identity is not sent the ETag of the first, and each one gets its own body back
+    assert statuses(recorder) == [200, 200, 304, 304]
+    assert logins == ["jgarciagallardo", "user_00000", "jgarciagallardo", "user_00000"]
+    keys = {cache_key("GET", f"{base_url}/user", None, headers) for headers in (HEADERS, OTHER_HEADERS)}
+    assert len(keys) == 2 and "token" not in str(keys)
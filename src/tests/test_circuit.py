@@ -0,0 +1,111 @@
+"""
+Unit tests for the retry policy and the circuit breaker (circuit.py).
+"""
+
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from circuit import CircuitBreaker, CircuitOpenError, JitteredRetry
+from client import build_session
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """
+    Answers 503 to the first ``failures`` requests of every path, then 200.
+    """
+
+    failures = 2
+    hits = {}
+
+    def handle_one(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        hits = self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        status = 503 if hits <= self.failures else 200
+        self.send_response(status)
+        if status == 503:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    do_GET = do_PATCH = handle_one
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def flaky_url():
+    FlakyHandler.hits = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/user"
+
+
+def test_jittered_backoff_stays_below_exponential_backoff():
+    retry = JitteredRetry(total=5, backoff_factor=1, backoff_max=30).increment("GET", "/").increment("GET", "/")
+    assert all(0 <= retry.get_backoff_time() <= 2 for _ in range(100))
+
+
+def test_idempotent_requests_are_retried(flaky_url):
+    session = build_session(transport_mode="live", cache_enabled=False)
+    assert session.get(f"{flaky_url}/get").status_code == 200
+    assert FlakyHandler.hits["/get"] == 3
+
+
+def test_patch_is_not_retried(flaky_url, session):
+    session.current_test_serial = True
+    assert session.patch(f"{flaky_url}/patch", json={}).status_code == 503
+    assert FlakyHandler.hits["/patch"] == 1
+
+
+def test_breaker_opens_after_consecutive_failures(closed_port_url):
+    session = build_session(max_retries=0, breaker_threshold=2, transport_mode="live")
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError) as error:
+            session.get(closed_port_url)
+        assert not isinstance(error.value, CircuitOpenError)
+    with pytest.raises(CircuitOpenError):
+        session.get(closed_port_url)
+
+
+def test_breaker_half_open(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("circuit.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    breaker.failure("host")
+    breaker.before("host")
+    breaker.failure("host")
+    assert breaker.is_open("host")
+    with pytest.raises(CircuitOpenError):
+        breaker.before("host")
+
+    now[0] += 30
+    breaker.before("host")  # Trial request
+    with pytest.raises(CircuitOpenError):
+        breaker.before("host")  # Only one trial at a time
+    breaker.failure("host")
+    with pytest.raises(CircuitOpenError):
+        breaker.before("host")
+
+    now[0] += 30
+    breaker.before("host")
+    breaker.success("host")
+    assert not breaker.is_open("host")
+    breaker.before("host")
+    assert not breaker.is_open("other")
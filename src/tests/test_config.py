@@ -0,0 +1,86 @@
+"""
+Unit tests for the configuration loader (config.py).
+"""
+
+import json
+import os
+
+import pytest
+
+from config import DEFAULT_PATH, ConfigError, load_config
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    with open(DEFAULT_PATH, encoding="utf-8") as file:
+        data = json.load(file)
+    data["environments"] = {"enterprise": {"general": {"base_url": "https://ghe.example.com/api/v3",
+                                                       "github_token": "enterprise-token"}}}
+
+    def write(changes=None):
+        for section, values in (changes or {}).items():
+            data.setdefault(section, {}).update(values)
+        path = tmp_path / "config.json"
+        path.write_text(json.dumps(data), encoding="utf-8")
+        return str(path)
+
+    return write
+
+
+def test_repository_config_is_valid():
+    config = load_config(DEFAULT_PATH, environ={})
+    assert config.general.base_url == "https://api.github.com"
+    assert config.task7.step_5_repo_list == ["public_repo", "technical_test_apmc"]
+    assert config.general.cassette_dir == os.path.join(os.path.dirname(DEFAULT_PATH), "cassettes")
+
+
+def test_settings_use_slots(config_file):
+    config = load_config(config_file(), environ={})
+    with pytest.raises(AttributeError):
+        config.task1.unknown = 1
+    assert not hasattr(config.general, "__dict__")
+
+
+def test_defaults(config_file):
+    path = config_file()
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+    del data["general"]["pool_size"]
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+    assert load_config(path, environ={}).general.pool_size == 10
+
+
+def test_environment_and_variable_overlays(config_file):
+    environ = {"APM_ENVIRONMENT": "enterprise", "APM_GENERAL__POOL_SIZE": "20",
+               "APM_TASK1__USERNAME": "someone", "APM_RATE_LIMITER_ADDRESS": "127.0.0.1:1"}
+    config = load_config(config_file(), environ=environ)
+    assert config.environment == "enterprise"
+    assert config.general.base_url == "https://ghe.example.com/api/v3"
+    assert config.general.github_token == "enterprise-token"
+    assert config.general.pool_size == 20
+    assert config.task1.username == "someone"
+
+
+def test_errors_are_reported_together(config_file):
+    path = config_file({"general": {"pool_size": "ten", "unknown_key": 1}, "task7": {"step_5_repo_list": [1]}})
+    with pytest.raises(ConfigError) as error:
+        load_config(path, environ={})
+    message = str(error.value)
+    assert "general.pool_size: expected integer, got str" in message
+    assert "general.unknown_key: unknown key" in message
+    assert "task7.step_5_repo_list: expected string|object[]" in message
+
+
+@pytest.mark.parametrize("environ, message", [
+    ({"APM_ENVIRONMENT": "staging"}, "Unknown environment 'staging'"),
+    ({"APM_TASK9__ITEMS": "[]"}, "unknown section"),
+])
+def test_unknown_overlays(config_file, environ, message):
+    with pytest.raises(ConfigError, match=message):
+        load_config(config_file(), environ=environ)
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(ConfigError, match="Cannot load configuration file"):
+        load_config(str(tmp_path / "missing.json"), environ={})
@@ -0,0 +1,119 @@
+"""
+Unit tests for the time budgets of tests and workflows (deadlines.py).
+"""
+
+import contextvars
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from client import build_session
+from deadlines import DeadlineExceeded, check, deadline, remaining, timeout_for
+from pagination import paginate
+from workflow import Step, Workflow
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """
+    Answers the first page of a list at once, with a link to a third page, and every other
+    request after ``delay`` seconds.
+    """
+
+    delay = 1.0
+
+    def do_GET(self):
+        first_page = self.path.endswith("/repos")
+        if not first_page:
+            time.sleep(self.delay)
+        self.send_response(200)
+        if first_page:
+            self.send_header("Link", f'<http://{self.headers["Host"]}/repos?page=3>; rel="last"')
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"[]")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def slow_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_no_deadline_keeps_the_default_timeout():
+    # Out of the deadline that conftest.py gives every test
+    context = contextvars.Context()
+    assert context.run(remaining) is None
+    assert context.run(timeout_for, None, (5, 30)) == ((5, 30), False)
+    assert context.run(timeout_for, 2, (5, 30)) == ((2, 2), False)
+
+
+def test_deadline_cuts_the_timeout():
+    with deadline(10):
+        (connect, read), cut = timeout_for(None, (5, 30))
+    assert connect == 5 and read <= 10 and cut
+    with deadline(60):
+        assert timeout_for((1, 2), (5, 30)) == ((1, 2), False)
+
+
+def test_nested_deadline_only_shortens():
+    with deadline(1):
+        with deadline(100):
+            assert remaining() <= 1
+        with deadline(None):
+            assert remaining() <= 1
+    assert remaining() is None or remaining() > 1
+
+
+def test_passed_deadline_raises():
+    with deadline(0):
+        with pytest.raises(DeadlineExceeded):
+            check()
+        with pytest.raises(DeadlineExceeded):
+            timeout_for(None, (5, 30))
+
+
+def test_request_over_budget_raises_deadline_exceeded(slow_url):
+    session = build_session(pool_size=1, max_retries=0, cache_enabled=False, transport_mode="live")
+    try:
+        start = time.perf_counter()
+        with deadline(0.3), pytest.raises(DeadlineExceeded):
+            session.get(f"{slow_url}/user")
+        assert time.perf_counter() - start < SlowHandler.delay
+        # A timeout set by the caller is not a deadline
+        with pytest.raises((requests.Timeout, requests.ConnectionError)) as error:
+            session.get(f"{slow_url}/user", timeout=0.3)
+        assert not isinstance(error.value, DeadlineExceeded)
+        assert not session.breaker.is_open(slow_url.split("//")[1])
+    finally:
+        session.close()
+
+
+def test_deadline_follows_pagination_threads(slow_url):
+    session = build_session(pool_size=2, max_retries=0, cache_enabled=False, transport_mode="live")
+    try:
+        with deadline(0.3), pytest.raises(DeadlineExceeded):
+            list(paginate(session, f"{slow_url}/repos", max_workers=2))
+        assert list(paginate(session, f"{slow_url}/repos", max_workers=2)) == []
+    finally:
+        session.close()
+
+
+def test_workflow_steps_share_its_deadline():
+    seen = []
+    workflow = Workflow([
+        Step("first", lambda: time.sleep(0.2) or seen.append(remaining())),
+        Step("second", lambda: seen.append("run"), requires=["first"]),
+    ])
+    with deadline(0.1):
+        outcomes = workflow.run()
+    assert outcomes["first"].ok and seen[0] < 0.1
+    assert isinstance(outcomes["second"].error, DeadlineExceeded) and "run" not in seen
@@ -0,0 +1,55 @@
+"""
+Unit tests for the expectation diff (expectations.py).
+"""
+
+import pytest
+
+from expectations import ExpectationIndex
+
+
+def repos(*names, **fields):
+    return ({"name": name, "private": False, **fields.get(name, {})} for name in names)
+
+
+def test_matching_items():
+    diff = ExpectationIndex(["a", "b"]).update(repos("b", "a")).diff()
+    assert diff.ok
+    assert diff.describe() == "no differences"
+
+
+def test_missing_unexpected_and_duplicated():
+    diff = ExpectationIndex(["a", "b", "c"]).update(repos("a", "d", "a")).diff()
+    assert (diff.missing, diff.unexpected, diff.duplicates) == (["b", "c"], ["d"], ["a"])
+    assert diff.describe() == "2 missing: b, c; 1 unexpected: d; 1 duplicated: a"
+
+
+def test_changed_fields():
+    expected = ["a", {"name": "b", "private": True}, {"name": "c", "private": False}]
+    diff = ExpectationIndex(expected).update(repos("a", "b", "c")).diff()
+    assert diff.changed == {"b": {"private": (True, False)}}
+    assert diff.describe() == "1 changed: b.private expected True got False"
+
+
+def test_incremental_over_a_stream():
+    index = ExpectationIndex(f"repo_{number:05d}" for number in range(50000))
+    index.update(repos(*(f"repo_{number:05d}" for number in range(1, 50001))))
+    diff = index.diff()
+    assert diff.missing == ["repo_00000"] and diff.unexpected == ["repo_50000"]
+    assert len(index.seen) == 50000
+
+
+def test_describe_truncates():
+    diff = ExpectationIndex([str(number) for number in range(25)]).diff()
+    assert diff.describe(limit=3) == "25 missing: 0, 1, 2 ... and 22 more"
+
+
+def test_scalar_items_and_custom_key():
+    assert ExpectationIndex(["x"], key="login").update(["x"]).diff().ok
+    assert ExpectationIndex(["x"], key="login").update([{"login": "x"}]).diff().ok
+
+
+def test_invalid_expectations():
+    with pytest.raises(ValueError, match="has no 'name'"):
+        ExpectationIndex([{"private": True}])
+    with pytest.raises(ValueError, match="expected twice"):
+        ExpectationIndex(["a", {"name": "a"}])
@@ -0,0 +1,53 @@
+"""
+Unit tests for the GraphQL backend (graphql_api.py), run against a local stub server.
+"""
+
+import pytest
+import requests
+
+import graphql_api
+from graphql_api import GraphQLError, commit_selection, fetch_repositories, graphql_url, query
+from pagination import paginate
+from stub_server import TOKEN
+from validation import Schema
+
+
+HEADERS = {"Authorization": f"token {TOKEN}-user_00000"}
+FIELDS = ["sha", "author", "message", "date"]
+
+
+def test_commit_selection():
+    assert commit_selection(["sha", "message:string"]) == "oid message"
+    assert commit_selection(["author", "date", "commit.author.date"]) == "oid author { name email date user { login } }"
+    with pytest.raises(ValueError, match="parents"):
+        commit_selection(["parents"])
+
+
+@pytest.mark.parametrize("per_page", [100, 2])
+def test_same_repositories_and_commits_as_rest(session, base_url, monkeypatch, per_page):
+    monkeypatch.setattr(graphql_api, "REPOSITORIES_PER_PAGE", per_page)
+    repos = fetch_repositories(session, graphql_url(base_url), FIELDS, commits=3, headers=HEADERS)
+
+    rest_repos = list(paginate(session, f"{base_url}/user/repos", headers=HEADERS))
+    assert [{key: repo[key] for key in ("id", "name", "full_name", "private")} for repo in repos] == \
+        [{key: repo[key] for key in ("id", "name", "full_name", "private")} for repo in rest_repos]
+    assert all(repo["owner"]["login"] == "user_00000" for repo in repos)
+
+    schema = Schema(FIELDS)
+    for repo in (repos[0], repos[-1]):
+        rest_commits = session.get(f"{base_url}/repos/{repo['full_name']}/commits", params={"per_page": 3},
+                                   headers=HEADERS).json()
+        assert [commit["sha"] for commit in repo["commits"]] == [commit["sha"] for commit in rest_commits]
+        # The stub returns every field a query can select, so only compare the selected ones
+        assert {key: repo["commits"][0]["commit"][key] for key in ("message", "author")} == \
+            {key: rest_commits[0]["commit"][key] for key in ("message", "author")}
+        for commit in repo["commits"]:
+            schema.check(commit)
+    assert all("commits" not in repo for repo in repos[1:-1])
+
+
+def test_errors(session, base_url):
+    with pytest.raises(requests.HTTPError):
+        fetch_repositories(session, graphql_url(base_url), FIELDS)
+    with pytest.raises(GraphQLError, match="Unknown operation"):
+        query(session, graphql_url(base_url), "query Other { viewer { login } }", headers=HEADERS)
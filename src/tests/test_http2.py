@@ -0,0 +1,49 @@
+"""
+Unit tests for the optional HTTP/2 transport (http2.py).
+"""
+
+import importlib.util
+import ssl
+
+import pytest
+
+from client import build_session
+from pagination import paginate
+from stub_server import TOKEN
+
+
+HTTPX_INSTALLED = importlib.util.find_spec("httpx") is not None
+
+
+@pytest.mark.skipif(HTTPX_INSTALLED, reason="httpx is installed")
+def test_http2_without_httpx_is_a_clear_error():
+    with pytest.raises(ImportError, match="httpx"):
+        build_session(cache_enabled=False, transport_mode="live", http2=True)
+
+
+def test_http2_session_keeps_the_session_api(base_url):
+    pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+    session = build_session(pool_size=2, cache_enabled=True, transport_mode="live", http2=True)
+    session.headers["Authorization"] = f"Bearer {TOKEN}"
+    try:
+        url = f"{base_url}/users/user_00000"
+        first = session.get(url)
+        assert first.status_code == 200 and first.json()["login"] == "user_00000"
+        assert "ETag" in first.headers
+        # Revalidated from the session cache with the same response
+        assert session.get(url).json() == first.json()
+
+        repos = list(paginate(session, f"{url}/repos", params={"per_page": 1}, stream=True))
+        assert len(repos) == 2  # The public repositories of the user (the third one is private)
+    finally:
+        session.close()
+
+
+def test_ca_bundle_becomes_an_ssl_context():
+    from requests.certs import where
+
+    from http2 import _ssl_verify
+
+    assert isinstance(_ssl_verify(where()), ssl.SSLContext)
+    assert _ssl_verify(True) is True and _ssl_verify(False) is False
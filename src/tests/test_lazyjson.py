@@ -0,0 +1,76 @@
+"""
+Unit tests for the lazy views of JSON bodies (lazyjson.py).
+"""
+
+import json
+
+import pytest
+
+import lazyjson
+from lazyjson import ArrayView, ObjectView, loads
+from validation import Schema
+
+
+DOCUMENTS = [
+    {"sha": "a1", "commit": {"author": {"name": "José", "date": "2024-01-01T00:00:00Z"}, "message": "[x], {y}"},
+     "parents": [{"sha": "b2"}], "text": "with \"quotes\" and ]", "none": None, "flag": False, "n": -1.5e3},
+    [12345, -0.25, 1e-7, "]", None, True, [], {}, [1, [2, [3]]]],
+    {}, [], "text", 3, None,
+]
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_views_match_json(document):
+    for text in (json.dumps(document), json.dumps(document, ensure_ascii=False, indent=2)):
+        view = loads(text.encode())
+        assert view == document
+        if isinstance(view, (ObjectView, ArrayView)):
+            assert view.load() == document
+
+
+def test_only_the_accessed_parts_are_scanned():
+    # Anything after the first element would not even parse
+    first = loads(b'[{"login": "octocat", "id": 1}, this is not JSON')[0]
+    assert first["login"] == "octocat"
+    with pytest.raises(ValueError):
+        len(loads(b'[{"login": "octocat"}, this is not JSON'))
+
+    profile = loads(b'{"login": "octocat", "bio": not JSON either')
+    assert profile["login"] == "octocat"
+
+
+def test_array_access():
+    view = loads(b' [ 1 , {"x" : [2]} , "three" ] ')
+    assert view[1]["x"][0] == 2 and view[-1] == "three" and view[0:2] == [1, {"x": [2]}]
+    assert len(view) == 3 and "three" in view and "four" not in view
+    with pytest.raises(IndexError):
+        view[3]
+
+
+def test_object_access():
+    view = loads(b'{"a": 1, "b": {"c": null}, "a": 2}')
+    assert view["a"] == 1 and dict(view)["a"] == 1  # The first of duplicate keys wins
+    assert view["b"] == {"c": None} and "b" in view and "z" not in view and view.get("z") is None
+    assert sorted(view) == ["a", "b"]
+    with pytest.raises(KeyError):
+        view["z"]
+
+
+@pytest.mark.parametrize("body", [b"", b"[1, 2", b'{"a": 1', b'{"a" 1}', b"[1 2]", b"{", b"[", b'{1: 2}'])
+def test_invalid_documents(body):
+    with pytest.raises(ValueError):
+        view = loads(body)
+        len(view)
+        list(view)
+
+
+def test_load_without_orjson(monkeypatch):
+    monkeypatch.setattr(lazyjson, "orjson", None)
+    assert loads(b'{"a": [1, {"b": 2}]}')["a"].load() == [1, {"b": 2}]
+
+
+def test_validation_of_views():
+    schema = Schema(["login:string", "plan.name:string", "repos:array", "plan:object"], exact=True)
+    assert not schema.errors(loads(b'{"login": "a", "plan": {"name": "free"}, "repos": []}'))
+    assert schema.errors(loads(b'{"login": 1, "plan": {}, "repos": [], "extra": 0}')) == [
+        "Field 'login' should be string, got int", "Missing field 'plan.name'", "Unexpected field 'extra'"]
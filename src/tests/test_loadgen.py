@@ -0,0 +1,57 @@
+"""
+Unit tests for the load generator (loadgen.py), run against a local stub server.
+"""
+
+import asyncio
+
+import task7
+from loadgen import LOAD_WORKFLOW, format_report, generate, load_session, summarize
+from stub_server import TOKEN
+from timing import TimingRecorder
+from workflow import DependencyFailed, Outcome
+
+
+def run_outcomes(failed=False):
+    outcomes = {name: Outcome(duration=0.1) for name in LOAD_WORKFLOW.steps}
+    if failed:
+        outcomes["read_profile"] = Outcome(error=AssertionError("401"), duration=0.05)
+        outcomes["update_profile"] = Outcome(error=DependencyFailed("read_profile failed"))
+    return outcomes
+
+
+def test_summarize():
+    results = [(run_outcomes(), 0.5), (run_outcomes(), 0.6), (run_outcomes(failed=True), 0.2)]
+    records = [{"status": 200}] * 10 + [{"status": 401}] * 2
+    summary = summarize(results, records, elapsed=2.0)
+
+    assert (summary["runs"], summary["failed_runs"]) == (3, 1)
+    assert summary["runs_per_second"] == 1.5 and summary["requests_per_second"] == 6.0
+    assert summary["status_codes"] == {"200": 10, "401": 2}
+    assert summary["steps"]["read_profile"] == {"runs": 3, "failed": 1, "errors": {"AssertionError": 1},
+                                                "error_rate": 1 / 3, "p50": 0.1, "p95": 0.1, "p99": 0.1}
+    assert summary["steps"]["update_profile"]["errors"] == {"DependencyFailed": 1}
+    assert len(format_report(summary)) == 3 + len(LOAD_WORKFLOW.steps)
+
+
+def test_summarize_without_successful_runs():
+    summary = summarize([(run_outcomes(failed=True), 0.1)], [], elapsed=1.0)
+    assert summary["steps"]["update_profile"]["p50"] is None
+    assert "-" in format_report(summary)[4]
+
+
+def test_generate_sends_every_request(base_url, monkeypatch):
+    monkeypatch.setattr(task7, "BASE_URL", base_url)
+    recorder = TimingRecorder()
+    session = load_session(concurrency=2, recorder=recorder)
+    tokens = [f"{TOKEN}-user_00000", f"{TOKEN}-user_00001"]
+    try:
+        results = asyncio.run(generate(session, tokens, rate=50, runs=4, concurrency=2))
+    finally:
+        session.close()
+
+    assert len(results) == 4
+    assert all(outcome.ok for outcomes, _ in results for outcome in outcomes.values())
+    # Profile read, update and check, repository listing and two commit listings per run,
+    # none of them answered from the cache or shared with another run
+    assert len(recorder.records) == 4 * 6
+    assert all(record["status"] == 200 for record in recorder.records)
@@ -0,0 +1,73 @@
+"""
+Unit tests for the compact models (models.py).
+"""
+
+import sys
+
+import pytest
+
+from expectations import ExpectationIndex
+from models import Commit, Repo, User, lookup
+from stub_server import StubData, commit, repository, user_profile
+
+
+BASE = "http://stub"
+
+
+@pytest.fixture(scope="module")
+def data():
+    return StubData(users=1, repos_per_user=3, commits_per_repo=2)
+
+
+def test_lookup():
+    assert lookup({"owner": {"login": "me"}}, "owner.login") == "me"
+    assert lookup({"owner": None}, "owner.login") is None
+    assert lookup({}, "name") is None
+
+
+def test_models_keep_only_their_fields(data):
+    user = User.from_json(user_profile(BASE, data, data.users["user_00000"]))
+    assert (user.login, user.name) == ("user_00000", "User 00000")
+    assert set(user) == {"login", "id", "name", "bio", "blog"}
+
+    repo_json = repository(BASE, data, "user_00000", data.repos["user_00000"][0])
+    repo = Repo.from_json(repo_json)
+    assert repo.owner == "user_00000" and repo["full_name"] == repo_json["full_name"]
+    assert "html_url" not in repo and repo.extra is None
+    with pytest.raises(AttributeError):
+        repo.html_url = "dropped"
+
+    history = commit(BASE, data, "user_00000", data.repos["user_00000"][0], 0)
+    compact = Commit.from_json(history)
+    assert compact.sha == history["sha"] and compact.date == history["commit"]["author"]["date"]
+
+
+def test_models_are_mappings(data):
+    repo = Repo.from_json(repository(BASE, data, "user_00000", data.repos["user_00000"][0]), keep=["name", "fork"])
+    assert repo.get("fork") is False and repo.get("missing") is None
+    assert dict(repo) == {"id": repo.id, "name": repo.name, "full_name": repo.full_name, "owner": repo.owner,
+                          "private": repo.private, "fork": False}
+    assert Repo(1, "a", "me/a", "me", False) == Repo(1, "a", "me/a", "me", False)
+    assert repr(Repo(1, "a", "me/a", "me", False)).startswith("Repo(id=1, name='a'")
+    with pytest.raises(TypeError):
+        Repo(1, "a")
+
+
+def test_expectations_compare_models(data):
+    repos = data.repos["user_00000"]
+    index = ExpectationIndex([{"name": repos[0]["name"], "fork": True}, repos[1]["name"], repos[2]["name"]])
+    assert index.fields == {"name", "fork"}
+    models = Repo.decode((repository(BASE, data, "user_00000", repo) for repo in repos), keep=index.fields)
+    diff = index.update(models).diff()
+    assert diff.changed == {repos[0]["name"]: {"fork": (True, False)}} and not diff.missing
+
+
+def test_models_are_smaller_than_dicts(data):
+    repo_json = repository(BASE, data, "user_00000", data.repos["user_00000"][0])
+
+    def size(obj):
+        if isinstance(obj, dict):
+            return sys.getsizeof(obj) + sum(size(key) + size(value) for key, value in obj.items())
+        return sys.getsizeof(obj)
+
+    assert sys.getsizeof(Repo.from_json(repo_json)) * 10 < size(repo_json)
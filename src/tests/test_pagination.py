@@ -0,0 +1,100 @@
+"""
+Unit tests for the pagination of list endpoints (pagination.py), against a local stub server.
+"""
+
+import threading
+import time
+
+import pytest
+
+from client import build_session
+from pagination import page_number, paginate
+from stub_server import TOKEN
+
+
+HEADERS = {"Authorization": f"token {TOKEN}"}
+
+
+class TracingSession:
+    """
+    Wraps a session to record the pages requested and how many were in flight at once,
+    optionally slowing down the first pages so that later ones complete before them.
+    """
+
+    def __init__(self, session, delays=None, next_links_only=False):
+        self.session = session
+        self.delays = delays or {}
+        self.next_links_only = next_links_only
+        self.pages = []
+        self.active = self.max_active = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        page = page_number(url) or 1
+        with self._lock:
+            self.pages.append(page)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delays.get(page, 0.02))
+            response = self.session.get(url, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+        if self.next_links_only:
+            links = [part for part in response.headers.get("Link", "").split(", ") if 'rel="last"' not in part]
+            response.headers["Link"] = ", ".join(links)
+        return response
+
+
+@pytest.fixture(scope="module")
+def session():
+    session = build_session(snapshot_path="", transport_mode="live")
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="module")
+def commits_url(base_url, session):
+    repo = session.get(f"{base_url}/users/user_00000/repos", headers=HEADERS).json()[0]
+    return f"{base_url}/repos/user_00000/{repo['name']}/commits"
+
+
+@pytest.fixture(scope="module")
+def all_shas(session, commits_url):
+    return [commit["sha"] for commit in session.get(commits_url, headers=HEADERS, params={"per_page": 100}).json()]
+
+
+def test_pages_are_fetched_concurrently_once_the_last_page_is_known(session, commits_url, all_shas):
+    # Earlier pages are the slowest, so later pages complete first
+    tracing = TracingSession(session, delays={2: 0.15, 3: 0.1, 4: 0.05, 5: 0.1})
+    shas = [commit["sha"] for commit in paginate(tracing, commits_url, params={"per_page": 1}, max_workers=3,
+                                                 headers=HEADERS)]
+
+    assert shas == all_shas and len(shas) == 5
+    assert tracing.pages[0] == 1 and sorted(tracing.pages) == [1, 2, 3, 4, 5]
+    assert tracing.max_active == 3
+
+
+def test_next_links_are_followed_without_a_last_link(session, commits_url, all_shas):
+    tracing = TracingSession(session, next_links_only=True)
+    shas = [commit["sha"] for commit in paginate(tracing, commits_url, params={"per_page": 2}, max_workers=3,
+                                                 headers=HEADERS, stream=True)]
+
+    assert shas == all_shas
+    assert tracing.pages == [1, 2, 3] and tracing.max_active == 1
+
+
+def test_items_are_yielded_in_order_within_a_bounded_window(session, commits_url, all_shas):
+    tracing = TracingSession(session)
+    items = paginate(tracing, commits_url, params={"per_page": 1}, max_workers=1, headers=HEADERS)
+
+    shas = [next(items)["sha"]]
+    requested = [len(tracing.pages)]
+    for commit in items:
+        shas.append(commit["sha"])
+        requested.append(len(tracing.pages))
+
+    assert shas == all_shas
+    # Never more than 2 * max_workers pages requested ahead of the page consumed
+    assert all(count <= consumed + 2 for consumed, count in enumerate(requested, start=1))
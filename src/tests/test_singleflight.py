@@ -0,0 +1,165 @@
+"""
+Unit tests for the coalescing of identical requests in flight (singleflight.py).
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from client import build_session
+from deadlines import DeadlineExceeded
+from singleflight import SingleFlight, request_key
+from stub_server import TOKEN, StubData, make_server
+from timing import TimingRecorder
+
+
+def test_waiters_get_the_result_of_the_leader():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(flights.do, "key", work) for _ in range(4)]
+        while flights.coalesced < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert {result for result, _ in results} == {"result"}
+    # Once done, the key is sent again
+    assert flights.do("key", lambda: "again") == ("again", False)
+
+
+def test_waiters_get_the_error_of_the_leader():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flights.do, "key", fail)
+        started.wait(5)
+        waiter = executor.submit(flights.do, "key", lambda: "unused")
+        while not flights.coalesced:
+            threading.Event().wait(0.01)
+        release.set()
+        for future in (leader, waiter):
+            with pytest.raises(ValueError, match="boom"):
+                future.result()
+
+
+def test_waiter_timeout():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        release.wait(5)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        executor.submit(flights.do, "key", work)
+        started.wait(5)
+        with pytest.raises(DeadlineExceeded):
+            flights.do("key", lambda: None, timeout=0.05)
+        release.set()
+
+
+def test_forgotten_calls_are_not_joined():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        release.wait(5)
+        return "before"
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        leader = executor.submit(flights.do, ("GET", "https://api.github.com/user?a=1"), work)
+        started.wait(5)
+        flights.forget("https://api.github.com/user")
+        assert flights.do(("GET", "https://api.github.com/user?a=1"), lambda: "after") == ("after", False)
+        release.set()
+        assert leader.result() == ("before", False)
+    assert flights.coalesced == 0
+
+
+def test_mutation_fences_the_reads_in_flight(base_url):
+    session = build_session(cache_enabled=False, transport_mode="live", tokens=[TOKEN])
+    started, release = threading.Event(), threading.Event()
+    sent = []
+
+    def send_guarded(request, **kwargs):
+        sent.append(request.method)
+        response = requests.Response()
+        response.status_code, response._content = 200, request.method.encode()
+        if len(sent) == 1:
+            started.set()
+            release.wait(5)
+        return response
+
+    session._send_guarded = send_guarded
+    url = f"{base_url}/user"
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            before = executor.submit(session.get, url)
+            started.wait(5)
+            session.patch(url, json={"bio": "changed"})
+            # Sent after the change: it does not join the read started before it
+            after = executor.submit(session.get, url)
+            assert after.result(timeout=5).content == b"GET"
+            release.set()
+            before.result(timeout=5)
+    finally:
+        session.close()
+    assert sent == ["GET", "PATCH", "GET"] and session.flights.coalesced == 0
+
+
+def test_request_key():
+    def key(**headers):
+        return request_key(requests.Request("GET", "https://api.github.com/user", headers=headers).prepare())
+
+    assert key(Authorization="token a") == key(authorization="token a")
+    assert key(Authorization="token a") != key(Authorization="token b")
+
+
+@pytest.fixture()
+def slow_base_url():
+    server = make_server("127.0.0.1", 0, StubData(users=1, repos_per_user=1, commits_per_repo=1), latency=0.2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("cache_enabled", [False, True])
+def test_identical_requests_go_over_the_wire_once(slow_base_url, cache_enabled):
+    recorder = TimingRecorder()
+    session = build_session(cache_enabled=cache_enabled, snapshot_path="", transport_mode="live", tokens=[TOKEN],
+                            recorder=recorder)
+    headers = {"Authorization": f"token {TOKEN}"}
+    try:
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            responses = list(executor.map(lambda _: session.get(f"{slow_base_url}/user", headers=headers), range(5)))
+        other = session.get(f"{slow_base_url}/user")  # Not identical: anonymous
+    finally:
+        session.close()
+
+    assert len(recorder.records) == 2 and session.flights.coalesced == 4
+    assert all(response.status_code == 200 for response in responses) and other.status_code == 401
+    # Every caller gets its own copy
+    responses[0].headers["X-Changed"] = "1"
+    assert "X-Changed" not in responses[1].headers
+    assert len({id(response) for response in responses}) == 5
@@ -0,0 +1,91 @@
+"""
+Unit tests for the persistent snapshots of the response cache (snapshots.py), against a local stub server.
+"""
+
+import requests
+
+from cache import ResponseCache, cache_key
+from client import build_session
+from snapshots import SnapshotStore
+from streaming import iter_json_items
+from stub_server import TOKEN
+from timing import TimingRecorder
+
+
+HEADERS = {"Authorization": f"token {TOKEN}"}
+
+
+def make_response(url, body, headers):
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = body
+    response.headers.update(headers)
+    return response
+
+
+def test_store_and_get(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.sqlite"))
+    key = cache_key("GET", "http://host/users/a", {"page": 2}, HEADERS)
+    store.store(key, make_response(key[1], b'{"login": "a"}',
+                                   {"ETag": '"1"', "Content-Encoding": "gzip", "Content-Type": "application/json"}))
+    store.close()
+
+    response = SnapshotStore(str(tmp_path / "snapshots.sqlite")).get(key)
+    assert response.json() == {"login": "a"} and response.content == b'{"login":"a"}'
+    assert response.headers["ETag"] == '"1"' and "Content-Encoding" not in response.headers
+    assert response.url == "http://host/users/a?page=2"
+
+
+def test_invalidate(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.sqlite"))
+    kept = cache_key("GET", "http://host/users/b", None, HEADERS)
+    dropped = cache_key("GET", "http://host/users/a", {"page": 2}, HEADERS)
+    for key in (kept, dropped):
+        store.store(key, make_response(key[1], b"{}", {"ETag": '"1"'}))
+
+    ResponseCache(snapshots=store).invalidate("http://host/users/a")
+    assert store.get(dropped) is None and store.get(kept) is not None
+    store.invalidate()
+    assert len(store) == 0
+
+
+def test_last_modified_responses_are_cached(tmp_path):
+    cache = ResponseCache(snapshots=SnapshotStore(str(tmp_path / "snapshots.sqlite")))
+    key = cache_key("GET", "http://host/users/a", None, HEADERS)
+    cache.store(key, make_response(key[1], b"{}", {"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}))
+    cache.store(cache_key("GET", "http://host/users/b", None, HEADERS), make_response(key[1], b"{}", {}))
+    assert len(cache) == 1 and len(cache.snapshots) == 1
+
+
+def test_next_run_revalidates_snapshots(tmp_path, base_url):
+    url = f"{base_url}/users/user_00000/repos"
+    path = str(tmp_path / "snapshots.sqlite")
+    statuses = []
+    for _ in range(2):  # Two runs, each with a new session and an empty in-memory cache
+        recorder = TimingRecorder()
+        session = build_session(snapshot_path=path, transport_mode="live", recorder=recorder)
+        response = session.get(url, headers=HEADERS, params={"per_page": 1})
+        streamed = session.get(url, headers=HEADERS, params={"per_page": 1}, stream=True)
+        assert response.status_code == 200 and streamed.status_code == 200
+        assert streamed.json() == response.json() and len(response.json()) == 1
+        statuses.append([record["status"] for record in recorder.records])
+        session.close()
+    assert statuses == [[200, 304], [304, 304]]
+
+
+def test_streamed_responses_are_stored_once_read(tmp_path, base_url):
+    url = f"{base_url}/users/user_00000/repos"
+    path = str(tmp_path / "snapshots.sqlite")
+    statuses = []
+    for _ in range(2):
+        recorder = TimingRecorder()
+        session = build_session(snapshot_path=path, transport_mode="live", recorder=recorder)
+        with session.get(url, headers=HEADERS, stream=True) as response:
+            items = list(iter_json_items(response))
+        # Closed before its body was read whole: not stored
+        session.get(f"{base_url}/users/user_00001/repos", headers=HEADERS, stream=True).close()
+        statuses.append([record["status"] for record in recorder.records])
+        session.close()
+        assert len(items) == 2
+    assert statuses == [[200, 200], [304, 200]]
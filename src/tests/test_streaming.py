@@ -0,0 +1,83 @@
+"""
+Unit tests for the incremental JSON list parser (streaming.py).
+"""
+
+import json
+
+import pytest
+
+from streaming import iter_json_items, validate_items
+
+
+class FakeResponse:
+    """
+    Minimal stand-in for a streamed ``requests.Response``, sending its body in fixed size chunks.
+    """
+
+    encoding = "utf-8"
+
+    def __init__(self, body, chunk_size):
+        self.body = body
+        self.chunk_size = chunk_size
+        self.chunks_read = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), self.chunk_size):
+            self.chunks_read += 1
+            yield self.body[start:start + self.chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.closed = True
+
+
+ITEMS = [
+    {"sha": "a1", "commit": {"author": {"name": "José", "date": "2024-01-01T00:00:00Z"}, "message": "[x], {y}"}},
+    12345, -0.25, 1.5e10, 1e-7, "text with \"quotes\" and ]", None, True, False, [], {}, [1, [2, [3]]],
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 65536])
+def test_items_split_across_chunks(chunk_size):
+    body = json.dumps(ITEMS, ensure_ascii=False).encode()
+
+    assert list(iter_json_items(FakeResponse(body, chunk_size), chunk_size)) == ITEMS
+
+
+@pytest.mark.parametrize("body", [b"[]", b"  [ ]  ", b"\n[\n]\n"])
+def test_empty_array(body):
+    assert list(iter_json_items(FakeResponse(body, 1))) == []
+
+
+def test_not_an_array():
+    with pytest.raises(ValueError):
+        list(iter_json_items(FakeResponse(b'{"message": "Not Found"}', 4)))
+
+
+def test_truncated_body():
+    with pytest.raises(ValueError):
+        list(iter_json_items(FakeResponse(b'[{"sha": "a1"}, {"sha"', 4)))
+
+
+def test_validate_items_counts_valid_items():
+    response = FakeResponse(json.dumps([{"sha": str(i)} for i in range(10)]).encode(), 8)
+
+    assert validate_items(response, lambda item: None) == 10
+    assert response.closed
+
+
+def test_validate_items_stops_at_first_failure():
+    body = json.dumps([{"sha": str(i), "padding": "x" * 100} for i in range(100)]).encode()
+    response = FakeResponse(body, 64)
+
+    def check(item):
+        assert item["sha"] != "2", "bad commit"
+
+    with pytest.raises(AssertionError, match="bad commit"):
+        validate_items(response, check)
+
+    assert response.closed
+    assert response.chunks_read < len(body) // 64 // 10, "The rest of the body should not have been read"
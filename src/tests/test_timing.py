@@ -0,0 +1,62 @@
+"""
+Unit tests for the request timing report (timing.py).
+"""
+
+from datetime import timedelta
+
+import requests
+
+from timing import TimingRecorder, endpoint, format_summary, percentile, read_records, summarize, write_report
+
+
+def make_response(status, body, headers=None, elapsed=0.01):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.headers.update(headers or {})
+    response.elapsed = timedelta(seconds=elapsed)
+    return response
+
+
+def make_request(method, url):
+    return requests.Request(method, url).prepare()
+
+
+def test_endpoint_templates():
+    assert endpoint("GET", "https://api.github.com/repos/a/b/commits?page=2") == "GET /repos/{owner}/{repo}/commits"
+    assert endpoint("GET", "https://api.github.com/users/someone") == "GET /users/{username}"
+    assert endpoint("GET", "https://api.github.com/users/someone/repos") == "GET /users/{username}/repos"
+    assert endpoint("PATCH", "https://api.github.com/user") == "PATCH /user"
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert [percentile(values, rank) for rank in (50, 95, 99)] == [50, 95, 99]
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) is None
+
+
+def test_record_and_summarize(tmp_path):
+    recorder = TimingRecorder()
+    recorder.record("task1.py::test_a", make_request("GET", "http://host/users/a"),
+                    make_response(200, b"{}", {"X-RateLimit-Remaining": "10"}), 0.05)
+    recorder.record("task1.py::test_a", make_request("GET", "http://host/users/b"),
+                    make_response(200, b"[1,2]"), 0.15)
+    recorder.record("task5.py::test_b", make_request("GET", "http://host/repos/a/b/commits"),
+                    make_response(200, b"", {"Content-Length": "42"}), 0.02, stream=True)
+
+    first, _, streamed = recorder.records
+    assert first["rate_limit"] == {"X-RateLimit-Remaining": "10"}
+    assert first["download"] == 0.04
+    assert streamed["download"] is None and streamed["bytes"] == 42
+
+    summary = summarize(recorder.records)
+    assert summary["requests"] == 3 and summary["bytes"] == 49
+    assert summary["endpoints"]["GET /users/{username}"] == {"count": 2, "bytes": 7, "p50": 0.05, "p95": 0.15,
+                                                              "p99": 0.15}
+    assert summary["slowest_tests"][0] == {"test": "task1.py::test_a", "requests": 2, "total": 0.2}
+    assert len(format_summary(summary)) == 2 + 2 + 1 + 2
+
+    path = tmp_path / "report.json"
+    write_report(path, recorder.records)
+    assert read_records(path) == recorder.records
@@ -0,0 +1,117 @@
+"""
+Unit tests for the token pool (ratelimit.py) and the budget planner (budget.py).
+"""
+
+import json
+
+import requests
+
+import budget
+from budget import Budget, fetch_budget, plan
+from cache import auth_identity
+from client import build_session
+from ratelimit import RateLimiter, TokenPool
+from stub_server import TOKEN
+
+
+OTHER_TOKEN = f"{TOKEN}-user_00000"
+
+
+def identity(token):
+    return auth_identity({"Authorization": f"token {token}"})
+
+
+def test_choose_prefers_headroom():
+    limiter = RateLimiter()
+    limiter.update("low", {"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": "9999999999"})
+    limiter.update("high", {"X-RateLimit-Remaining": "100", "X-RateLimit-Reset": "9999999999"})
+    assert limiter.choose(["low", "high"]) == "high"
+
+    # A token asked to wait is only chosen when every other one has to wait longer
+    limiter.update("high", {"Retry-After": "60"})
+    assert limiter.choose(["low", "high"]) == "low"
+
+    # An exhausted budget whose reset time is past is whole again
+    limiter.update("reset", {"X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1"})
+    assert limiter.choose(["low", "reset"]) == "reset"
+
+
+def test_choose_uses_unknown_tokens_in_turn():
+    limiter = RateLimiter()
+    assert [limiter.choose(["a", "b", "c"]) for _ in range(6)] == ["a", "b", "c"] * 2
+
+
+def test_pool_routes_reads_not_bound_to_the_user():
+    pool = TokenPool([TOKEN, OTHER_TOKEN, ""], RateLimiter())
+    assert pool.tokens == [TOKEN, OTHER_TOKEN]
+
+    def prepared(method, path, token=TOKEN):
+        headers = {"Authorization": f"token {token}"} if token else {}
+        return requests.Request(method, f"https://api.github.com{path}", headers=headers).prepare()
+
+    assert pool.routes(prepared("GET", "/users/octocat"))
+    assert pool.routes(prepared("GET", "/repos/octocat/hello/commits"))
+    assert not pool.routes(prepared("GET", "/user"))
+    assert not pool.routes(prepared("GET", "/user/repos"))
+    assert not pool.routes(prepared("GET", "/rate_limit"))
+    assert not pool.routes(prepared("PATCH", "/repos/octocat/hello"))
+    assert not pool.routes(prepared("GET", "/users/octocat", token=None))
+    assert not pool.routes(prepared("GET", "/users/octocat", token="someone-else"))
+
+
+def test_session_spreads_reads_over_the_pool(base_url):
+    session = build_session(cache_enabled=False, transport_mode="live", tokens=[TOKEN, OTHER_TOKEN])
+    try:
+        for _ in range(4):
+            assert session.get(f"{base_url}/users/user_00001", headers={"Authorization": f"token {TOKEN}"}).ok
+        # Requests answering for the caller keep their token
+        assert session.get(f"{base_url}/user", headers={"Authorization": f"token {TOKEN}"}).json()["login"] \
+            != "user_00000"
+        state = session.limiter.snapshot()
+        assert state[identity(TOKEN)]["remaining"] is not None and state[identity(OTHER_TOKEN)]["remaining"] \
+            is not None
+    finally:
+        session.close()
+
+
+def test_session_falls_back_to_its_token(base_url):
+    session = build_session(cache_enabled=False, transport_mode="live", tokens=[TOKEN, OTHER_TOKEN])
+    headers = {"Authorization": f"token {OTHER_TOKEN}"}
+    try:
+        repos = session.get(f"{base_url}/user/repos", headers=headers).json()
+        private = next(repo for repo in repos if repo["private"])
+        url = f"{base_url}/repos/{private['full_name']}/commits"
+        # The other token cannot read the private repository: the request is sent again with its own
+        response = session.get(url, headers=headers)
+        assert response.status_code == 200 and response.request.headers["Authorization"] == headers["Authorization"]
+        # and the next requests to the repository are not routed any more
+        assert not session.token_pool.routes(session.prepare_request(requests.Request("GET", url, headers=headers)))
+    finally:
+        session.close()
+
+
+def test_fetch_budget_uses_none(base_url):
+    session = build_session(cache_enabled=False, transport_mode="live", tokens=[TOKEN])
+    try:
+        first = fetch_budget(session, TOKEN, base_url)
+        second = fetch_budget(session, TOKEN, base_url)
+        assert first.remaining == second.remaining and first.limit >= first.remaining
+    finally:
+        session.close()
+
+
+def test_plan():
+    budgets = [Budget("a", 5000, 100, 2000), Budget("b", 5000, 400, 1500)]
+    assert plan(budgets, 500, now=1000).fits
+    assert plan(budgets, 500, now=1000).ready_at == 1000
+
+    short = plan(budgets, 3000, now=1000)
+    assert not short.fits and short.shortfall == 2500 and short.ready_at == 1500
+    assert plan(budgets, 6000, now=1000).ready_at == 2000
+    assert plan(budgets, 20000, now=1000).ready_at is None
+
+
+def test_planned_requests_skips_not_modified(tmp_path):
+    report = tmp_path / "timing.json"
+    report.write_text(json.dumps({"records": [{"status": 200}, {"status": 304}, {"status": 404}]}))
+    assert budget.planned_requests(str(report)) == 2
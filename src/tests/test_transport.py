@@ -0,0 +1,105 @@
+"""
+Unit tests for the record/replay transport (transport.py), run against a local stub server.
+"""
+
+import pytest
+import requests
+
+from stub_server import TOKEN
+from transport import CassetteAdapter, CassetteError, CassetteStore, scope_path
+
+
+MODULE_TEST = "task1.py::test_response_200"
+OTHER_TEST = "task1.py::test_response_304"
+
+
+def cassette_session(store, mode):
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {TOKEN}"
+    session.mount("http://", CassetteAdapter(store, mode))
+    return session
+
+
+def record(directory, scope, key, body):
+    store = CassetteStore(directory, "record")
+    store.scope = scope
+    store.add(key, {"status": 200, "reason": "OK", "headers": {}, "body": body})
+    return store
+
+
+def test_scope_path(tmp_path):
+    assert scope_path(str(tmp_path), MODULE_TEST) == str(tmp_path / "task1" / "test_response_200.json.gz")
+    assert scope_path(str(tmp_path), "task7.py::test_step[a/b]").endswith("test_step_a_b_.json.gz")
+    assert scope_path(str(tmp_path), "session") == str(tmp_path / "session" / "session.json.gz")
+
+
+def test_replay_in_recorded_order(tmp_path):
+    store = record(str(tmp_path), MODULE_TEST, "GET /a", "first")
+    store.add("GET /a", {"status": 200, "reason": "OK", "headers": {}, "body": "second"})
+    store.save()
+
+    replay = CassetteStore(str(tmp_path), "replay")
+    replay.scope = MODULE_TEST
+    assert [replay.next("GET /a")["body"] for _ in range(2)] == ["first", "second"]
+    with pytest.raises(CassetteError):
+        replay.next("GET /a")
+
+    replay.reset()
+    assert replay.next("GET /a")["body"] == "first"
+
+
+def test_replay_unknown_request(tmp_path):
+    record(str(tmp_path), MODULE_TEST, "GET /a", "body").save()
+
+    replay = CassetteStore(str(tmp_path), "replay")
+    replay.scope = OTHER_TEST
+    with pytest.raises(CassetteError):
+        replay.next("GET /a")
+
+
+def test_parallel_stores_keep_each_test(tmp_path):
+    # Two runner workers recording tests of the same module
+    first = record(str(tmp_path), MODULE_TEST, "GET /a", "from worker 1")
+    second = record(str(tmp_path), OTHER_TEST, "GET /a", "from worker 2")
+    second.save()
+    first.save()
+
+    replay = CassetteStore(str(tmp_path), "replay")
+    replay.scope = MODULE_TEST
+    assert replay.next("GET /a")["body"] == "from worker 1"
+    replay.scope = OTHER_TEST
+    assert replay.next("GET /a")["body"] == "from worker 2"
+
+
+def test_record_replaces_previous_cassette(tmp_path):
+    record(str(tmp_path), MODULE_TEST, "GET /a", "old").save()
+    record(str(tmp_path), MODULE_TEST, "GET /a", "new").save()
+
+    replay = CassetteStore(str(tmp_path), "replay")
+    replay.scope = MODULE_TEST
+    assert replay.next("GET /a")["body"] == "new"
+    with pytest.raises(CassetteError):
+        replay.next("GET /a")
+
+
+def test_record_then_replay(tmp_path, base_url):
+    url = f"{base_url}/users/user_00000/repos"
+    store = CassetteStore(str(tmp_path), "record")
+    store.scope = MODULE_TEST
+    session = cassette_session(store, "record")
+    recorded = session.get(url, params={"per_page": 1})
+    conditional = session.get(url, params={"per_page": 1}, headers={"If-None-Match": recorded.headers["ETag"]})
+    session.close()
+    assert (recorded.status_code, conditional.status_code) == (200, 304)
+
+    store = CassetteStore(str(tmp_path), "replay")
+    store.scope = MODULE_TEST
+    session = cassette_session(store, "replay")
+    replayed = session.get(url, params={"per_page": 1})
+    assert replayed.status_code == 200
+    assert replayed.json() == recorded.json()
+    assert replayed.headers["Link"] == recorded.headers["Link"]
+    assert session.get(url, params={"per_page": 1},
+                       headers={"If-None-Match": recorded.headers["ETag"]}).status_code == 304
+    with pytest.raises(CassetteError):
+        session.get(url, params={"per_page": 5})
@@ -0,0 +1,74 @@
+"""
+Unit tests for the compiled field validator (validation.py).
+"""
+
+import pytest
+
+from validation import Schema
+
+
+COMMIT = {
+    "sha": "a1",
+    "commit": {"author": {"name": "Jane", "date": "2024-01-01T00:00:00Z"}, "message": "Initial commit"},
+    "author": None,
+    "parents": [{"sha": "b2", "deep": {"hidden": 1}}],
+}
+
+
+def test_bare_keys_found_at_any_depth():
+    assert Schema(["sha", "author", "message", "date"]).errors(COMMIT) == []
+
+
+def test_keys_inside_lists_are_not_searched():
+    assert Schema(["hidden"]).errors(COMMIT) == ["Missing field 'hidden'"]
+
+
+def test_dotted_paths_start_at_the_root():
+    assert Schema(["commit.author.date"]).errors(COMMIT) == []
+    assert Schema(["author.date"]).errors(COMMIT) == ["Missing field 'author.date'"]
+
+
+def test_all_problems_reported_at_once():
+    errors = Schema(["sha:integer", "commit.message:string", "missing", "author:object"]).errors(COMMIT)
+
+    assert errors == [
+        "Field 'sha' should be integer, got str",
+        "Missing field 'missing'",
+        "Field 'author' should be object, got NoneType",
+    ]
+
+
+def test_booleans_are_not_numbers():
+    assert Schema(["flag:integer"]).errors({"flag": True}) == ["Field 'flag' should be integer, got bool"]
+    assert Schema(["flag:boolean"]).errors({"flag": True}) == []
+
+
+def test_exact_mode_reports_missing_and_unexpected_top_level_keys():
+    errors = Schema(["sha", "commit", "author", "stats"], exact=True).errors(COMMIT)
+
+    assert errors == ["Missing field 'stats'", "Unexpected field 'parents'"]
+
+
+def test_exact_mode_does_not_accept_nested_keys():
+    assert Schema(["sha", "message"], exact=True).errors({"sha": "a1", "commit": {"message": "m"}}) == [
+        "Missing field 'message'",
+        "Unexpected field 'commit'",
+    ]
+
+
+def test_exact_mode_allows_roots_of_dotted_paths():
+    assert Schema(["sha", "author", "parents", "commit.message"], exact=True).errors(COMMIT) == []
+
+
+def test_non_object():
+    assert Schema(["sha"]).errors([]) == ["Expected an object, got list"]
+
+
+def test_unknown_type():
+    with pytest.raises(ValueError):
+        Schema(["sha:text"])
+
+
+def test_check_raises_with_every_error():
+    with pytest.raises(AssertionError, match="Missing field 'x'; Missing field 'y'"):
+        Schema(["x", "y"]).check(COMMIT)
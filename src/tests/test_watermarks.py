@@ -0,0 +1,64 @@
+"""
+Unit tests for the incremental commit validation (watermarks.py), against a local stub server.
+"""
+
+import pytest
+import requests
+
+from stub_server import TOKEN
+import watermarks
+from watermarks import WatermarkStore, commit_date, validate_new_commits
+
+
+HEADERS = {"Authorization": f"token {TOKEN}"}
+
+
+@pytest.fixture
+def commits_url(base_url):
+    return f"{base_url}/repos/user_00000/repo_00000/commits"
+
+
+@pytest.fixture
+def store(tmp_path):
+    watermarks = WatermarkStore(str(tmp_path / "watermarks.sqlite"))
+    yield watermarks
+    watermarks.close()
+
+
+def test_without_store_validates_the_whole_history(session, commits_url):
+    checked = []
+    assert validate_new_commits(session, commits_url, checked.append, headers=HEADERS) == 5
+    assert len({commit["sha"] for commit in checked}) == 5
+
+
+def test_next_runs_only_validate_new_commits(session, commits_url, store):
+    history = requests.get(commits_url, headers=HEADERS).json()
+    assert validate_new_commits(session, commits_url, lambda commit: None, store, headers=HEADERS) == 5
+    assert store.get(commits_url) == (history[0]["sha"], commit_date(history[0]))
+    assert validate_new_commits(session, commits_url, lambda commit: None, store, headers=HEADERS) == 0
+
+    # Pretend the last run stopped three commits ago
+    store.set(commits_url, history[3]["sha"], commit_date(history[3]))
+    checked = []
+    assert validate_new_commits(session, commits_url, checked.append, store, headers=HEADERS) == 3
+    assert [commit["sha"] for commit in checked] == [commit["sha"] for commit in history[:3]]
+    assert store.get(commits_url)[0] == history[0]["sha"]
+
+
+def test_incremental_runs_walk_back_to_the_known_commit(session, commits_url, store, monkeypatch):
+    monkeypatch.setattr(watermarks, "PER_PAGE", 2)
+    history = requests.get(commits_url, headers=HEADERS).json()
+    # On the second page, and dated after the newer commits: a since= filter would skip them all
+    store.set(commits_url, history[3]["sha"], commit_date(history[0]))
+    checked = []
+    assert validate_new_commits(session, commits_url, checked.append, store, headers=HEADERS) == 3
+    assert [commit["sha"] for commit in checked] == [commit["sha"] for commit in history[:3]]
+
+
+def test_failed_validation_keeps_the_watermark(session, commits_url, store):
+    def check(commit):
+        raise AssertionError("invalid commit")
+
+    with pytest.raises(AssertionError):
+        validate_new_commits(session, commits_url, check, store, headers=HEADERS)
+    assert store.get(commits_url) is None
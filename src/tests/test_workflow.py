@@ -0,0 +1,93 @@
+"""
+Unit tests for the asyncio workflow engine (workflow.py).
+"""
+
+import threading
+import time
+
+import pytest
+
+from workflow import DependencyFailed, Step, Workflow, WorkflowError
+
+
+def test_waves():
+    workflow = Workflow([
+        Step("a", lambda: 1),
+        Step("b", lambda a: a + 1, requires=["a"]),
+        Step("c", lambda: 3),
+        Step("d", lambda b, c: b + c, requires=["b", "c"]),
+    ])
+    assert workflow.waves == [["a", "c"], ["b"], ["d"]]
+
+
+def test_invalid_graphs():
+    with pytest.raises(WorkflowError, match="Duplicate"):
+        Workflow([Step("a", print), Step("a", print)])
+    with pytest.raises(WorkflowError, match="unknown step 'b'"):
+        Workflow([Step("a", print, requires=["b"])])
+    with pytest.raises(WorkflowError, match="Cyclic"):
+        Workflow([Step("a", print, requires=["b"]), Step("b", print, requires=["a"])])
+
+
+def test_results_are_shared_with_dependent_steps():
+    calls = []
+
+    def listing(prefix):
+        calls.append("listing")
+        return [f"{prefix}1", f"{prefix}2"]
+
+    workflow = Workflow([
+        Step("listing", listing),
+        Step("first", lambda prefix, items: items[0], requires=["listing"]),
+        Step("last", lambda prefix, items: items[-1], requires=["listing"]),
+    ])
+    outcomes = workflow.run("repo")
+    assert calls == ["listing"]
+    assert (outcomes["first"].get(), outcomes["last"].get()) == ("repo1", "repo2")
+
+
+def test_independent_steps_run_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+    workflow = Workflow([Step(name, barrier.wait) for name in "abc"])
+    start = time.perf_counter()
+    outcomes = workflow.run()
+    assert all(outcome.ok for outcome in outcomes.values())
+    assert time.perf_counter() - start < 5
+
+
+def test_failures_skip_dependent_steps():
+    def failing():
+        assert False, "boom"
+
+    workflow = Workflow([
+        Step("update", failing),
+        Step("check", lambda _: None, requires=["update"]),
+        Step("other", lambda: "ok"),
+    ])
+    outcomes = workflow.run()
+    with pytest.raises(AssertionError, match="boom"):
+        outcomes["update"].get()
+    with pytest.raises(DependencyFailed, match="update failed"):
+        outcomes["check"].get()
+    assert outcomes["other"].get() == "ok"
+
+
+def test_run_sequentially_matches_the_engine():
+    order = []
+
+    def step(name, result):
+        return lambda *_: order.append(name) or result
+
+    workflow = Workflow([
+        Step("repos", step("repos", ["a", "b"])),
+        Step("first", lambda repos: repos[0], requires=["repos"]),
+        Step("broken", lambda: 1 / 0),
+        Step("after_broken", step("after_broken", None), requires=["broken"]),
+    ])
+    outcomes = workflow.run_sequentially()
+    assert outcomes["first"].get() == "a"
+    assert isinstance(outcomes["broken"].error, ZeroDivisionError)
+    assert isinstance(outcomes["after_broken"].error, DependencyFailed)
+    assert order == ["repos"]
+    assert {name: outcome.ok for name, outcome in outcomes.items()} == \
+        {name: outcome.ok for name, outcome in workflow.run().items()}
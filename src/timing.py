@@ -0,0 +1,177 @@
+"""
+Per-request timing of the shared session.
+
+Every request sent by ``ApiSession`` is recorded by a ``TimingRecorder`` with the node id
+of the test that sent it, the endpoint, status, time to first byte (until the response
+headers were read), download time, response size and the rate-limit headers. At the end
+of the run conftest.py prints a summary (p50/p95/p99 per endpoint, slowest tests, bytes
+transferred) and writes every record into a JSON report, so latency regressions of an
+API host can be followed from one run to the next.
+
+``requests`` does not expose the DNS, connect and TLS phases separately: they are part of
+the time to first byte of the request that opened the connection.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+
+# Path templates of the endpoints used by the tasks, so that e.g. the commits of every
+# repository are summarised together
+ENDPOINT_PATTERNS = [
+    (re.compile(r"^/repos/[^/]+/[^/]+/commits$"), "/repos/{owner}/{repo}/commits"),
+    (re.compile(r"^/repos/[^/]+/[^/]+$"), "/repos/{owner}/{repo}"),
+    (re.compile(r"^/users/[^/]+/repos$"), "/users/{username}/repos"),
+    (re.compile(r"^/users/[^/]+$"), "/users/{username}"),
+]
+
+# Rate-limit headers kept with every record
+RECORDED_HEADERS = ("X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "Retry-After")
+
+PERCENTILES = (50, 95, 99)
+
+
+def endpoint(method, url):
+    """
+    Returns the endpoint of a request, e.g. ``GET /repos/{owner}/{repo}/commits``.
+    """
+
+    path = urlsplit(url).path.rstrip("/") or "/"
+    for pattern, template in ENDPOINT_PATTERNS:
+        if pattern.match(path):
+            path = template
+            break
+    return f"{method} {path}"
+
+
+def percentile(values, rank):
+    """
+    Returns the nearest-rank percentile of a sorted list of values.
+    """
+
+    if not values:
+        return None
+    index = max(-(-rank * len(values) // 100) - 1, 0)
+    return values[index]
+
+
+class TimingRecorder:
+    """
+    Thread-safe collector of the timings of the requests of a test run.
+    """
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def record(self, test, request, response, total, stream=False):
+        """
+        Records a response.
+
+        Args:
+            test (str): Node id of the test that sent the request, or None.
+            request (requests.PreparedRequest): The request sent.
+            response (requests.Response): Its response.
+            total (float): Seconds spent sending the request and reading the response.
+            stream (bool): Whether the request was streamed, in which case the body is
+                downloaded later by the caller and its download time is not known.
+        """
+
+        ttfb = response.elapsed.total_seconds()
+        downloaded = not stream
+        if downloaded:
+            size = len(response.content or b"")
+        else:
+            size = int(response.headers.get("Content-Length", 0))
+        entry = {
+            "test": test,
+            "endpoint": endpoint(request.method, request.url),
+            "url": request.url,
+            "status": response.status_code,
+            "start": time.time() - total,
+            "ttfb": round(ttfb, 6),
+            "download": round(max(total - ttfb, 0), 6) if downloaded else None,
+            "total": round(total, 6),
+            "bytes": size,
+            "rate_limit": {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers},
+        }
+        with self._lock:
+            self.records.append(entry)
+
+
+def summarize(records, slowest=10):
+    """
+    Aggregates timing records.
+
+    Args:
+        records (list): Records of one or several ``TimingRecorder``.
+        slowest (int): Number of slowest tests to report.
+
+    Returns:
+        dict: ``endpoints`` (count, bytes and percentiles of the total time per
+            endpoint), ``slowest_tests`` and the overall ``requests`` and ``bytes``.
+    """
+
+    durations = defaultdict(list)
+    sizes = defaultdict(int)
+    tests = defaultdict(lambda: {"requests": 0, "total": 0.0})
+    for entry in records:
+        durations[entry["endpoint"]].append(entry["total"])
+        sizes[entry["endpoint"]] += entry["bytes"]
+        test = tests[entry["test"] or "(outside tests)"]
+        test["requests"] += 1
+        test["total"] += entry["total"]
+
+    endpoints = {}
+    for name, values in sorted(durations.items()):
+        values.sort()
+        endpoints[name] = {"count": len(values), "bytes": sizes[name],
+                           **{f"p{rank}": percentile(values, rank) for rank in PERCENTILES}}
+
+    ranking = sorted(tests.items(), key=lambda item: item[1]["total"], reverse=True)[:slowest]
+    return {
+        "requests": len(records),
+        "bytes": sum(sizes.values()),
+        "endpoints": endpoints,
+        "slowest_tests": [{"test": test, "requests": stats["requests"], "total": round(stats["total"], 6)}
+                          for test, stats in ranking],
+    }
+
+
+def format_summary(summary):
+    """
+    Returns the lines of the terminal report of a summary.
+    """
+
+    lines = [f"{summary['requests']} requests, {summary['bytes']} bytes transferred"]
+    width = max([len(name) for name in summary["endpoints"]] + [8])
+    lines.append(f"{'endpoint':<{width}}  {'count':>6}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'bytes':>10}")
+    for name, stats in summary["endpoints"].items():
+        times = "  ".join(f"{stats[f'p{rank}'] * 1000:8.1f}" for rank in PERCENTILES)
+        lines.append(f"{name:<{width}}  {stats['count']:>6}  {times}  {stats['bytes']:>10}")
+    lines.append("slowest tests (time spent in requests):")
+    for test in summary["slowest_tests"]:
+        lines.append(f"  {test['total'] * 1000:8.1f} ms  {test['requests']:>4} requests  {test['test']}")
+    return lines
+
+
+def write_report(path, records):
+    """
+    Writes the records and their summary into a JSON report.
+    """
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"summary": summarize(records), "records": records}, file, indent=2)
+
+
+def read_records(path):
+    """
+    Returns the records of a JSON report written by ``write_report``.
+    """
+
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)["records"]
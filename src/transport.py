@@ -0,0 +1,200 @@
+"""
+Record/replay transport for the shared session.
+
+``CassetteAdapter`` is mounted in place of the plain ``HTTPAdapter`` (see client.py):
+
+* in ``record`` mode requests go to the API and every request/response pair (status,
+  headers such as ETag and Link, body) is saved into a cassette,
+* in ``replay`` mode nothing goes over the network: responses are served from the
+  cassettes, so the tasks can run offline.
+
+There is one gzip-compressed JSON cassette per test, in a folder per test module under
+``cassette_dir``. Inside it, responses are grouped by request key and replayed in the
+order they were recorded, so a test that reads the same URL before and after a PATCH
+gets the two different responses back. Since a test only replays its own cassette,
+replay works whatever the selection and order of the tests (and with runner.py).
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.response import HTTPResponse
+
+from cache import auth_identity
+
+
+# Headers that do not describe the decoded body stored in the cassette
+SKIPPED_HEADERS = ("content-encoding", "transfer-encoding", "content-length")
+
+
+class CassetteError(requests.RequestException):
+    """
+    Raised in replay mode when a request has no recorded response.
+    """
+
+
+def request_key(request):
+    """
+    Returns the key used to match a prepared request with its recorded responses.
+
+    The key covers the method, URL, auth identity, body and conditional headers, so
+    that e.g. a request with ``If-None-Match`` does not replay the plain 200 response.
+    """
+
+    body = request.body or b""
+    if isinstance(body, str):
+        body = body.encode()
+    return " ".join([
+        request.method,
+        request.url,
+        auth_identity(request.headers)[:16] or "-",
+        hashlib.sha256(body).hexdigest()[:16] if body else "-",
+        request.headers.get("If-None-Match", "-"),
+    ])
+
+
+def scope_path(directory, scope):
+    """
+    Returns the cassette file of a scope: ``<directory>/<module>/<test name>.json.gz``.
+    """
+
+    module, _, name = scope.partition("::")
+    module = module.rsplit(".", 1)[0] if name else "session"
+    name = re.sub(r"[^\w.-]", "_", name or scope)
+    return os.path.join(directory, module, f"{name}.json.gz")
+
+
+class CassetteStore:
+    """
+    Cassettes of a directory, one file per test.
+
+    In record mode every test starts from an empty cassette, which replaces the file of
+    that test on ``save``; cassettes of other tests are left untouched. Since a test
+    runs in a single process, parallel workers never write the same file.
+
+    Args:
+        directory (str): Directory holding the cassettes.
+        mode (str): ``record`` or ``replay``.
+    """
+
+    def __init__(self, directory, mode="replay"):
+        self.directory = directory
+        self.mode = mode
+        self.scope = None  # Node id of the running test, set by the conftest fixture
+        self._cassettes = {}  # scope -> {key -> [recorded responses]}
+        self._positions = defaultdict(int)  # (scope, key) -> next response to replay
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def _cassette(self, scope):
+        if scope not in self._cassettes:
+            path = scope_path(self.directory, scope)
+            if self.mode == "replay" and os.path.exists(path):
+                with gzip.open(path, "rt", encoding="utf-8") as file:
+                    self._cassettes[scope] = json.load(file)
+            else:
+                self._cassettes[scope] = {}
+        return self._cassettes[scope]
+
+    def add(self, key, record):
+        """
+        Appends a recorded response for a request key in the current scope.
+        """
+
+        scope = self.scope or "session"
+        with self._lock:
+            self._cassette(scope).setdefault(key, []).append(record)
+            self._dirty.add(scope)
+
+    def next(self, key):
+        """
+        Returns the next recorded response for a request key in the current scope.
+
+        Raises:
+            CassetteError: If no (more) responses were recorded for this request.
+        """
+
+        scope = self.scope or "session"
+        with self._lock:
+            records = self._cassette(scope).get(key, [])
+            position = self._positions[scope, key]
+            if position >= len(records):
+                raise CassetteError(f"No recorded response for '{key}' in {scope}")
+            self._positions[scope, key] += 1
+            return records[position]
+
+    def reset(self):
+        """
+        Replays every cassette from its first response again.
+        """
+
+        with self._lock:
+            self._positions.clear()
+
+    def save(self):
+        """
+        Writes the cassettes recorded since the last save.
+        """
+
+        with self._lock:
+            for scope in self._dirty:
+                path = scope_path(self.directory, scope)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with gzip.open(path, "wt", encoding="utf-8") as file:
+                    json.dump(self._cassettes[scope], file, separators=(",", ":"))
+            self._dirty.clear()
+
+
+class CassetteAdapter(HTTPAdapter):
+    """
+    ``HTTPAdapter`` that records responses into, or replays them from, a ``CassetteStore``.
+
+    Args:
+        store (CassetteStore): Where the responses are recorded or replayed from.
+        mode (str): ``record`` or ``replay``.
+        **kwargs: Passed to ``HTTPAdapter`` (pool size, retries...).
+    """
+
+    def __init__(self, store, mode, **kwargs):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode '{mode}', expected 'record' or 'replay'")
+        super().__init__(**kwargs)
+        self.store = store
+        self.mode = mode
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        key = request_key(request)
+
+        if self.mode == "replay":
+            record = self.store.next(key)
+            body = record["body"].encode("utf-8") if "body" in record else bytes.fromhex(record["body_hex"])
+            raw = HTTPResponse(body=io.BytesIO(body), headers=record["headers"], status=record["status"],
+                               reason=record["reason"], preload_content=False, decode_content=False)
+            return self.build_response(request, raw)
+
+        response = super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        content = response.content
+        record = {
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {name: value for name, value in response.headers.items() if name.lower() not in SKIPPED_HEADERS},
+        }
+        try:
+            record["body"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            record["body_hex"] = content.hex()
+        self.store.add(key, record)
+        return response
+
+    def close(self):
+        super().close()
+        if self.mode == "record":
+            self.store.save()
@@ -0,0 +1,131 @@
+"""
+Compiled field validator for API responses.
+
+The expected item lists of config.json are compiled once into an index of field specs,
+then every response object is checked in a single pass over its nested dictionaries,
+reporting all the missing, mistyped or unexpected fields at once.
+
+A field spec is either:
+    * a bare key (``sha``), found at any depth of the object,
+    * a dotted path from the root of the object (``commit.author.date``),
+optionally followed by a JSON type (``commit.author.date:string``).
+
+Objects can be decoded dicts or any other mapping, such as the lazy views of lazyjson.py
+(only the fields looked at are then decoded).
+"""
+
+from collections import deque
+from collections.abc import Mapping
+
+from lazyjson import ArrayView
+
+
+# JSON type names usable in field specs
+JSON_TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "object": (Mapping,),
+    "array": (list, ArrayView),
+    "null": (type(None),),
+}
+
+
+def type_matches(value, type_name):
+    """
+    Tells whether a decoded JSON value has the given JSON type.
+    """
+
+    if isinstance(value, bool) and type_name in ("integer", "number"):
+        return False
+    return isinstance(value, JSON_TYPES[type_name])
+
+
+class Schema:
+    """
+    Set of expected fields compiled for single pass validation.
+
+    Args:
+        fields (list): Field specs (see module docstring).
+        exact (bool): If True, bare keys must be top-level keys of the object and the
+            object must not have any top-level key that is not expected.
+
+    Raises:
+        ValueError: If a field spec uses an unknown type.
+    """
+
+    def __init__(self, fields, exact=False):
+        self.exact = exact
+        self.keys = {}  # bare key -> type name (or None)
+        self.paths = {}  # dotted path -> type name (or None)
+
+        for spec in fields:
+            field, _, type_name = spec.partition(":")
+            if type_name and type_name not in JSON_TYPES:
+                raise ValueError(f"Unknown type '{type_name}' in field spec '{spec}'")
+            index = self.paths if "." in field else self.keys
+            index[field] = type_name or None
+
+        # Top-level keys allowed in exact mode
+        self.top_level = set(self.keys) | {path.split(".", 1)[0] for path in self.paths}
+
+    def errors(self, obj):
+        """
+        Validates an object and returns the list of problems found (empty if valid).
+
+        Args:
+            obj (Mapping): The decoded response object.
+
+        Returns:
+            list: Human readable error messages.
+        """
+
+        if not isinstance(obj, Mapping):
+            return [f"Expected an object, got {type(obj).__name__}"]
+
+        errors = []
+        found = {}  # field -> value of its first (shallowest) occurrence
+
+        if self.exact:
+            # Bare keys must be top-level keys
+            found.update((key, obj[key]) for key in self.keys if key in obj)
+            remaining = len(self.paths)
+        else:
+            remaining = len(self.keys) + len(self.paths)
+
+        # Breadth-first walk, stopping as soon as every field has been found
+        queue = deque([(obj, "")])
+        while queue and remaining:
+            current, prefix = queue.popleft()
+            for key, value in current.items():
+                path = prefix + key
+                if not self.exact and key in self.keys and key not in found:
+                    found[key] = value
+                    remaining -= 1
+                if path in self.paths and path not in found:
+                    found[path] = value
+                    remaining -= 1
+                if isinstance(value, Mapping):
+                    queue.append((value, path + "."))
+
+        for index in (self.keys, self.paths):
+            for field, type_name in index.items():
+                if field not in found:
+                    errors.append(f"Missing field '{field}'")
+                elif type_name and not type_matches(found[field], type_name):
+                    errors.append(f"Field '{field}' should be {type_name}, got {type(found[field]).__name__}")
+
+        if self.exact:
+            for key in sorted(obj.keys() - self.top_level):
+                errors.append(f"Unexpected field '{key}'")
+
+        return errors
+
+    def check(self, obj):
+        """
+        Validates an object, raising an AssertionError listing every problem found.
+        """
+
+        errors = self.errors(obj)
+        assert not errors, "Response does not match expected fields: " + "; ".join(errors)
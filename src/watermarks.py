@@ -0,0 +1,152 @@
+"""
+Incremental validation of commit histories.
+
+Validating every commit of a busy repository on every run means downloading its whole
+history again. A ``WatermarkStore`` keeps, per repository, the newest commit (sha and
+date) whose history was fully validated; the next run walks the listing back from the
+newest commit, one page after another, and stops as soon as it reaches the known sha, so
+each commit is checked once while the runs only pay for the pages of the new ones.
+
+The listing is not filtered with ``since=``: it filters on the committer date, so a
+commit authored before the watermark and merged after it would be missed. Walking back
+still relies on the order of the listing (newest commit date first), like ``git log``:
+such a commit is only seen if it is listed before the known sha.
+
+The watermark only moves once every new commit passed the check, so a failed run
+validates the same commits again next time.
+"""
+
+import sqlite3
+import threading
+import time
+
+from pagination import fetch_page, page_items, paginate
+
+
+PER_PAGE = 100  # Commits listed per page
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS watermarks (
+    repository TEXT PRIMARY KEY,
+    sha TEXT NOT NULL,
+    date TEXT NOT NULL,
+    validated_at REAL NOT NULL
+);
+"""
+
+
+def commit_date(commit):
+    """
+    Returns the committer date of a commit of the list endpoint (the date it is listed by).
+    """
+
+    details = commit["commit"]
+    return (details.get("committer") or details["author"])["date"]
+
+
+class WatermarkStore:
+    """
+    SQLite store of the newest validated commit of every repository.
+
+    Args:
+        path (str): The SQLite database file, created if needed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def get(self, repository):
+        """
+        Returns the ``(sha, date)`` watermark of a repository, or None.
+        """
+
+        with self._lock:
+            return self._connection.execute("SELECT sha, date FROM watermarks WHERE repository = ?",
+                                            (repository,)).fetchone()
+
+    def set(self, repository, sha, date):
+        """
+        Moves the watermark of a repository to a commit.
+        """
+
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?)",
+                                     (repository, sha, date, time.time()))
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def walk_back(session, url, sha, **kwargs):
+    """
+    Yields the commits of a listing newer than a known one, following the ``next`` links
+    one page at a time so that no page after the one holding ``sha`` is requested.
+
+    Args:
+        session (requests.Session): The shared HTTP session.
+        url (str): URL of the commit list endpoint.
+        sha (str): The known commit, where the walk stops (the whole history if not found).
+        **kwargs: Extra arguments for ``session.get`` (headers, verify...).
+
+    Yields:
+        dict: The decoded commits, newest first.
+    """
+
+    params = {"per_page": PER_PAGE}
+    while url:
+        response = fetch_page(session, url, params=params, stream=True, **kwargs)
+        found = False
+        # The rest of the page is still read, so that the response cache can revalidate it next time
+        for commit in page_items(response, stream=True):
+            found = found or commit["sha"] == sha
+            if not found:
+                yield commit
+        if found:
+            return
+        url, params = response.links.get("next", {}).get("url"), None
+
+
+def validate_new_commits(session, url, check, store=None, repository=None, **kwargs):
+    """
+    Validates the commits of a repository that are newer than its watermark.
+
+    Args:
+        session (requests.Session): The shared HTTP session.
+        url (str): URL of the commit list endpoint.
+        check (callable): Called with every new commit; raises if it is not valid.
+        store (WatermarkStore): Where the watermarks are kept, or None to validate the
+            whole history.
+        repository (str): Name of the repository in the store (default: ``url``).
+        **kwargs: Extra arguments for ``session.get`` (headers, verify...).
+
+    Returns:
+        int: The number of commits validated.
+
+    Raises:
+        requests.HTTPError: If a page is answered with an error status code.
+    """
+
+    repository = repository or url
+    watermark = store.get(repository) if store is not None else None
+    if watermark is None:
+        commits = paginate(session, url, params={"per_page": PER_PAGE}, stream=True, **kwargs)
+    else:
+        commits = walk_back(session, url, watermark[0], **kwargs)
+
+    newest = None
+    count = 0
+    for commit in commits:
+        check(commit)
+        count += 1
+        if newest is None:
+            newest = commit
+
+    if store is not None and newest is not None:
+        store.set(repository, newest["sha"], commit_date(newest))
+    return count
@@ -0,0 +1,173 @@
+"""
+Dependency graph of API steps, run by an asyncio engine.
+
+A ``Workflow`` is a set of ``Step`` objects, each naming the steps whose results it needs.
+``Workflow.run`` starts every step as soon as its dependencies are done, so independent
+steps run concurrently in waves instead of one after the other, and each step receives
+the results of its dependencies (e.g. one repository listing shared by several steps).
+
+Steps are plain blocking functions (they use the shared ``requests`` session); the engine
+runs each of them in a worker thread with ``asyncio.to_thread``, in a copy of the caller
+context, so the deadline of the workflow (see deadlines.py) applies to every step, and
+steps not started before it fail at once.
+"""
+
+import asyncio
+import time
+
+import deadlines
+
+
+class WorkflowError(Exception):
+    """
+    Raised when a workflow is not a valid dependency graph (unknown step, cycle...).
+    """
+
+
+class DependencyFailed(Exception):
+    """
+    Error of a step that was not run because one of its dependencies failed.
+    """
+
+
+class Step:
+    """
+    One step of a workflow.
+
+    Args:
+        name (str): Unique name of the step.
+        func (callable): Called with the workflow arguments followed by the results of
+            ``requires``, in that order. Its return value is the result of the step.
+        requires (list): Names of the steps that must succeed before this one.
+    """
+
+    def __init__(self, name, func, requires=()):
+        self.name = name
+        self.func = func
+        self.requires = list(requires)
+
+
+class Outcome:
+    """
+    Result of a step: its return value, or the exception it raised, and its duration.
+    """
+
+    def __init__(self, result=None, error=None, duration=0.0):
+        self.result = result
+        self.error = error
+        self.duration = duration
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def get(self):
+        """
+        Returns the result of the step, raising its error if it failed.
+        """
+
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class Workflow:
+    """
+    Validated dependency graph of steps.
+
+    Args:
+        steps (list): The ``Step`` objects.
+
+    Raises:
+        WorkflowError: If two steps have the same name, a step requires an unknown
+            step, or the dependencies contain a cycle.
+    """
+
+    def __init__(self, steps):
+        self.steps = {}
+        for step in steps:
+            if step.name in self.steps:
+                raise WorkflowError(f"Duplicate step '{step.name}'")
+            self.steps[step.name] = step
+        for step in steps:
+            for name in step.requires:
+                if name not in self.steps:
+                    raise WorkflowError(f"Step '{step.name}' requires unknown step '{name}'")
+        self.waves = self._waves()
+
+    def _waves(self):
+        # Kahn's algorithm, grouping the steps whose dependencies are all in earlier waves
+        done = set()
+        waves = []
+        while len(done) < len(self.steps):
+            wave = [name for name, step in self.steps.items()
+                    if name not in done and all(required in done for required in step.requires)]
+            if not wave:
+                raise WorkflowError("Cyclic dependencies between steps: "
+                                    + ", ".join(name for name in self.steps if name not in done))
+            waves.append(wave)
+            done.update(wave)
+        return waves
+
+    async def run_async(self, *args):
+        """
+        Runs every step once its dependencies succeeded.
+
+        Args:
+            *args: Arguments passed first to every step (e.g. the session).
+
+        Returns:
+            dict: ``Outcome`` of every step, by name. Steps whose dependencies failed
+                are not run and get a ``DependencyFailed`` error.
+        """
+
+        tasks = {}
+
+        async def run_step(step):
+            dependencies = [await tasks[name] for name in step.requires]
+            failed = [name for name, outcome in zip(step.requires, dependencies) if not outcome.ok]
+            if failed:
+                return Outcome(error=DependencyFailed(f"{step.name} not run: {', '.join(failed)} failed"))
+            start = time.perf_counter()
+            try:
+                deadlines.check(f"start {step.name}")
+                result = await asyncio.to_thread(step.func, *args, *(outcome.result for outcome in dependencies))
+            except Exception as error:
+                return Outcome(error=error, duration=time.perf_counter() - start)
+            return Outcome(result, duration=time.perf_counter() - start)
+
+        for wave in self.waves:
+            for name in wave:
+                tasks[name] = asyncio.ensure_future(run_step(self.steps[name]))
+        return {name: await task for name, task in tasks.items()}
+
+    def run(self, *args):
+        """
+        Runs the workflow in a new event loop (see ``run_async``).
+        """
+
+        return asyncio.run(self.run_async(*args))
+
+    def run_sequentially(self, *args):
+        """
+        Runs the steps one after the other in the current thread, wave by wave (e.g. to
+        compare with the engine). Takes and returns the same as ``run_async``.
+        """
+
+        outcomes = {}
+        for wave in self.waves:
+            for name in wave:
+                step = self.steps[name]
+                failed = [required for required in step.requires if not outcomes[required].ok]
+                if failed:
+                    outcomes[name] = Outcome(error=DependencyFailed(f"{name} not run: {', '.join(failed)} failed"))
+                    continue
+                start = time.perf_counter()
+                try:
+                    deadlines.check(f"start {name}")
+                    result = step.func(*args, *(outcomes[required].result for required in step.requires))
+                except Exception as error:
+                    outcomes[name] = Outcome(error=error, duration=time.perf_counter() - start)
+                else:
+                    outcomes[name] = Outcome(result, duration=time.perf_counter() - start)
+        return outcomes